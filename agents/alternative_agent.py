@@ -3,23 +3,29 @@
 Suggests alternatives and checks availability using price tools.
 """
 from typing import Dict, Any
-from real_time_shopping_assistant.tools.price_tool import price_search_tool, check_stock_tool
+from real_time_shopping_assistant.tools.price_tool import price_search_tool, stock_check_batcher
+from real_time_shopping_assistant.tools.fetch_context import FetchContext
+from real_time_shopping_assistant.infra.tracing import traced
 from real_time_shopping_assistant.utils.langchain_compat import Tool
 
 
-async def run_alternative_agent(product_id: str) -> Dict[str, Any]:
-    listings = await price_search_tool._arun(product_id)
+@traced("agent.alternative")
+async def run_alternative_agent(product_id: str, ctx: FetchContext | None = None) -> Dict[str, Any]:
+    ctx = ctx or FetchContext()
+    listings = await ctx.call_or(price_search_tool, product_id, [])
     # Suggest alternatives: pick second-cheapest or different seller
-    sorted_l = sorted(listings, key=lambda x: x['price']) if listings else []
+    sorted_l = sorted(listings, key=lambda x: x["price"]) if listings else []
     alternative = sorted_l[1] if len(sorted_l) > 1 else (sorted_l[0] if sorted_l else None)
-    stock_checks = []
-    for l in (sorted_l[:3] if sorted_l else []):
-        stock = await check_stock_tool._arun({"seller": l['seller'], "product_id": product_id})
-        stock_checks.append(stock)
+    # One batched lookup for the top sellers, coalesced with other in-flight events
+    pairs = [(l["seller"], product_id) for l in sorted_l[:3]]
+    stock_checks = await ctx.call_or(stock_check_batcher, pairs, None) if pairs else []
 
     availability_score = 0.0
-    if stock_checks:
-        scores = [1.0 if s['availability']=="in_stock" else 0.6 if s['availability']=="limited" else 0.0 for s in stock_checks]
+    if stock_checks is None or not listings:
+        # Unknown availability (tool degraded): neutral rather than "out of stock"
+        stock_checks, availability_score = [], 0.5
+    elif stock_checks:
+        scores = [1.0 if s["availability"]=="in_stock" else 0.6 if s["availability"]=="limited" else 0.0 for s in stock_checks]
         availability_score = round(sum(scores)/len(scores), 3)
 
     return {
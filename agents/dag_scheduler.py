@@ -0,0 +1,118 @@
+"""Dependency-graph scheduler for agent and tool calls.
+
+Each node declares the names of the nodes it consumes. Nodes start as soon as
+their own inputs have resolved, so independent work overlaps and the event's
+latency is bounded by the critical path rather than by stage barriers. A node can
+declare a fallback that replaces its result when it or one of its inputs fails.
+Per-node start/finish offsets (seconds since `t0`) are recorded for inspection.
+"""
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Dict, Iterable, List
+
+from real_time_shopping_assistant.tools.fetch_context import time_left
+
+
+class DagNode:
+    def __init__(self, name: str, func: Callable[..., Any], inputs: Iterable[str] = (),
+                 fallback: Callable[[Exception], Any] | None = None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.fallback = fallback
+
+
+class DagScheduler:
+    def __init__(self, timings: Dict[str, Dict[str, Any]] | None = None, t0: float | None = None, prefix: str = ""):
+        self.nodes: Dict[str, DagNode] = {}
+        self.timings = timings if timings is not None else {}
+        self.t0 = t0
+        self.prefix = prefix
+
+    def add(self, name: str, func: Callable[..., Any], inputs: Iterable[str] = (),
+            fallback: Callable[[Exception], Any] | None = None) -> "DagScheduler":
+        # func receives the results of `inputs` positionally, in declared order.
+        # If it (or an input without a fallback) raises, fallback(exc) becomes the result.
+        if name in self.nodes:
+            raise ValueError(f"Duplicate DAG node: {name}")
+        self.nodes[name] = DagNode(name, func, inputs, fallback)
+        return self
+
+    def _validate(self):
+        # Kahn's algorithm: every input must exist and the graph must be acyclic
+        indegree = {}
+        for node in self.nodes.values():
+            for dep in node.inputs:
+                if dep not in self.nodes:
+                    raise ValueError(f"DAG node {node.name!r} depends on unknown node {dep!r}")
+            indegree[node.name] = len(node.inputs)
+        ready = [n for n, d in indegree.items() if d == 0]
+        seen = 0
+        while ready:
+            name = ready.pop()
+            seen += 1
+            for node in self.nodes.values():
+                if name in node.inputs:
+                    indegree[node.name] -= 1
+                    if indegree[node.name] == 0:
+                        ready.append(node.name)
+        if seen != len(self.nodes):
+            raise ValueError("DAG contains a cycle")
+
+    async def run(self) -> Dict[str, Any]:
+        self._validate()
+        t0 = self.t0 if self.t0 is not None else time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def _run_node(node: DagNode):
+            start = time.perf_counter()
+            degraded = False
+            try:
+                args = [await tasks[dep] for dep in node.inputs]
+                start = time.perf_counter()
+                result = node.func(*args)
+                if inspect.isawaitable(result):
+                    # Async nodes never outlive the event deadline (sync nodes always run)
+                    left = time_left()
+                    result = await (result if left is None else asyncio.wait_for(result, max(left, 0.0)))
+            except Exception as exc:
+                if node.fallback is None:
+                    raise
+                result, degraded = node.fallback(exc), True
+            self.timings[self.prefix + node.name] = {
+                "start": round(start - t0, 6),
+                "end": round(time.perf_counter() - t0, 6),
+                "inputs": [self.prefix + dep for dep in node.inputs],
+            }
+            if degraded:
+                self.timings[self.prefix + node.name]["degraded"] = True
+            return result
+
+        for node in self.nodes.values():
+            tasks[node.name] = asyncio.create_task(_run_node(node))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return {name: task.result() for name, task in tasks.items()}
+
+    def critical_path(self) -> List[str]:
+        # Walk back from the last node to finish via the input that finished last
+        own = {self.prefix + n: n for n in self.nodes}
+        finished = [t for t in self.timings if t in own]
+        if not finished:
+            return []
+        current = max(finished, key=lambda n: self.timings[n]["end"])
+        path = [current]
+        while True:
+            # Inputs that failed without a fallback never recorded timings
+            inputs = [n for n in self.timings[current]["inputs"] if n in self.timings]
+            if not inputs:
+                break
+            current = max(inputs, key=lambda n: self.timings[n]["end"])
+            path.append(current)
+        return list(reversed(path))
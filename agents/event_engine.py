@@ -0,0 +1,143 @@
+"""Concurrent Event Engine
+
+Dispatches events to an async handler with a fixed pool of workers. Events for the
+same user_id are processed strictly in arrival order, while different users run in
+parallel. An in-flight cap applies backpressure to the event source, and the source
+is only slept on when it reports being idle (yields None). Both plain and async
+iterables are accepted; the source is not pulled while the in-flight cap is reached.
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import aclosing
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable
+
+from real_time_shopping_assistant.infra.logging_setup import logger
+
+
+class IdleBackoff:
+    """Exponential sleep used only while the event source has nothing to offer."""
+
+    def __init__(self, minimum: float = 0.01, maximum: float = 0.5):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.current = minimum
+        self.sleeps = 0
+
+    async def wait(self):
+        self.sleeps += 1
+        await asyncio.sleep(self.current)
+        self.current = min(self.maximum, self.current * 2)
+
+    def reset(self):
+        self.current = self.minimum
+
+
+async def _aiter_events(event_stream) -> AsyncIterator[Dict[str, Any] | None]:
+    if hasattr(event_stream, "__aiter__"):
+        async for event in event_stream:
+            yield event
+    else:
+        for event in event_stream:
+            yield event
+
+
+class EventEngine:
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Awaitable[Any]],
+        workers: int = 8,
+        max_in_flight: int = 64,
+        idle_backoff_min: float = 0.01,
+        idle_backoff_max: float = 0.5,
+    ):
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_in_flight = max(1, max_in_flight)
+        self.backoff = IdleBackoff(idle_backoff_min, idle_backoff_max)
+        # user_id -> FIFO of pending events; a user sits in `_ready` at most once
+        self._pending: Dict[Any, deque] = {}
+        self._active: set = set()
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._slots: asyncio.Semaphore | None = None
+        self._running_handlers = 0
+        self.stats = {
+            "processed": 0,
+            "failed": 0,
+            "workers": self.workers,
+            "max_in_flight": self.max_in_flight,
+            "peak_concurrency": 0,
+            "idle_sleeps": 0,
+            "elapsed_s": 0.0,
+            "events_per_s": 0.0,
+        }
+
+    async def _dispatch(self, event: Dict[str, Any]):
+        await self._slots.acquire()
+        user = event.get("user_id")
+        queue = self._pending.get(user)
+        if queue is None:
+            queue = self._pending[user] = deque()
+        queue.append(event)
+        if len(queue) == 1 and user not in self._active:
+            self._ready.put_nowait(user)
+
+    async def _worker(self):
+        while True:
+            user = await self._ready.get()
+            queue = self._pending[user]
+            event = queue.popleft()
+            self._active.add(user)
+            self._running_handlers += 1
+            if self._running_handlers > self.stats["peak_concurrency"]:
+                self.stats["peak_concurrency"] = self._running_handlers
+            try:
+                await self.handler(event)
+                self.stats["processed"] += 1
+            except Exception:
+                self.stats["failed"] += 1
+                logger.exception("Event handler failed for event_id=%s", event.get("event_id"))
+            finally:
+                self._running_handlers -= 1
+                self._active.discard(user)
+                if queue:
+                    self._ready.put_nowait(user)
+                else:
+                    del self._pending[user]
+                self._slots.release()
+                self._ready.task_done()
+
+    async def run(
+        self,
+        event_stream: Iterable[Dict[str, Any] | None] | AsyncIterable[Dict[str, Any] | None],
+        stop_after: int | None = None,
+        is_running: Callable[[], bool] = lambda: True,
+    ) -> Dict[str, Any]:
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        t0 = time.perf_counter()
+        dispatched = 0
+        try:
+            async with aclosing(_aiter_events(event_stream)) as events:
+                async for event in events:
+                    if not is_running():
+                        break
+                    if event is None:
+                        # Source is idle: back off instead of spinning
+                        await self.backoff.wait()
+                        continue
+                    self.backoff.reset()
+                    await self._dispatch(event)
+                    dispatched += 1
+                    if stop_after and dispatched >= stop_after:
+                        break
+            await self._ready.join()
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        elapsed = time.perf_counter() - t0
+        self.stats["idle_sleeps"] = self.backoff.sleeps
+        self.stats["elapsed_s"] = round(elapsed, 4)
+        self.stats["events_per_s"] = round(self.stats["processed"] / elapsed, 2) if elapsed > 0 else 0.0
+        return self.stats
@@ -2,63 +2,116 @@
 
 Consumes structured outputs from other agents and computes BUY_SCORE and final decision.
 This is implemented as a deterministic function and is exposed as a LangChain tool.
+Scoring is vectorized: an N x 5 component matrix is scored with one matrix-vector
+product, and the single-event functions are thin wrappers over the batch path.
 """
-from typing import Dict, Any
+from typing import Dict, Any, List, Sequence, Tuple
+import numpy as np
 from real_time_shopping_assistant.utils.langchain_compat import Tool
 from real_time_shopping_assistant.config.settings import settings
+from real_time_shopping_assistant.infra.tracing import traced
 from datetime import datetime, timezone
 
+COMPONENT_KEYS = (
+    "affordability_score",
+    "price_attractiveness",
+    "sentiment_score",
+    "availability_score",
+    "preference_score",
+)
+# compute_buy_score treats missing components as 0; fusion assumes neutral sentiment/preference
+SCORE_DEFAULTS = (0.0, 0.0, 0.0, 0.0, 0.0)
+FUSION_DEFAULTS = (0.0, 0.0, 0.5, 0.0, 0.5)
+
+# Decision codes index into these arrays
+NOT_BUY, DEFER, BUY = 0, 1, 2
+DECISIONS = np.array(["NOT_BUY", "DEFER", "BUY"], dtype=object)
+ACTIONS = np.array(["choose_alternative", "wait_for_deal", "add_to_cart"], dtype=object)
+DEFER_THRESHOLD = 0.4
+
+_weights: np.ndarray | None = None
+
+
+def weight_vector() -> np.ndarray:
+    # Read the weights from settings once; call reset_weight_vector() after changing them
+    global _weights
+    if _weights is None:
+        _weights = np.array([
+            settings.WEIGHT_AFFORDABILITY,
+            settings.WEIGHT_PRICE,
+            settings.WEIGHT_SENTIMENT,
+            settings.WEIGHT_AVAILABILITY,
+            settings.WEIGHT_PREFERENCE,
+        ], dtype=np.float64)
+    return _weights
+
+
+def reset_weight_vector():
+    global _weights
+    _weights = None
+
+
+def components_matrix(components: Sequence[Dict[str, Any]] | np.ndarray,
+                      defaults: Sequence[float] = SCORE_DEFAULTS) -> np.ndarray:
+    """Return an N x 5 float matrix from a matrix or a list of component dicts."""
+    if isinstance(components, np.ndarray):
+        return components.reshape(-1, len(COMPONENT_KEYS)).astype(np.float64, copy=False)
+    rows = [
+        [d if (v := c.get(k)) is None else v for k, d in zip(COMPONENT_KEYS, defaults)]
+        for c in components
+    ]
+    return np.array(rows, dtype=np.float64).reshape(-1, len(COMPONENT_KEYS))
+
+
+def compute_buy_scores(components: Sequence[Dict[str, Any]] | np.ndarray,
+                       defaults: Sequence[float] = SCORE_DEFAULTS) -> np.ndarray:
+    return np.round(components_matrix(components, defaults) @ weight_vector(), 4)
+
+
+def decisions_from_scores(buy_scores: np.ndarray) -> np.ndarray:
+    scores = np.asarray(buy_scores, dtype=np.float64)
+    codes = np.full(scores.shape, NOT_BUY, dtype=np.int8)
+    codes[scores >= DEFER_THRESHOLD] = DEFER
+    codes[scores >= settings.BUY_THRESHOLD] = BUY
+    return codes
+
+
+def score_batch(components: Sequence[Dict[str, Any]] | np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized fusion: returns (buy_scores, decision_codes) for N events."""
+    scores = compute_buy_scores(components, FUSION_DEFAULTS)
+    return scores, decisions_from_scores(scores)
+
 
 def compute_buy_score(component_scores: Dict[str, float]) -> float:
     # Apply weights from settings
-    w_aff = settings.WEIGHT_AFFORDABILITY
-    w_price = settings.WEIGHT_PRICE
-    w_sent = settings.WEIGHT_SENTIMENT
-    w_avail = settings.WEIGHT_AVAILABILITY
-    w_pref = settings.WEIGHT_PREFERENCE
-
-    score = (
-        component_scores.get("affordability_score", 0) * w_aff +
-        component_scores.get("price_attractiveness", 0) * w_price +
-        component_scores.get("sentiment_score", 0) * w_sent +
-        component_scores.get("availability_score", 0) * w_avail +
-        component_scores.get("preference_score", 0) * w_pref
-    )
-    return round(score, 4)
+    return float(compute_buy_scores([component_scores])[0])
+
 
+def fusion_decisions(components_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    matrix = components_matrix(components_list, FUSION_DEFAULTS)
+    scores, codes = score_batch(matrix)
+    timestamp = datetime.now(timezone.utc).isoformat()
+    out = []
+    for components, row, score, code in zip(components_list, matrix.tolist(), scores.tolist(), codes.tolist()):
+        decision = {
+            "decision": DECISIONS[code],
+            "buy_score": score,
+            "component_scores": dict(zip(COMPONENT_KEYS, row)),
+            "reasoning": f"Weighted fusion on components -> buy_score={score}",
+            "recommended_action": ACTIONS[code],
+            "timestamp": timestamp,
+        }
+        # include evidence if present
+        if "evidence" in components:
+            decision["evidence"] = components["evidence"]
+        out.append(decision)
+    return out
 
+
+@traced("agent.fusion")
 def fusion_decision(components: Dict[str, Any]) -> Dict[str, Any]:
     # components expected to include numeric component scores
-    comp_scores = {
-        "affordability_score": components.get("affordability_score", 0.0),
-        "price_attractiveness": components.get("price_attractiveness", 0.0),
-        "sentiment_score": components.get("sentiment_score", 0.5),
-        "availability_score": components.get("availability_score", 0.0),
-        "preference_score": components.get("preference_score", 0.5),
-    }
-    buy_score = compute_buy_score(comp_scores)
-    if buy_score >= settings.BUY_THRESHOLD:
-        decision = "BUY"
-        action = "add_to_cart"
-    elif buy_score >= 0.4:
-        decision = "DEFER"
-        action = "wait_for_deal"
-    else:
-        decision = "NOT_BUY"
-        action = "choose_alternative"
-
-    out = {
-        "decision": decision,
-        "buy_score": buy_score,
-        "component_scores": comp_scores,
-        "reasoning": f"Weighted fusion on components -> buy_score={buy_score}",
-        "recommended_action": action,
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-    }
-    # include evidence if present
-    if "evidence" in components:
-        out["evidence"] = components["evidence"]
-    return out
+    return fusion_decisions([components])[0]
 
 
 fusion_agent_tool = Tool.from_function(
@@ -3,57 +3,119 @@
 Orchestrates ingestion of events, calls agents (possibly in parallel), records memory and logs.
 Uses async execution and demonstrates LangChain AgentExecutor patterns in concept.
 """
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import Callable, Dict, Any, List, Sequence
 import asyncio
-from typing import Dict, Any
 import time
-import json
-from real_time_shopping_assistant.infra.logging_setup import logger
-from real_time_shopping_assistant.infra.metrics import record_metrics
-from real_time_shopping_assistant.memory.short_term_memory import create_short_term_memory
-from real_time_shopping_assistant.memory.long_term_memory import long_term_memory
-
-from real_time_shopping_assistant.tools.cart_tool import tool as cart_tool
-from real_time_shopping_assistant.tools.profile_tool import tool as profile_tool
+from real_time_shopping_assistant.config.settings import settings
+from real_time_shopping_assistant.infra.logging_setup import logger, decision_log_payload
+from real_time_shopping_assistant.infra.metrics import flush_metrics, record_metrics
+from real_time_shopping_assistant.infra.tracing import LoopLagMonitor, maybe_profile, stage_quantiles
+from real_time_shopping_assistant.memory.short_term_memory import create_session_memory
+import real_time_shopping_assistant.memory.decision_history as decision_log
+import real_time_shopping_assistant.memory.long_term_memory as long_term
+import real_time_shopping_assistant.memory.sentiment_aggregates as aggregates
+from real_time_shopping_assistant.utils.lazy import initialized
+
+from real_time_shopping_assistant.tools.user_state_cache import user_state_cache
 from real_time_shopping_assistant.agents.price_agent import price_agent_tool
 from real_time_shopping_assistant.agents.review_agent import review_agent_tool
 from real_time_shopping_assistant.agents.user_finance_agent import user_finance_tool
 from real_time_shopping_assistant.agents.alternative_agent import alternative_agent_tool
 from real_time_shopping_assistant.agents.fusion_agent import fusion_agent_tool
+from real_time_shopping_assistant.agents.event_engine import EventEngine
+from real_time_shopping_assistant.agents.dag_scheduler import DagScheduler
+from real_time_shopping_assistant.tools.fetch_context import FetchContext, deadline_scope
+from real_time_shopping_assistant.tools.single_flight import single_flight_stats
+from real_time_shopping_assistant.tools.resilience import breaker_states
 
 
 class LoopOrchestrator:
-    def __init__(self):
-        self.short_memory = create_short_term_memory()
-        self.long_memory = long_term_memory
+    def __init__(self, clock: Callable[[], float] | None = None):
+        # `clock` (epoch seconds) replaces wall time for decision timestamps, e.g. in replays
+        self.clock = clock
+        self.short_memory = create_session_memory(clock) if clock else create_session_memory()
+        self.user_state = user_state_cache
         self.iteration = 0
         self._running = False
+        self.last_run_stats: Dict[str, Any] = {}
+        self.fetch_calls_saved = 0
 
-    async def ingest_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
+    # Disk-backed stores are opened on first use, so constructing the orchestrator is cheap
+    @cached_property
+    def long_memory(self):
+        return long_term.long_term_memory
+
+    @cached_property
+    def decision_history(self):
+        return decision_log.decision_history
+
+    async def ingest_event(self, event: Dict[str, Any], ctx: FetchContext | None = None) -> Dict[str, Any]:
         # Basic ingestion: orchestrate multiple agent calls and fuse
         t0 = time.time()
         user_id = event.get("user_id")
         product_id = event.get("product_id")
         price = event.get("price")
+        # One fetch context per event: every agent shares the same upstream snapshot
+        ctx = ctx or FetchContext()
+        # Drop cached user state this event makes stale (e.g. cart_add -> cart)
+        self.user_state.on_event(event)
 
-        # Fetch profile and cart concurrently
-        profile_task = asyncio.create_task(profile_tool._arun(user_id))
-        cart_task = asyncio.create_task(cart_tool._arun(user_id))
-        price_task = asyncio.create_task(price_agent_tool.run(product_id)) if hasattr(price_agent_tool, 'run') else asyncio.create_task(price_agent_tool.func(product_id))
-
+        # Each node declares its inputs; it starts as soon as those have resolved.
         # For tools created via Tool.from_function, call .func (async function)
-        profile_json = await profile_task
-        cart_json = await cart_task
-        price_out = await price_task
+        dag = DagScheduler(timings=ctx.timings, t0=ctx.started)
+        # Any node that fails or runs past the event deadline falls back to a neutral output
+        dag.add("profile", lambda: ctx.call_or(self.user_state.profile_lookup, user_id, None))
+        dag.add("cart", lambda: ctx.call_or(self.user_state.cart_lookup, user_id, None))
+        dag.add("price", lambda: price_agent_tool.func(product_id, ctx),
+                fallback=lambda exc: {"price_attractiveness": 0.5, "degraded": True})
+        dag.add("review", lambda: review_agent_tool.func(product_id, ctx),
+                fallback=lambda exc: {"reviews": [], "sentiment_score": 0.5, "degraded": True})
+        dag.add("alternative", lambda: alternative_agent_tool.func(product_id, ctx),
+                fallback=lambda exc: {"alternative": None, "stock_checks": [], "availability_score": 0.5,
+                                      "degraded": True})
+        dag.add("finance", lambda profile: user_finance_tool.func(profile, price), inputs=("profile",),
+                fallback=lambda exc: {"affordability_score": 0.5, "reasoning": f"degraded: {exc!r}", "degraded": True})
+        dag.add("fusion", self._fuse, inputs=("price", "review", "finance", "alternative"))
+        with maybe_profile(event.get("event_id")), deadline_scope(settings.EVENT_DEADLINE):
+            results = await dag.run()
+        decision = results["fusion"]
+        now = self.clock() if self.clock else None
+        if now is not None:
+            decision["timestamp"] = datetime.fromtimestamp(now, timezone.utc).isoformat()
+
+        # Update memories; session turns drop the evidence so per-user memory stays small
+        self.short_memory.save_context(
+            user_id, {"input": event}, {"output": {k: v for k, v in decision.items() if k != "evidence"}}
+        )
+        # long-term memory: event + decision become a document, embedded in batches
+        self.long_memory.save_context({"input": event}, {"output": decision})
+        # decision history: what we decided for this user/product before, then append this one
+        previous = self.decision_history.last_decision(user_id, product_id)
+        self.decision_history.record(user_id, product_id, decision.get("buy_score"), decision.get("decision"),
+                                     ts=now)
 
-        # Call other agents
-        review_task = asyncio.create_task(review_agent_tool.func(product_id))
-        finance_task = asyncio.create_task(user_finance_tool.func(profile_json, price))
-        alternative_task = asyncio.create_task(alternative_agent_tool.func(product_id))
+        loop_time = round(time.time() - t0, 3)
+        # metrics
+        record_metrics(loop_time, 1, 1.0 if decision.get('decision')=='BUY' else 0.0, decision.get('buy_score'),
+                       timestamp=now, decision=decision.get('decision'), stages=ctx.timings)
 
-        review_out = await review_task
-        finance_out = await finance_task
-        alt_out = await alternative_task
+        self.iteration += 1
+        self.fetch_calls_saved += ctx.saved
+        # Dict payloads are serialized on the log listener thread, not here
+        logger.info(decision_log_payload(
+            event.get("event_id"),
+            decision,
+            fetch=ctx.stats(),
+            critical_path=dag.critical_path(),
+            previous_decision=previous,
+        ))
+        return decision
 
+    @staticmethod
+    def _fuse(price_out: Dict[str, Any], review_out: Dict[str, Any], finance_out: Dict[str, Any],
+              alt_out: Dict[str, Any]) -> Dict[str, Any]:
         # Build components and evidence
         components = {
             "affordability_score": finance_out.get("affordability_score"),
@@ -68,38 +130,81 @@ class LoopOrchestrator:
                 "finance_reasoning": finance_out.get("reasoning"),
             },
         }
-
-        decision = fusion_agent_tool.func(components)
-
-        # Update memories
-        self.short_memory.save_context({"input": event}, {"output": decision})
-        # long-term memory: store the event and decision as a document
-        # vectorstore insertion simplified: use memory.retriever.store? for demo we skip
-
-        loop_time = round(time.time() - t0, 3)
-        # metrics
-        record_metrics(loop_time, 1, 1.0 if decision.get('decision')=='BUY' else 0.0, decision.get('buy_score'))
-
-        self.iteration += 1
-        logger.info(json.dumps({"event_id": event.get("event_id"), "decision": decision}))
-        return decision
-
-    async def run_loop(self, event_stream, stop_after: int | None = None):
+        return fusion_agent_tool.func(components)
+
+    async def _prepare_batch(self, events: Sequence[Dict[str, Any]]):
+        # Warm the batch's profiles with one multi-get; invalidation still happens per event, in order
+        try:
+            await self.user_state.prefetch_profiles(events)
+        except Exception as exc:
+            # Not fatal: each event's own profile lookup fetches (or falls back) as usual
+            logger.warning("Profile prefetch failed for a batch of %d events: %r", len(events), exc)
+
+    async def ingest_batch(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Process a batch: one profile multi-get up front, then users concurrently.
+
+        Events of the same user still run in order; results keep the input order.
+        """
+        await self._prepare_batch(events)
+        by_user: Dict[Any, List[int]] = {}
+        for i, event in enumerate(events):
+            by_user.setdefault(event.get("user_id"), []).append(i)
+        results: List[Dict[str, Any] | None] = [None] * len(events)
+
+        async def _run_user(indexes: List[int]):
+            for i in indexes:
+                results[i] = await self.ingest_event(events[i])
+
+        await asyncio.gather(*[_run_user(indexes) for indexes in by_user.values()])
+        return results
+
+    async def run_loop(self, event_stream, stop_after: int | None = None,
+                       workers: int | None = None, max_in_flight: int | None = None) -> Dict[str, Any]:
+        # Events for one user run in order; different users run concurrently.
+        # A `None` item from the stream means "nothing available yet" and triggers idle backoff.
+        # A list is a batch: its profiles are fetched with one multi-get before dispatch
+        if isinstance(event_stream, list):
+            await self._prepare_batch([e for e in event_stream if e is not None])
         self._running = True
-        processed = 0
-        for event in event_stream:
-            if not self._running:
-                break
-            await self.ingest_event(event)
-            processed += 1
-            if stop_after and processed >= stop_after:
-                break
-            await asyncio.sleep(0.2)  # poll pause
-        self._running = False
+        engine = EventEngine(
+            self.ingest_event,
+            workers=workers or settings.ENGINE_WORKERS,
+            max_in_flight=max_in_flight or settings.ENGINE_MAX_IN_FLIGHT,
+            idle_backoff_min=settings.ENGINE_IDLE_BACKOFF_MIN,
+            idle_backoff_max=settings.ENGINE_IDLE_BACKOFF_MAX,
+        )
+        lag_monitor = LoopLagMonitor()
+        lag_monitor.start()
+        try:
+            stats = await engine.run(event_stream, stop_after=stop_after, is_running=lambda: self._running)
+        finally:
+            self._running = False
+            await lag_monitor.stop()
+        self.last_run_stats = stats
+        logger.info({
+            "engine_stats": stats,
+            "stage_latency": stage_quantiles(),
+            "user_cache": self.user_state.stats(),
+            "single_flight": single_flight_stats(),
+            "breakers": breaker_states(),
+        })
+        return stats
 
     def stop(self):
         self._running = False
 
+    def persist_state(self):
+        # Snapshot sentiment high-water marks, flush the decision log and metric rows and append
+        # new decision vectors to the on-disk index, so a restart resumes without re-scoring or
+        # re-embedding. Stores that were never opened have nothing new to persist.
+        flush_metrics()
+        if initialized(aggregates, "sentiment_aggregates"):
+            aggregates.sentiment_aggregates.snapshot()
+        if "decision_history" in vars(self):
+            self.decision_history.flush()
+        if "long_memory" in vars(self) and hasattr(self.long_memory, "save"):
+            self.long_memory.save()
+
 
 # Factory
 orchestrator = LoopOrchestrator()
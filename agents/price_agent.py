@@ -9,18 +9,33 @@ from typing import Any, Dict
 from real_time_shopping_assistant.tools.price_tool import price_search_tool, price_history_tool
 from real_time_shopping_assistant.tools.coupons_tool import coupons_tool
 from real_time_shopping_assistant.tools.code_exec_tool import code_exec_tool
+from real_time_shopping_assistant.tools.fetch_context import FetchContext
+from real_time_shopping_assistant.agents.dag_scheduler import DagScheduler
+from real_time_shopping_assistant.infra.tracing import traced
 
 
-async def run_price_agent(product_id: str) -> Dict[str, Any]:
+@traced("agent.price")
+async def run_price_agent(product_id: str, ctx: FetchContext | None = None) -> Dict[str, Any]:
     # Call price_search, get price_history, coupons, and run simulation
-    listings = await price_search_tool._arun(product_id)
-    history = await price_history_tool._arun(product_id)
-    coupons = await coupons_tool._arun(product_id)
-    current_price = min([l['price'] for l in listings]) if listings else 0.0
-    sim = await code_exec_tool._arun({"current_price": current_price, "history": history})
+    # Search, history and coupons are independent; the simulation needs search + history
+    ctx = ctx or FetchContext()
+
+    def simulate(listings, history):
+        current_price = min(l["price"] for l in listings) if listings else 0.0
+        return code_exec_tool._arun({"product_id": product_id, "current_price": current_price, "history": history})
+
+    dag = DagScheduler(timings=ctx.timings, t0=ctx.started, prefix="price.")
+    # Failed or timed-out tools degrade to empty inputs instead of failing the event
+    dag.add("search", lambda: ctx.call_or(price_search_tool, product_id, []))
+    dag.add("history", lambda: ctx.call_or(price_history_tool, product_id, []))
+    dag.add("coupons", lambda: ctx.call_or(coupons_tool, product_id, []))
+    dag.add("simulation", simulate, inputs=("search", "history"), fallback=lambda exc: {})
+    results = await dag.run()
+    listings, history, coupons, sim = results["search"], results["history"], results["coupons"], results["simulation"]
+    current_price = min(l["price"] for l in listings) if listings else 0.0
 
     # compute price attractiveness: lower price + coupons + high prob_drop -> higher score
-    coupon_savings = max([c['discount_pct'] for c in coupons], default=0.0)
+    coupon_savings = max((c["discount_pct"] for c in coupons), default=0.0)
     attractiveness = min(1.0, (1.0 - (current_price / (current_price + 100))) + coupon_savings / 100 + sim.get('probability_drop', 0))
 
     return {
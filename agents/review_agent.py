@@ -3,34 +3,119 @@
 This agent fetches reviews and computes a sentiment_score using a simple
 lexicon-based fallback, with optional LLM-based analysis placeholder.
 """
-from typing import Dict, Any, List
+import re
+from collections import OrderedDict
+from typing import Dict, Any, List, Mapping
 from real_time_shopping_assistant.tools.reviews_tool import get_reviews_tool
+from real_time_shopping_assistant.tools.fetch_context import FetchContext
+import real_time_shopping_assistant.memory.sentiment_aggregates as aggregates
+from real_time_shopping_assistant.infra.tracing import traced
 from real_time_shopping_assistant.utils.langchain_compat import Tool
 
 POSITIVE_WORDS = {"excellent","great","recommend","comfortable","good","love"}
 NEGATIVE_WORDS = {"disappointed","poor","stopped","bad","terrible","problem"}
+NEGATION_WORDS = {"not","no","never","hardly","without","nothing","nor"}
+
+# term -> weight added to the neutral 0.5 baseline when the term appears in a review
+DEFAULT_LEXICON = {**{w: 0.1 for w in POSITIVE_WORDS}, **{w: -0.15 for w in NEGATIVE_WORDS}}
+
+_TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?|[.,;:!?]")
+_SUFFIXES = ("ness", "ing", "ed", "ly", "es", "s")
+
+
+class SentimentScorer:
+    """Single-pass lexicon scorer with weighted terms, negation and per-review memoization.
+
+    Each review is tokenized once; every token is resolved against the compiled
+    lexicon with one dict lookup (plus light suffix stripping for inflections).
+    A negation word flips the sign of terms in the next `negation_window` tokens
+    of the same clause. Scores are cached by `review_id`.
+    """
+
+    def __init__(self, lexicon: Dict[str, float] | None = None, negations=NEGATION_WORDS,
+                 negation_window: int = 3, cache_size: int = 100_000):
+        self.lexicon = dict(DEFAULT_LEXICON if lexicon is None else lexicon)
+        self.negations = frozenset(negations)
+        self.negation_window = negation_window
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, float]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _lookup(self, token: str) -> str | None:
+        if token in self.lexicon:
+            return token
+        for suffix in _SUFFIXES:
+            if token.endswith(suffix) and len(token) > len(suffix) + 2:
+                stem = token[:-len(suffix)]
+                for candidate in (stem, stem + "e"):
+                    if candidate in self.lexicon:
+                        return candidate
+        return None
+
+    def score_text(self, text: str) -> float:
+        contributions: Dict[tuple, float] = {}
+        negate_left = 0
+        for token in _TOKEN_RE.findall(text.lower()):
+            if len(token) == 1 and not token.isalpha():
+                negate_left = 0  # clause boundary ends negation scope
+                continue
+            if token in self.negations or token.endswith("n't"):
+                negate_left = self.negation_window
+                continue
+            term = self._lookup(token)
+            if term is not None:
+                negated = negate_left > 0
+                # each distinct (term, polarity) counts once per review
+                contributions[(term, negated)] = -self.lexicon[term] if negated else self.lexicon[term]
+            if negate_left:
+                negate_left -= 1
+        return max(0.0, min(1.0, 0.5 + sum(contributions.values())))
+
+    def score_review(self, review: Dict[str, Any]) -> float:
+        review_id = review.get("review_id")
+        if review_id is None:
+            return self.score_text(review.get("text", ""))
+        cached = self._cache.get(review_id)
+        if cached is not None:
+            self.cache_hits += 1
+            self._cache.move_to_end(review_id)
+            return cached
+        self.cache_misses += 1
+        score = self.score_text(review.get("text", ""))
+        self._cache[review_id] = score
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return score
+
+    def score(self, reviews: List[Dict[str, Any]]) -> float:
+        if not reviews:
+            return 0.5
+        return round(sum(self.score_review(r) for r in reviews) / len(reviews), 3)
+
+    def score_batch(self, reviews_by_product: Mapping[str, List[Dict[str, Any]]]) -> Dict[str, float]:
+        return {product_id: self.score(reviews) for product_id, reviews in reviews_by_product.items()}
+
+
+sentiment_scorer = SentimentScorer()
 
 
 def lexicon_sentiment_score(reviews: List[Dict[str, Any]]) -> float:
-    if not reviews:
-        return 0.5
-    score_sum = 0.0
-    for r in reviews:
-        text = r.get("text", "").lower()
-        s = 0.5
-        for w in POSITIVE_WORDS:
-            if w in text:
-                s += 0.1
-        for w in NEGATIVE_WORDS:
-            if w in text:
-                s -= 0.15
-        score_sum += max(0.0, min(1.0, s))
-    return round(score_sum / len(reviews), 3)
-
-
-async def run_review_agent(product_id: str) -> Dict[str, Any]:
-    reviews = await get_reviews_tool._arun(product_id)
-    sentiment = lexicon_sentiment_score(reviews)
+    return sentiment_scorer.score(reviews)
+
+
+@traced("agent.review")
+async def run_review_agent(product_id: str, ctx: FetchContext | None = None) -> Dict[str, Any]:
+    ctx = ctx or FetchContext()
+    reviews = await ctx.call_or(get_reviews_tool, product_id, None)
+    if reviews is None:
+        # Reviews unavailable: last aggregate for the product, else neutral
+        score = aggregates.sentiment_aggregates.score(product_id)
+        return {"reviews": [], "sentiment_score": 0.5 if score is None else score, "degraded": True}
+    # Only reviews past the product's high-water mark are scored; the rest is O(1)
+    sentiment = aggregates.sentiment_aggregates.fold(product_id, reviews, sentiment_scorer.score_review)
+    if sentiment is None:
+        sentiment = 0.5
     return {"reviews": reviews, "sentiment_score": sentiment}
 
 
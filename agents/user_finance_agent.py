@@ -5,6 +5,8 @@ Implements a LangChain Chain that evaluates affordability, budget constraints, a
 from real_time_shopping_assistant.utils.langchain_compat import Tool
 from typing import Dict, Any
 import json
+from real_time_shopping_assistant.infra.tracing import traced
+from real_time_shopping_assistant.tools.records import Profile
 
 # This agent can use an LLMChain to generate human-readable reasoning,
 # but uses deterministic scoring for affordability.
@@ -24,8 +26,15 @@ def affordability_score(user_profile: Dict[str, Any], price: float) -> float:
     return 0.05
 
 
-async def run_user_finance_agent(profile_json: str, price: float) -> Dict[str, Any]:
-    profile = json.loads(profile_json)
+@traced("agent.finance")
+async def run_user_finance_agent(profile: Profile | str | None, price: float) -> Dict[str, Any]:
+    if profile is None:
+        # Profile unavailable: neutral affordability instead of guessing
+        return {"affordability_score": 0.5, "reasoning": "Profile unavailable; neutral affordability",
+                "profile": None, "degraded": True}
+    if isinstance(profile, str):
+        # JSON only when the profile comes from outside; tools hand over `Profile` records
+        profile = json.loads(profile)
     score = affordability_score(profile, price)
     reasoning = f"Affordability evaluated: balance={profile.get('current_balance')} monthly_budget={profile.get('monthly_budget')} price={price} -> score={score}"
     return {"affordability_score": score, "reasoning": reasoning, "profile": profile}
@@ -5,11 +5,29 @@ This module avoids a pydantic BaseSettings dependency to keep runtime
 simple for the demo environment. Replace with pydantic-settings in
 production if desired.
 """
-from dotenv import load_dotenv
 import os
 from dataclasses import dataclass
 
-load_dotenv()
+
+def _find_dotenv() -> str | None:
+    # Same search as python-dotenv's default (this file's directory up to the root),
+    # but with plain stat calls: python-dotenv is only imported when a .env exists
+    path = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        candidate = os.path.join(path, ".env")
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+_dotenv_path = _find_dotenv()
+if _dotenv_path:
+    from dotenv import load_dotenv
+
+    load_dotenv(_dotenv_path)
 
 
 @dataclass
@@ -18,7 +36,34 @@ class Settings:
     OPENAI_API_KEY: str | None = os.getenv("OPENAI_API_KEY")
     GEMINI_API_KEY: str | None = os.getenv("GEMINI_API_KEY")
     VECTOR_STORE_PATH: str = os.getenv("VECTOR_STORE_PATH", "./.vector_store")
+    # Long-term memory: "local" NumPy index (or "faiss" via LangChain), hashing embedding
+    # width, IVF partitioning (0 lists = exact search), decisions buffered per insert and
+    # when rows added since the last save are written into the mapped files (rows or seconds)
+    VECTOR_STORE_BACKEND: str = os.getenv("VECTOR_STORE_BACKEND", "local")
+    VECTOR_DIM: int = int(os.getenv("VECTOR_DIM", 256))
+    VECTOR_IVF_LISTS: int = int(os.getenv("VECTOR_IVF_LISTS", 0))
+    VECTOR_IVF_PROBES: int = int(os.getenv("VECTOR_IVF_PROBES", 8))
+    VECTOR_IVF_MIN_SIZE: int = int(os.getenv("VECTOR_IVF_MIN_SIZE", 10000))
+    LONG_TERM_BATCH_SIZE: int = int(os.getenv("LONG_TERM_BATCH_SIZE", 64))
+    VECTOR_STORE_SAVE_ROWS: int = int(os.getenv("VECTOR_STORE_SAVE_ROWS", 4096))
+    VECTOR_STORE_SAVE_INTERVAL: float = float(os.getenv("VECTOR_STORE_SAVE_INTERVAL", 60.0))
+    # Session memory: turns kept per user, LRU bound on users, idle TTL (seconds, 0 = off)
+    # and a global cap on stored turns across all users
+    SESSION_HISTORY_K: int = int(os.getenv("SESSION_HISTORY_K", 10))
+    SESSION_MAX_USERS: int = int(os.getenv("SESSION_MAX_USERS", 200000))
+    SESSION_IDLE_TTL: float = float(os.getenv("SESSION_IDLE_TTL", 1800))
+    SESSION_MAX_ENTRIES: int = int(os.getenv("SESSION_MAX_ENTRIES", 1000000))
+    # Decision history: segmented append-only log, rows per sealed segment and how many
+    # same-sized segments are merged by background compaction
+    DECISION_LOG_PATH: str = os.getenv("DECISION_LOG_PATH", "./.decision_log")
+    DECISION_LOG_SEGMENT_ROWS: int = int(os.getenv("DECISION_LOG_SEGMENT_ROWS", 65536))
+    DECISION_LOG_COMPACT_FANOUT: int = int(os.getenv("DECISION_LOG_COMPACT_FANOUT", 4))
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    # Log pipeline: bounded queue (records beyond it are dropped and counted) and decision
+    # evidence level: none | summary | full (full only for LOG_EVIDENCE_SAMPLE_RATE of events)
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+    LOG_EVIDENCE_LEVEL: str = os.getenv("LOG_EVIDENCE_LEVEL", "summary")
+    LOG_EVIDENCE_SAMPLE_RATE: float = float(os.getenv("LOG_EVIDENCE_SAMPLE_RATE", 0.01))
     APP_MODE: str = os.getenv("APP_MODE", "demo")
 
     # Decision weights for fusion scoring
@@ -30,5 +75,67 @@ class Settings:
 
     BUY_THRESHOLD: float = float(os.getenv("BUY_THRESHOLD", 0.6))
 
+    # Event engine: concurrent workers, in-flight cap and idle poll backoff (seconds)
+    ENGINE_WORKERS: int = int(os.getenv("ENGINE_WORKERS", 8))
+    ENGINE_MAX_IN_FLIGHT: int = int(os.getenv("ENGINE_MAX_IN_FLIGHT", 64))
+    ENGINE_IDLE_BACKOFF_MIN: float = float(os.getenv("ENGINE_IDLE_BACKOFF_MIN", 0.01))
+    ENGINE_IDLE_BACKOFF_MAX: float = float(os.getenv("ENGINE_IDLE_BACKOFF_MAX", 0.5))
+
+    # Shared tool cache: per-tool TTLs (seconds), LRU bound and stale-while-revalidate window
+    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", 10000))
+    CACHE_STALE_FACTOR: float = float(os.getenv("CACHE_STALE_FACTOR", 0.5))
+    CACHE_TTL_PRICE_SEARCH: float = float(os.getenv("CACHE_TTL_PRICE_SEARCH", 30))
+    CACHE_TTL_PRICE_HISTORY: float = float(os.getenv("CACHE_TTL_PRICE_HISTORY", 3600))
+    CACHE_TTL_REVIEWS: float = float(os.getenv("CACHE_TTL_REVIEWS", 1800))
+    CACHE_TTL_COUPONS: float = float(os.getenv("CACHE_TTL_COUPONS", 300))
+
+    # Resilience: per-event time budget (seconds, 0 = none) shared by every tool call and
+    # retry, and per-tool circuit breakers (consecutive failures to open, seconds until a trial)
+    EVENT_DEADLINE: float = float(os.getenv("EVENT_DEADLINE", 2.0))
+    BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+    BREAKER_RESET_TIMEOUT: float = float(os.getenv("BREAKER_RESET_TIMEOUT", 10.0))
+
+    # Per-user profile/cart cache: TTLs (seconds) backing event-driven invalidation, user
+    # bound, and the window in which concurrent profile misses share one multi-get
+    USER_CACHE_TTL_PROFILE: float = float(os.getenv("USER_CACHE_TTL_PROFILE", 600))
+    USER_CACHE_TTL_CART: float = float(os.getenv("USER_CACHE_TTL_CART", 60))
+    USER_CACHE_MAX_USERS: int = int(os.getenv("USER_CACHE_MAX_USERS", 100000))
+    USER_CACHE_BATCH_WINDOW: float = float(os.getenv("USER_CACHE_BATCH_WINDOW", 0.002))
+
+    # Batched stock checks: per-seller chunk size, concurrent seller calls, coalescing window (seconds)
+    STOCK_BATCH_MAX_SIZE: int = int(os.getenv("STOCK_BATCH_MAX_SIZE", 50))
+    STOCK_BATCH_CONCURRENCY: int = int(os.getenv("STOCK_BATCH_CONCURRENCY", 4))
+    STOCK_BATCH_WINDOW: float = float(os.getenv("STOCK_BATCH_WINDOW", 0.002))
+
+    # Monte Carlo price simulation: paths per product, horizon (days), drop threshold,
+    # and batch size above which work moves to a process pool (0 workers = cpu count)
+    SIM_N_PATHS: int = int(os.getenv("SIM_N_PATHS", 2000))
+    SIM_HORIZON_DAYS: int = int(os.getenv("SIM_HORIZON_DAYS", 14))
+    SIM_DROP_THRESHOLD: float = float(os.getenv("SIM_DROP_THRESHOLD", 0.01))
+    SIM_POOL_MIN_BATCH: int = int(os.getenv("SIM_POOL_MIN_BATCH", 64))
+    SIM_POOL_WORKERS: int = int(os.getenv("SIM_POOL_WORKERS", 0))
+    SIM_SEED: int | None = int(os.getenv("SIM_SEED")) if os.getenv("SIM_SEED") else None
+
+    # Incremental per-product sentiment: review-age half-life (seconds, 0 = no decay) and snapshot file
+    SENTIMENT_DECAY_HALF_LIFE: float = float(os.getenv("SENTIMENT_DECAY_HALF_LIFE", 30 * 86400))
+    SENTIMENT_SNAPSHOT_PATH: str = os.getenv("SENTIMENT_SNAPSHOT_PATH", "./.sentiment_aggregates.npz")
+
+    # Metrics: columnar per-event store (directory, rows per sealed chunk), batch flush
+    # (seconds / buffered rows) and Prometheus exposition (text file written on each
+    # flush and/or a local HTTP endpoint; port 0 = disabled)
+    METRICS_PATH: str = os.getenv("METRICS_PATH", "./.metrics")
+    METRICS_CHUNK_ROWS: int = int(os.getenv("METRICS_CHUNK_ROWS", 65536))
+    METRICS_FLUSH_INTERVAL: float = float(os.getenv("METRICS_FLUSH_INTERVAL", 5.0))
+    METRICS_FLUSH_ROWS: int = int(os.getenv("METRICS_FLUSH_ROWS", 500))
+    METRICS_PROM_FILE: str | None = os.getenv("METRICS_PROM_FILE")
+    METRICS_HTTP_PORT: int = int(os.getenv("METRICS_HTTP_PORT", 0))
+
+    # Tracing/profiling: event-loop lag probe interval (seconds) and the fraction of
+    # events run under cProfile, with profiles written to PROFILE_DIR
+    LOOP_LAG_INTERVAL: float = float(os.getenv("LOOP_LAG_INTERVAL", 0.1))
+    PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", 0.0))
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "./profiles")
+
 
 settings = Settings()
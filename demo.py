@@ -2,12 +2,12 @@
 
 This script demonstrates the loop for synthetic events. If a `synthetic_transactions.json`
 file is not present, it will auto-generate a small batch of events for the demo.
+Event files (JSON array or JSONL) are streamed rather than loaded whole.
 """
 import asyncio
-import json
 import os
-import random
 import sys
+import time
 from pathlib import Path
 
 # Ensure package can be imported when running demo.py directly
@@ -16,7 +16,9 @@ if str(repo_root) not in sys.path:
     sys.path.insert(0, str(repo_root))
 
 from real_time_shopping_assistant.agents.loop_orchestrator import orchestrator
+from real_time_shopping_assistant.evaluation.workload import WorkloadSpec, iter_events
 from real_time_shopping_assistant.infra.logging_setup import logger
+from real_time_shopping_assistant.utils.event_stream import stream_events
 
 
 def load_synthetic_events(path="synthetic_transactions.json"):
@@ -27,36 +29,21 @@ def load_synthetic_events(path="synthetic_transactions.json"):
         if not os.path.exists(candidate):
             candidate = path
     if os.path.exists(candidate):
-        with open(candidate, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
+        return stream_events(candidate)
+    return None
 
 
 def generate_synthetic_events(n=10):
-    events = []
-    for i in range(n):
-        user = f"user_{random.randint(1,50)}"
-        price = round(random.uniform(5, 500), 2)
-        pid = f"prod_{random.randint(1000, 2000)}"
-        ev = {
-            "event_id": f"demo_{i}",
-            "type": random.choice(["cart_add", "wishlist_add", "price_alert"]),
-            "timestamp": None,
-            "product_id": pid,
-            "product_name": f"Product {pid}",
-            "price": price,
-            "user_id": user,
-        }
-        events.append(ev)
-    return events
+    # Small population, so a short demo still shows repeat users and popular products
+    return list(iter_events(n, WorkloadSpec(seed=None, users=50, products=1000, max_price=500, start=time.time())))
 
 
 async def run_demo():
     events = load_synthetic_events()
-    if not events:
+    if events is None:
         logger.info("No synthetic events file found — generating demo events.")
         events = generate_synthetic_events(10)
-    await orchestrator.run_loop(events, stop_after=len(events))
+    await orchestrator.run_loop(events)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,139 @@
+"""Micro-benchmark: per-event cost of the tool -> agent data path.
+
+Compares the old path (pydantic models turned back into dicts with `.dict()`, profile
+and cart round-tripped through `.json()` / `json.loads`) with the `__slots__` records
+in `tools/records.py`. It builds one event's tool payloads (3 listings, 30 history
+points, 20 reviews, coupons, 3 stock checks, profile, cart) and reads them the way the
+agents do. Reports CPU time per event and bytes allocated/retained per event.
+
+Run from the repository root: `python -m evaluation.bench_records [--events N]`.
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from pydantic import BaseModel
+
+from tools.records import Cart, CartItem, Coupon, PriceListing, PricePoint, Profile, Review, StockCheck
+
+_SELLERS = ("RetailerA", "RetailerB", "RetailerC")
+_TEXT = "Great value for price. Highly recommend."
+_PREFS = {"brands": ["BrandA"], "avoid_categories": ["expensive_gadgets"]}
+
+
+# The pydantic schemas the tools used before records
+class _ListingModel(BaseModel):
+    seller: str
+    price: float
+    currency: str
+    shipping: float
+    timestamp: float
+
+
+class _ReviewModel(BaseModel):
+    review_id: str
+    rating: int
+    text: str
+    timestamp: float
+
+
+class _CouponModel(BaseModel):
+    code: str
+    discount_pct: float
+    expires_in_days: int
+
+
+class _ProfileModel(BaseModel):
+    user_id: str
+    monthly_budget: float
+    current_balance: float
+    loyalty_tier: str
+    preferences: Dict[str, Any]
+
+
+class _CartModel(BaseModel):
+    user_id: str
+    items: list[Dict[str, Any]]
+
+
+def legacy_event(i: int) -> Dict[str, Any]:
+    listings = [_ListingModel(seller=s, price=100.0 + k, currency="USD", shipping=1.0, timestamp=0.0).model_dump()
+                for k, s in enumerate(_SELLERS)]
+    history = [{"ts": i - d * 86400, "price": 100.0 + d % 10} for d in range(30)]
+    reviews = [_ReviewModel(review_id=f"p{i}:r_{r}", rating=4, text=_TEXT, timestamp=0.0).model_dump()
+               for r in range(20)]
+    coupons = [_CouponModel(code="SAVE10", discount_pct=10.0, expires_in_days=7).model_dump()]
+    stock = [dict({"seller": s, "product_id": f"p{i}", "availability": "in_stock", "eta_days": 0}) for s in _SELLERS]
+    profile_json = _ProfileModel(user_id=f"u{i}", monthly_budget=800.0, current_balance=250.0,
+                                 loyalty_tier="gold", preferences=_PREFS).model_dump_json()
+    cart_json = _CartModel(user_id=f"u{i}", items=[{"product_id": f"p{i}", "name": "X", "price": 129.99,
+                                                    "qty": 1}]).model_dump_json()
+    # Agent side
+    profile = json.loads(profile_json)
+    cart = json.loads(cart_json)
+    current = min(l["price"] for l in listings)
+    best_coupon = max((c["discount_pct"] for c in coupons), default=0.0)
+    in_stock = sum(1 for s in stock if s["availability"] == "in_stock")
+    return {"profile": profile, "cart": cart, "listings": listings, "history": history, "reviews": reviews,
+            "score": current + best_coupon + in_stock + profile["current_balance"]}
+
+
+def record_event(i: int) -> Dict[str, Any]:
+    listings = [PriceListing(s, 100.0 + k, "USD", 1.0, 0.0) for k, s in enumerate(_SELLERS)]
+    history = [PricePoint(i - d * 86400, 100.0 + d % 10) for d in range(30)]
+    reviews = [Review(f"p{i}:r_{r}", 4, _TEXT, 0.0) for r in range(20)]
+    coupons = [Coupon("SAVE10", 10.0, 7)]
+    stock = [StockCheck(s, f"p{i}", "in_stock", 0) for s in _SELLERS]
+    profile = Profile(f"u{i}", 800.0, 250.0, "gold", _PREFS)
+    cart = Cart(f"u{i}", [CartItem(f"p{i}", "X", 129.99, 1)])
+    # Agent side
+    current = min(l.price for l in listings)
+    best_coupon = max((c.discount_pct for c in coupons), default=0.0)
+    in_stock = sum(1 for s in stock if s.availability == "in_stock")
+    return {"profile": profile, "cart": cart, "listings": listings, "history": history, "reviews": reviews,
+            "score": current + best_coupon + in_stock + profile.current_balance}
+
+
+def measure(build: Callable[[int], Dict[str, Any]], n_events: int) -> Dict[str, float]:
+    for i in range(min(n_events, 200)):  # warm up caches and pydantic validators
+        build(i)
+    gc.collect()
+    t0 = time.perf_counter()
+    for i in range(n_events):
+        build(i)
+    cpu_us = (time.perf_counter() - t0) / n_events * 1e6
+
+    # Allocation: peak traced bytes while building one event at a time, and bytes
+    # still held once every event's payloads are kept (what caches end up holding)
+    sample = min(n_events, 2000)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    for i in range(sample):
+        build(i)
+    _, peak = tracemalloc.get_traced_memory()
+    kept: List[Dict[str, Any]] = []
+    base, _ = tracemalloc.get_traced_memory()
+    for i in range(sample):
+        kept.append(build(i))
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"cpu_us_per_event": round(cpu_us, 1), "peak_bytes_per_event": peak,
+            "retained_bytes_per_event": round((retained - base) / sample)}
+
+
+def run(n_events: int = 20000) -> Dict[str, Dict[str, float]]:
+    legacy = measure(legacy_event, n_events)
+    records = measure(record_event, n_events)
+    speedup = legacy["cpu_us_per_event"] / max(records["cpu_us_per_event"], 1e-9)
+    memory = legacy["retained_bytes_per_event"] / max(records["retained_bytes_per_event"], 1)
+    return {"legacy": legacy, "records": records,
+            "ratio": {"cpu": round(speedup, 2), "retained_bytes": round(memory, 2)}}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    print(json.dumps(run(parser.parse_args().events), indent=2))
@@ -0,0 +1,80 @@
+"""Startup benchmark: cold import time of the orchestrator in fresh interpreters.
+
+Each run starts a new Python process in an empty temporary directory, imports the
+module and reports how long the import took. It also lists the heavy optional
+dependencies that got loaded, any files the import created and any threads it
+started. None should be loaded, created or started at import time (the log listener
+and metrics flusher threads start with the first record): LangChain, pydantic, python-json-logger,
+python-dotenv, matplotlib and http.server are all imported on first use.
+
+Run: `python -m evaluation.bench_startup [--runs N] [--module M]` (the package must be
+importable, e.g. with its parent directory on PYTHONPATH).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict
+
+DEFAULT_MODULE = "real_time_shopping_assistant.agents.loop_orchestrator"
+# Budget for a cold import of the orchestrator, checked in tests/test_startup.py.
+# Eager imports used to take about 1.2 s here; now about 0.25 s, mostly numpy.
+IMPORT_BUDGET_S = 0.6
+HEAVY_MODULES = ("langchain", "langchain_core", "langgraph", "langsmith", "pydantic", "pythonjsonlogger",
+                 "dotenv", "matplotlib", "http.server")
+
+_PROBE = """
+import json, sys, threading, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+threads = threading.active_count() - 1
+heavy = {heavy!r}
+loaded = sorted(h for h in heavy if h in sys.modules)
+print(json.dumps({{"seconds": elapsed, "heavy": loaded, "modules": len(sys.modules), "threads": threads}}))
+"""
+
+
+def _probe(module: str, cwd: str) -> Dict[str, Any]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+    out = subprocess.run([sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                         cwd=cwd, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure_import(module: str = DEFAULT_MODULE, runs: int = 5) -> Dict[str, Any]:
+    """Median/min cold import time over `runs` fresh interpreters."""
+    times, heavy, modules, threads = [], set(), 0, 0
+    with tempfile.TemporaryDirectory() as cwd:
+        for _ in range(runs):
+            sample = _probe(module, cwd)
+            times.append(sample["seconds"])
+            heavy.update(sample["heavy"])
+            modules = sample["modules"]
+            threads = max(threads, sample["threads"])
+        created = sorted(os.listdir(cwd))
+    return {
+        "module": module,
+        "runs": runs,
+        "median_s": round(statistics.median(times), 4),
+        "min_s": round(min(times), 4),
+        "budget_s": IMPORT_BUDGET_S,
+        "heavy_modules_loaded": sorted(heavy),
+        "files_created": created,
+        "modules_loaded": modules,
+        "threads_started": threads,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    args = parser.parse_args()
+    report = measure_import(args.module, args.runs)
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["median_s"] <= IMPORT_BUDGET_S else 1)
@@ -0,0 +1,214 @@
+"""Offline benchmark suite: scoring functions, each agent, and end-to-end `ingest_event`.
+
+Everything runs against the seeded stand-in tools in `evaluation/standins.py`, so no
+network is needed and results are reproducible. With `--latency 0` (the default) the
+numbers are pure CPU cost of our own code. Per-case latency (p50/p95/p99/mean in
+microseconds, ops/s) is written as JSON. At zero latency each case is checked against
+`bench_thresholds.json`, and the exit status is 1 when a case exceeds its limit, so a
+performance regression fails the build. `--threshold-scale` relaxes every limit on
+slower hardware.
+
+Run: `python -m evaluation.benchmarks [--iterations N] [--latency S] [--out results.json]`
+(with the package's parent directory on PYTHONPATH).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List
+
+import numpy as np
+
+import real_time_shopping_assistant.memory.sentiment_aggregates as aggregates
+from real_time_shopping_assistant.agents.alternative_agent import run_alternative_agent
+from real_time_shopping_assistant.agents.fusion_agent import compute_buy_score, fusion_decision
+from real_time_shopping_assistant.agents.loop_orchestrator import LoopOrchestrator
+from real_time_shopping_assistant.agents.price_agent import run_price_agent
+from real_time_shopping_assistant.agents.review_agent import lexicon_sentiment_score, run_review_agent
+from real_time_shopping_assistant.agents.user_finance_agent import run_user_finance_agent
+from real_time_shopping_assistant.evaluation.standins import install_standins
+from real_time_shopping_assistant.infra import metrics
+from real_time_shopping_assistant.infra.logging_setup import discarded_output
+from real_time_shopping_assistant.memory.decision_history import DecisionHistory
+from real_time_shopping_assistant.memory.long_term_memory import HashingEmbeddings, LocalVectorStore, LongTermMemory
+from real_time_shopping_assistant.memory.sentiment_aggregates import SentimentAggregates
+from real_time_shopping_assistant.tools.fetch_context import FetchContext
+
+THRESHOLDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_thresholds.json")
+
+
+def summarize(samples_ns: List[int]) -> Dict[str, float]:
+    us = np.asarray(samples_ns, dtype=np.float64) / 1000.0
+    p50, p95, p99 = np.percentile(us, [50, 95, 99])
+    mean = float(us.mean())
+    return {"iterations": int(us.size), "mean_us": round(mean, 2), "p50_us": round(float(p50), 2),
+            "p95_us": round(float(p95), 2), "p99_us": round(float(p99), 2),
+            "ops_per_s": round(1e6 / mean, 1) if mean else 0.0}
+
+
+def time_sync(fn: Callable[[int], Any], iterations: int, warmup: int) -> Dict[str, float]:
+    for i in range(warmup):
+        fn(i)
+    clock = time.perf_counter_ns
+    samples = []
+    for i in range(iterations):
+        t0 = clock()
+        fn(i)
+        samples.append(clock() - t0)
+    return summarize(samples)
+
+
+async def time_async(fn: Callable[[int], Awaitable[Any]], iterations: int, warmup: int) -> Dict[str, float]:
+    for i in range(warmup):
+        await fn(i)
+    clock = time.perf_counter_ns
+    samples = []
+    for i in range(iterations):
+        t0 = clock()
+        await fn(i)
+        samples.append(clock() - t0)
+    return summarize(samples)
+
+
+def make_events(n: int, seed: int = 0, users: int = 50, products: int = 200) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    events = []
+    for i in range(n):
+        product_id = f"prod_{rng.randrange(products)}"
+        events.append({
+            "event_id": f"bench_{i}",
+            "type": rng.choice(["cart_add", "wishlist_add", "price_alert"]),
+            "user_id": f"user_{rng.randrange(users)}",
+            "product_id": product_id,
+            "product_name": f"Product {product_id}",
+            "price": round(rng.uniform(5, 1200), 2),
+        })
+    return events
+
+
+@contextmanager
+def isolated_state(workdir: str, clock: Callable[[], float] | None = None) -> Iterator[LoopOrchestrator]:
+    """An orchestrator whose stores, metrics and log output stay out of the real ones.
+
+    The metrics registry starts from zero inside the block and gets its outer values back on exit.
+    """
+    orchestrator = LoopOrchestrator(clock=clock)
+    orchestrator.decision_history = DecisionHistory(path=os.path.join(workdir, "decisions"), background=False)
+    orchestrator.long_memory = LongTermMemory(LocalVectorStore.from_texts([], HashingEmbeddings()))
+    saved_aggregates = vars(aggregates).get("sentiment_aggregates")
+    saved_metrics_dir = metrics.METRICS_DIR
+    saved_registry = metrics.registry.export()
+    aggregates.sentiment_aggregates = SentimentAggregates()
+    metrics.registry.reset()
+    metrics.METRICS_DIR = os.path.join(workdir, "metrics")
+    try:
+        with discarded_output():
+            yield orchestrator
+    finally:
+        metrics.flush_metrics()
+        metrics.registry.reset()
+        metrics.registry.merge(saved_registry)
+        metrics.METRICS_DIR = saved_metrics_dir
+        orchestrator.decision_history.close()
+        if saved_aggregates is None:
+            del aggregates.sentiment_aggregates
+        else:
+            aggregates.sentiment_aggregates = saved_aggregates
+
+
+def run_suite(iterations: int = 300, warmup: int = 30, latency: float | Dict[str, float] = 0.0,
+              seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """Run every case; returns {case name: latency summary}."""
+    results: Dict[str, Dict[str, float]] = {}
+    events = make_events(max(iterations + warmup, 1), seed=seed)
+    with install_standins(seed=seed, latency=latency) as standins, tempfile.TemporaryDirectory() as workdir, \
+            isolated_state(workdir) as orchestrator:
+        orchestrator.user_state = standins.user_state
+        reviews = asyncio.run(standins["get_reviews"]._arun("prod_0"))
+        uncached = [{"text": r.text} for r in reviews]
+        profile = asyncio.run(standins["get_user_profile"]._arun("user_0"))
+        components = {"affordability_score": 0.7, "price_attractiveness": 0.8, "sentiment_score": 0.6,
+                      "availability_score": 0.9, "preference_score": 0.5}
+
+        results["sentiment.lexicon_sentiment_score"] = time_sync(
+            lambda i: lexicon_sentiment_score(reviews), iterations, warmup)
+        results["sentiment.lexicon_sentiment_score_uncached"] = time_sync(
+            lambda i: lexicon_sentiment_score(uncached), iterations, warmup)
+        results["fusion.compute_buy_score"] = time_sync(lambda i: compute_buy_score(components), iterations, warmup)
+        results["fusion.fusion_decision"] = time_sync(lambda i: fusion_decision(components), iterations, warmup)
+
+        async def run_async_cases():
+            product = lambda i: events[i % len(events)]["product_id"]
+            results["agent.price"] = await time_async(
+                lambda i: run_price_agent(product(i), FetchContext()), iterations, warmup)
+            results["agent.review"] = await time_async(
+                lambda i: run_review_agent(product(i), FetchContext()), iterations, warmup)
+            results["agent.alternative"] = await time_async(
+                lambda i: run_alternative_agent(product(i), FetchContext()), iterations, warmup)
+            results["agent.finance"] = await time_async(
+                lambda i: run_user_finance_agent(profile, events[i % len(events)]["price"]), iterations, warmup)
+            results["e2e.ingest_event"] = await time_async(
+                lambda i: orchestrator.ingest_event(events[i % len(events)]), iterations, warmup)
+
+        asyncio.run(run_async_cases())
+    return results
+
+
+def load_thresholds(path: str = THRESHOLDS_PATH) -> Dict[str, Dict[str, float]]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_thresholds(results: Dict[str, Dict[str, float]], thresholds: Dict[str, Dict[str, float]],
+                     scale: float = 1.0) -> List[Dict[str, Any]]:
+    """Every (case, metric) whose measured value exceeds `scale` x its limit."""
+    regressions = []
+    for name, limits in thresholds.items():
+        measured = results.get(name)
+        if measured is None:
+            continue
+        for metric, limit in limits.items():
+            if measured[metric] > limit * scale:
+                regressions.append({"case": name, "metric": metric, "value": measured[metric],
+                                    "limit": round(limit * scale, 2)})
+    return regressions
+
+
+def run_report(iterations: int = 300, warmup: int = 30, latency: float = 0.0, seed: int = 0,
+               threshold_scale: float = 1.0) -> Dict[str, Any]:
+    results = run_suite(iterations=iterations, warmup=warmup, latency=latency, seed=seed)
+    # Limits describe CPU cost; with simulated latency they would only measure the sleeps
+    checked = latency == 0
+    regressions = check_thresholds(results, load_thresholds(), threshold_scale) if checked else []
+    return {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "seed": seed,
+                 "latency_s": latency, "iterations": iterations, "warmup": warmup,
+                 "threshold_scale": threshold_scale, "thresholds_checked": checked,
+                 "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())},
+        "results": results,
+        "regressions": regressions,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per tool call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threshold-scale", type=float, default=1.0)
+    parser.add_argument("--out", default=None, help="Also write the JSON report to this path")
+    args = parser.parse_args()
+    report = run_report(args.iterations, args.warmup, args.latency, args.seed, args.threshold_scale)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    sys.exit(1 if report["regressions"] else 0)
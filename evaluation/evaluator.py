@@ -1,41 +1,51 @@
 """Evaluator: synthetic simulation runner and report generator.
 
-Generates synthetic events (many) and runs orchestrator offline, collecting metrics
-and producing CSV + markdown summary report with simple charts.
+Generates synthetic events (`evaluation/workload.py`: Zipf-skewed users and products,
+price-alert storms) and runs orchestrator offline, collecting metrics
+in the columnar store and producing a markdown/JSON report with charts
+(`evaluation/report.py`).
+
+`--replay` runs the events through `evaluation/replay.py` instead: stand-in tools with no
+latency, a simulated clock, and user-sharded worker processes. That is the mode for
+large seeded runs (`--events 1000000 --seed 7 --replay`).
 """
+import argparse
 import asyncio
-import csv
 import os
 import json
-import random
-from datetime import datetime, timezone
-from typing import List
-import matplotlib.pyplot as plt
+import time
+from typing import Iterator, List
 from agents.loop_orchestrator import orchestrator
-from infra.metrics import METRICS_FILE
+from evaluation.replay import replay
+from evaluation.report import build_report
+from evaluation.standins import EPOCH
+from evaluation.workload import WorkloadSpec, iter_events, write_events
+from infra.metrics import METRICS_DIR
 from infra.logging_setup import logger
 
 
-def generate_synthetic_events(n: int = 1000, out_path: str | None = None) -> List[dict]:
-    events = []
-    for i in range(n):
-        user = f"user_{random.randint(1,200)}"
-        price = round(random.uniform(5, 1200), 2)
-        pid = f"prod_{random.randint(1000, 3000)}"
-        ev = {
-            "event_id": f"sim_{i}",
-            "type": random.choice(["cart_add", "wishlist_add", "price_alert"]),
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "product_id": pid,
-            "product_name": f"Product {pid}",
-            "price": price,
-            "user_id": user,
-        }
-        events.append(ev)
+def synthetic_spec(seed: int | None = None) -> WorkloadSpec:
+    # Seeded runs also get simulated timestamps, so they are fully reproducible
+    if seed is None:
+        return WorkloadSpec(seed=time.time_ns(), start=time.time())
+    return WorkloadSpec(seed=seed, start=EPOCH)
+
+
+def iter_synthetic_events(n: int = 1000, seed: int | None = None) -> Iterator[dict]:
+    return iter_events(n, synthetic_spec(seed))
+
+
+def generate_synthetic_events(n: int = 1000, out_path: str | None = None, seed: int | None = None) -> List[dict]:
+    spec = synthetic_spec(seed)
     if out_path:
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(events, f, indent=2)
-    return events
+        write_events(out_path, n, spec)
+    return list(iter_events(n, spec))
+
+
+def write_synthetic_events(out_path: str, n: int = 1000, seed: int | None = None) -> str:
+    # JSONL, written as generated: large runs never hold every event in memory
+    write_events(out_path, n, synthetic_spec(seed))
+    return out_path
 
 
 async def run_simulation(events: List[dict], batch: int = 100):
@@ -45,32 +55,44 @@ async def run_simulation(events: List[dict], batch: int = 100):
     for i in range(0, total, batch):
         batch_events = events[i:i+batch]
         await orchestrator.run_loop(batch_events, stop_after=None)
+    # Buffered metric rows must reach the store before the report reads it
+    orchestrator.persist_state()
     logger.info("Simulation complete")
 
 
-def summarize_metrics(metrics_csv: str = METRICS_FILE, out_prefix: str = "eval_report"):
-    # Read metrics CSV and produce summary
-    if not os.path.exists(metrics_csv):
-        logger.warning("No metrics file found: %s", metrics_csv)
+def run_replay(events_path: str, workers: int | None = None, seed: int = 0, out_dir: str = "replay_out",
+               out_prefix: str = "eval_report") -> dict:
+    # Offline replay: no tool latency, simulated clock, one process per user shard
+    result = replay(events_path, workers=workers, seed=seed, out_dir=out_dir)
+    logger.info("Replay complete: %d events in %.1fs (%.0f events/s), digest %s", result["events"],
+                result["wall_s"], result["events_per_s"], result["digest"])
+    summarize_metrics(result["metrics_path"], out_prefix=out_prefix)
+    return result
+
+
+def summarize_metrics(metrics_path: str = METRICS_DIR, out_prefix: str = "eval_report"):
+    # Streaming aggregation over the columnar store: flat memory for any number of rows
+    if not os.path.isdir(metrics_path):
+        logger.warning("No metrics store found: %s", metrics_path)
         return
-    df_rows = []
-    with open(metrics_csv, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            df_rows.append(r)
-    # Basic metrics
-    buys = sum(1 for r in df_rows if float(r.get("avg_buy_score",0))>=0.6)
-    total = len(df_rows)
-    buy_ratio = buys / total if total else 0
-    # Save summary
-    md = f"# Evaluation Summary\n\n- Total iterations: {total}\n- Buy ratio: {buy_ratio:.3f}\n"
-    md_path = f"{out_prefix}.md"
-    with open(md_path, "w", encoding="utf-8") as f:
-        f.write(md)
-    logger.info("Wrote evaluation summary to %s", md_path)
+    report = build_report([metrics_path], out_prefix=out_prefix)
+    logger.info("Wrote evaluation summary to %s.md (%d rows, %d charts)", out_prefix, report["rows"],
+                len(report["charts"]))
+    return report
 
 
 if __name__ == "__main__":
-    events = generate_synthetic_events(200, out_path="synthetic_eval_events.json")
-    asyncio.run(run_simulation(events, batch=50))
-    summarize_metrics()
+    parser = argparse.ArgumentParser(description="Synthetic evaluation run")
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--replay", action="store_true", help="Offline replay with stand-in tools")
+    parser.add_argument("--workers", type=int, default=None, help="Replay worker processes (default: CPU count)")
+    parser.add_argument("--out-dir", default="replay_out")
+    args = parser.parse_args()
+    if args.replay:
+        path = write_synthetic_events("synthetic_eval_events.jsonl", args.events, seed=args.seed or 0)
+        print(json.dumps(run_replay(path, args.workers, args.seed or 0, args.out_dir), indent=2))
+    else:
+        events = generate_synthetic_events(args.events, out_path="synthetic_eval_events.jsonl", seed=args.seed)
+        asyncio.run(run_simulation(events, batch=50))
+        summarize_metrics()
@@ -0,0 +1,218 @@
+"""Offline replay: push a large event log through the orchestrator as fast as the CPU allows.
+
+Tools are the seeded zero-latency stand-ins from `evaluation/standins.py`, and time is
+simulated: each event sets the clock to its own `timestamp` (or `start + index * step`
+when it has none), so decision timestamps, cache TTLs and session expiry follow the log
+rather than the wall clock. Events are sharded by a stable hash of `user_id` across
+worker processes, so each user's events stay in order within one worker. Every worker
+writes its own columnar metrics store and decision log under `out_dir/shard_<k>/`. At
+the end the shard stores' chunks are moved into one store at `out_dir/metrics`, and the
+workers' metric registries are summed into `out_dir/metrics.prom`.
+
+The same seed and events always give the same decisions and the same `digest`,
+whatever the number of workers. Only latency figures depend on the machine.
+
+Run: `python -m evaluation.replay EVENTS [--workers N] [--seed S] [--out-dir DIR]`
+(with the package's parent directory on PYTHONPATH).
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Tuple
+
+from real_time_shopping_assistant.agents.fusion_agent import DECISIONS
+from real_time_shopping_assistant.evaluation.benchmarks import isolated_state
+from real_time_shopping_assistant.evaluation.standins import EPOCH, install_standins
+from real_time_shopping_assistant.infra import metrics
+from real_time_shopping_assistant.infra.metrics import MetricsRegistry
+from real_time_shopping_assistant.infra.metrics_store import MetricsStore, merge_stores
+from real_time_shopping_assistant.tools import cache
+from real_time_shopping_assistant.utils.event_stream import stream_events
+
+_LABELS = [str(label) for label in DECISIONS]
+
+
+def shard_of(user_id: Any, shards: int) -> int:
+    # crc32 is stable across processes and runs, unlike hash() on str
+    return zlib.crc32(str(user_id).encode("utf-8")) % shards
+
+
+def event_time(event: Dict[str, Any], index: int, start: float = EPOCH, step: float = 1.0) -> float:
+    ts = event.get("timestamp")
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    if ts:
+        try:
+            parsed = datetime.fromisoformat(str(ts))
+        except ValueError:
+            parsed = None
+        if parsed is not None:
+            return (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).timestamp()
+    return start + index * step
+
+
+class SimClock:
+    """Simulated wall clock in epoch seconds; only `set` moves it."""
+
+    def __init__(self, start: float = EPOCH):
+        self.now = float(start)
+
+    def __call__(self) -> float:
+        return self.now
+
+    def set(self, now: float):
+        self.now = now
+
+
+class _DiscardedMemory:
+    # Replays skip long-term memory: embedding a document per event would dominate the run
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, Any]):
+        pass
+
+
+@dataclass
+class ReplayJob:
+    shard: int
+    shards: int
+    # A path every worker streams and filters, or this shard's (index, event) pairs
+    source: str | List[Tuple[int, Dict[str, Any]]]
+    seed: int
+    workdir: str
+    start: float = EPOCH
+    step: float = 1.0
+
+
+async def _shard_events(job: ReplayJob) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    if not isinstance(job.source, str):
+        for pair in job.source:
+            yield pair
+        return
+    index = 0
+    async for event in stream_events(job.source):
+        if event is None:
+            continue
+        if shard_of(event.get("user_id"), job.shards) == job.shard:
+            yield index, event
+        index += 1
+
+
+def _event_digest(index: int, event: Dict[str, Any], decision: Dict[str, Any]) -> int:
+    key = f"{index}|{event.get('event_id')}|{decision.get('decision')}|{decision.get('buy_score')!r}"
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _replay_shard(job: ReplayJob) -> Dict[str, Any]:
+    """Worker entry point: replay one shard in this process and return its totals."""
+    shutil.rmtree(job.workdir, ignore_errors=True)
+    os.makedirs(job.workdir)
+    # Warnings only: a JSON line per event would cost more than the decision itself
+    logging.getLogger().setLevel(logging.WARNING)
+    clock = SimClock(job.start)
+    cache.set_clock(clock)
+    counts = [0] * len(_LABELS)
+    totals = {"events": 0, "scored": 0, "score_sum": 0.0, "digest": 0}
+    t0 = time.perf_counter()
+    with install_standins(seed=job.seed, clock=clock, cached=True) as standins, \
+            isolated_state(job.workdir, clock=clock) as orchestrator:
+        orchestrator.user_state = standins.user_state
+        orchestrator.long_memory = _DiscardedMemory()
+
+        async def drive():
+            async for index, event in _shard_events(job):
+                clock.set(event_time(event, index, job.start, job.step))
+                decision = await orchestrator.ingest_event(event)
+                totals["events"] += 1
+                counts[_LABELS.index(decision.get("decision"))] += 1
+                score = decision.get("buy_score")
+                if score is not None:
+                    totals["scored"] += 1
+                    totals["score_sum"] += score
+                # Order-independent sum, so shards combine to the same digest for any worker count
+                totals["digest"] = (totals["digest"] + _event_digest(index, event, decision)) % (1 << 64)
+
+        asyncio.run(drive())
+        calls = standins.calls()
+        metrics_path = metrics.METRICS_DIR
+        # Inside the block: isolated_state hands the registry back to the worker's own values on exit
+        exported = metrics.registry.export()
+    return {"shard": job.shard, **totals, "decisions": counts, "upstream_calls": calls,
+            "elapsed_s": round(time.perf_counter() - t0, 3), "registry": exported,
+            "metrics_path": metrics_path}
+
+
+def merge_shards(shards: List[Dict[str, Any]], out_dir: str, wall_s: float) -> Dict[str, Any]:
+    registry = MetricsRegistry()
+    for shard in shards:
+        registry.merge(shard["registry"])
+    metrics_path = os.path.join(out_dir, "metrics")
+    shutil.rmtree(metrics_path, ignore_errors=True)
+    merge_stores(metrics_path, [s["metrics_path"] for s in shards])
+    metrics_prom = os.path.join(out_dir, "metrics.prom")
+    with open(metrics_prom, "w", encoding="utf-8") as f:
+        f.write(registry.render_prometheus())
+
+    events = sum(s["events"] for s in shards)
+    scored = sum(s["scored"] for s in shards)
+    counts = [sum(s["decisions"][i] for s in shards) for i in range(len(_LABELS))]
+    calls: Dict[str, int] = {}
+    for shard in shards:
+        for name, n in shard["upstream_calls"].items():
+            calls[name] = calls.get(name, 0) + n
+    latency = registry.collect("wizecart_event_latency_seconds").get(())
+    return {
+        "events": events,
+        "decisions": dict(zip(_LABELS, counts)),
+        "buy_ratio": round(counts[_LABELS.index("BUY")] / events, 4) if events else 0.0,
+        "mean_buy_score": round(sum(s["score_sum"] for s in shards) / scored, 6) if scored else None,
+        "digest": f"{sum(s['digest'] for s in shards) % (1 << 64):016x}",
+        "wall_s": round(wall_s, 3),
+        "events_per_s": round(events / wall_s, 1) if wall_s else 0.0,
+        "latency_s": {f"p{int(q * 100)}": round(latency.quantile(q), 6) for q in (0.5, 0.95, 0.99)}
+        if latency else {},
+        "upstream_calls": calls,
+        "shards": [{"shard": s["shard"], "events": s["events"], "elapsed_s": s["elapsed_s"]} for s in shards],
+        "metrics_path": metrics_path,
+        "metrics_rows": len(MetricsStore(metrics_path)),
+        "metrics_prom": metrics_prom,
+    }
+
+
+def replay(source: str | Iterable[Dict[str, Any]], workers: int | None = None, seed: int = 0,
+           out_dir: str = "replay_out", start: float = EPOCH, step: float = 1.0) -> Dict[str, Any]:
+    """Replay `source` (an events file or an iterable of events) on `workers` processes."""
+    workers = max(1, workers or os.cpu_count() or 1)
+    os.makedirs(out_dir, exist_ok=True)
+    if isinstance(source, str):
+        parts = [source] * workers
+    else:
+        parts = [[] for _ in range(workers)]
+        for index, event in enumerate(source):
+            parts[shard_of(event.get("user_id"), workers)].append((index, event))
+    jobs = [ReplayJob(k, workers, parts[k], seed, os.path.join(out_dir, f"shard_{k}"), start, step)
+            for k in range(workers)]
+    t0 = time.perf_counter()
+    # Fresh interpreters: no inherited log listener, metrics flusher or registry contents
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        shards = list(pool.map(_replay_shard, jobs))
+    return merge_shards(shards, out_dir, time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("events", help="JSONL file or JSON array of events")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out-dir", default="replay_out")
+    parser.add_argument("--step", type=float, default=1.0, help="Simulated seconds between untimestamped events")
+    args = parser.parse_args()
+    print(json.dumps(replay(args.events, args.workers, args.seed, args.out_dir, step=args.step), indent=2))
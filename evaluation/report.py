@@ -0,0 +1,300 @@
+"""Streaming evaluation report over the columnar metrics store.
+
+Chunks of one or more stores (see `infra/metrics_store.py`) are folded into
+fixed-size aggregates:
+- log-spaced latency histograms, overall and per orchestrator stage, for
+  percentiles within about 3%;
+- a timeline of event counts and latency sums that doubles its bucket width
+  instead of growing;
+- decision counts and a buy-score histogram.
+
+Memory therefore stays flat however many rows the stores hold. The report is
+written as markdown plus JSON, with PNG charts when matplotlib is available
+(imported only here, on first use).
+
+Run: `python -m evaluation.report [STORE ...] [--out-prefix P] [--no-charts] [--csv OUT]`
+(with the package's parent directory on PYTHONPATH).
+"""
+import argparse
+import csv
+import json
+import math
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from real_time_shopping_assistant.infra.logging_setup import logger
+from real_time_shopping_assistant.infra.metrics_store import DECISIONS, ROW, STAGES, iter_rows
+
+# ~3% wide bins from 1 us to 1000 s; below/above land in the two overflow bins
+LATENCY_EDGES = np.geomspace(1e-6, 1e3, 721)
+SCORE_EDGES = np.linspace(0.0, 1.0, 21)
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+class LogHistogram:
+    def __init__(self, edges: np.ndarray = LATENCY_EDGES):
+        self.edges = edges
+        self.counts = np.zeros(len(edges) + 1, dtype=np.int64)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, values: np.ndarray):
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return
+        self.counts += np.bincount(np.searchsorted(self.edges, values, "right"), minlength=self.counts.size)
+        self.count += int(values.size)
+        self.sum += float(values.sum(dtype=np.float64))
+        self.max = max(self.max, float(values.max()))
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        i = int(np.searchsorted(np.cumsum(self.counts), q * self.count, "left"))
+        if i == 0:
+            return float(self.edges[0])
+        if i >= len(self.edges):
+            return self.max
+        # Geometric midpoint of the owning bin, never above the largest value seen
+        return min(math.sqrt(self.edges[i - 1] * self.edges[i]), self.max)
+
+    def summary(self) -> Dict[str, float]:
+        out = {"count": self.count, "mean": round(self.sum / self.count, 6) if self.count else 0.0}
+        out.update({f"p{int(q * 100)}": round(self.quantile(q), 6) for q in QUANTILES})
+        out["max"] = round(self.max, 6)
+        return out
+
+
+class Timeline:
+    """Events and latency per time bucket; buckets double in width to stay within `max_buckets`."""
+
+    def __init__(self, width: float = 1.0, max_buckets: int = 1024):
+        self.width = width
+        self.max_buckets = max_buckets
+        self.origin: float | None = None
+        self.events = np.zeros(0, dtype=np.int64)
+        self.latency = np.zeros(0, dtype=np.float64)
+
+    def _coarsen(self):
+        if self.events.size % 2:
+            self.events = np.append(self.events, 0)
+            self.latency = np.append(self.latency, 0.0)
+        self.events = self.events.reshape(-1, 2).sum(axis=1)
+        self.latency = self.latency.reshape(-1, 2).sum(axis=1)
+        self.width *= 2
+
+    def add(self, ts: np.ndarray, loop_time: np.ndarray):
+        if not ts.size:
+            return
+        if self.origin is None:
+            self.origin = math.floor(float(ts.min()) / self.width) * self.width
+        while True:
+            idx = np.floor((ts - self.origin) / self.width).astype(np.int64)
+            lo, hi = int(idx.min()), int(idx.max())
+            if max(hi + 1, self.events.size) - min(lo, 0) <= self.max_buckets:
+                break
+            self._coarsen()
+        if lo < 0:
+            # Earlier than anything seen so far (e.g. another shard's chunk): grow to the left
+            self.events = np.concatenate([np.zeros(-lo, dtype=np.int64), self.events])
+            self.latency = np.concatenate([np.zeros(-lo), self.latency])
+            self.origin += lo * self.width
+            idx -= lo
+        size = max(int(idx.max()) + 1, self.events.size)
+        self.events = np.pad(self.events, (0, size - self.events.size))
+        self.latency = np.pad(self.latency, (0, size - self.latency.size))
+        self.events += np.bincount(idx, minlength=size)
+        self.latency += np.bincount(idx, weights=loop_time.astype(np.float64), minlength=size)
+
+    def rows(self) -> List[Dict[str, float]]:
+        out = []
+        for i, n in enumerate(self.events):
+            out.append({"start": self.origin + i * self.width, "events": int(n),
+                        "events_per_s": round(n / self.width, 3),
+                        "mean_latency_s": round(self.latency[i] / n, 6) if n else None})
+        return out
+
+
+class MetricsSummary:
+    def __init__(self):
+        self.rows = 0
+        self.ts_min = math.inf
+        self.ts_max = -math.inf
+        self.latency = LogHistogram()
+        self.stages = {stage: LogHistogram() for stage in STAGES}
+        self.timeline = Timeline()
+        self.decisions = np.zeros(len(DECISIONS) + 1, dtype=np.int64)  # slot 0: not recorded
+        self.scores = np.zeros(SCORE_EDGES.size - 1, dtype=np.int64)
+
+    def add(self, chunk: np.ndarray):
+        if not len(chunk):
+            return
+        ts = np.asarray(chunk["ts"])
+        loop_time = np.asarray(chunk["loop_time"])
+        self.rows += len(chunk)
+        self.ts_min = min(self.ts_min, float(ts.min()))
+        self.ts_max = max(self.ts_max, float(ts.max()))
+        self.latency.add(loop_time)
+        for stage, hist in self.stages.items():
+            hist.add(np.asarray(chunk[f"stage_{stage}"]))
+        self.timeline.add(ts, loop_time)
+        self.decisions += np.bincount(np.asarray(chunk["decision"], dtype=np.int64) + 1,
+                                      minlength=self.decisions.size)
+        scores = np.asarray(chunk["buy_score"])
+        scores = scores[~np.isnan(scores)]
+        self.scores += np.histogram(scores, bins=SCORE_EDGES)[0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        span = self.ts_max - self.ts_min if self.rows else 0.0
+        recorded = self.decisions[1:]
+        total_latency = self.latency.sum or 1.0
+        return {
+            "rows": self.rows,
+            "start": _iso(self.ts_min) if self.rows else None,
+            "end": _iso(self.ts_max) if self.rows else None,
+            "events_per_s": round(self.rows / span, 3) if span > 0 else None,
+            "latency_s": self.latency.summary(),
+            "decisions": {label: int(n) for label, n in zip(DECISIONS, recorded)},
+            "decisions_not_recorded": int(self.decisions[0]),
+            "buy_ratio": round(float(recorded[-1]) / recorded.sum(), 4) if recorded.sum() else 0.0,
+            "buy_score_histogram": {f"{lo:.2f}-{hi:.2f}": int(n)
+                                    for lo, hi, n in zip(SCORE_EDGES[:-1], SCORE_EDGES[1:], self.scores)},
+            # Stages overlap (the DAG runs them concurrently), so shares can add up past 100%
+            "stages": {stage: {**hist.summary(), "share_of_latency": round(hist.sum / total_latency, 4)}
+                       for stage, hist in self.stages.items() if hist.count},
+            "timeline_bucket_s": self.timeline.width,
+            "timeline": self.timeline.rows(),
+        }
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def aggregate(paths: Sequence[str], batch_rows: int = 1 << 18) -> MetricsSummary:
+    summary = MetricsSummary()
+    for chunk in iter_rows(paths, batch_rows):
+        summary.add(chunk)
+    return summary
+
+
+def _pyplot():
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def write_charts(report: Dict[str, Any], out_prefix: str) -> List[str]:
+    """PNG charts next to the report; none (with a warning) when matplotlib is missing."""
+    try:
+        plt = _pyplot()
+    except ImportError:
+        logger.warning("matplotlib not installed; skipping charts")
+        return []
+    paths = []
+
+    def save(fig, name: str):
+        path = f"{out_prefix}_{name}.png"
+        fig.tight_layout()
+        fig.savefig(path, dpi=100)
+        plt.close(fig)
+        paths.append(path)
+
+    timeline = report["timeline"]
+    fig, ax = plt.subplots(figsize=(8, 3))
+    ax.plot([(r["start"] - timeline[0]["start"]) for r in timeline], [r["events_per_s"] for r in timeline])
+    ax.set_xlabel(f"seconds since start ({report['timeline_bucket_s']:g} s buckets)")
+    ax.set_ylabel("events/s")
+    ax.set_title("Throughput over time")
+    save(fig, "throughput")
+
+    fig, ax = plt.subplots(figsize=(6, 3))
+    latency = report["latency_s"]
+    labels = [k for k in latency if k.startswith("p")]
+    ax.bar(labels, [latency[k] * 1000 for k in labels])
+    ax.set_ylabel("ms")
+    ax.set_title("End-to-end latency percentiles")
+    save(fig, "latency")
+
+    fig, ax = plt.subplots(figsize=(6, 3))
+    ax.bar(list(report["decisions"]), list(report["decisions"].values()))
+    ax.set_title("Decisions")
+    save(fig, "decisions")
+
+    stages = report["stages"]
+    if stages:
+        fig, ax = plt.subplots(figsize=(8, 3))
+        x = np.arange(len(stages))
+        for offset, key in ((-0.2, "p50"), (0.2, "p95")):
+            ax.bar(x + offset, [s[key] * 1000 for s in stages.values()], width=0.4, label=key)
+        ax.set_xticks(x, list(stages))
+        ax.set_ylabel("ms")
+        ax.set_title("Per-stage latency")
+        ax.legend()
+        save(fig, "stages")
+    return paths
+
+
+def _markdown(report: Dict[str, Any], charts: List[str]) -> str:
+    latency = report["latency_s"]
+    md = ["# Evaluation Summary", "",
+          f"- Total iterations: {report['rows']}",
+          f"- Buy ratio: {report['buy_ratio']:.3f}",
+          f"- Time range: {report['start']} .. {report['end']}",
+          f"- Throughput: {report['events_per_s']} events/s (by event timestamp)", ""]
+    md += [f"- {label}: {n}" for label, n in report["decisions"].items()]
+    md += ["", "## Latency (ms)", "", "| stage | count | mean | p50 | p90 | p95 | p99 | max | share |",
+           "|---|---|---|---|---|---|---|---|---|"]
+    rows = [("end_to_end", {**latency, "share_of_latency": 1.0})] + list(report["stages"].items())
+    for name, s in rows:
+        cells = " | ".join(f"{s[k] * 1000:.3f}" for k in ("mean", "p50", "p90", "p95", "p99", "max"))
+        md.append(f"| {name} | {s['count']} | {cells} | {s['share_of_latency']:.0%} |")
+    if charts:
+        md += ["", "## Charts", ""] + [f"![{os.path.basename(p)}]({os.path.basename(p)})" for p in charts]
+    return "\n".join(md) + "\n"
+
+
+def build_report(paths: Sequence[str], out_prefix: str = "eval_report", charts: bool = True) -> Dict[str, Any]:
+    """Aggregate the stores in `paths`; writes `<out_prefix>.md`, `.json` and chart PNGs."""
+    report = aggregate(paths).to_dict()
+    chart_paths = write_charts(report, out_prefix) if charts and report["rows"] else []
+    with open(f"{out_prefix}.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    with open(f"{out_prefix}.md", "w", encoding="utf-8") as f:
+        f.write(_markdown(report, chart_paths))
+    report["charts"] = chart_paths
+    return report
+
+
+def export_csv(paths: Iterable[str], out_path: str) -> int:
+    """Stream the stores into one CSV (one row per event), e.g. for external tools."""
+    rows = 0
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(ROW.names)
+        for chunk in iter_rows(paths):
+            writer.writerows(chunk.tolist())
+            rows += len(chunk)
+    return rows
+
+
+if __name__ == "__main__":
+    from real_time_shopping_assistant.infra.metrics import METRICS_DIR
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("stores", nargs="*", default=[METRICS_DIR])
+    parser.add_argument("--out-prefix", default="eval_report")
+    parser.add_argument("--no-charts", action="store_true")
+    parser.add_argument("--csv", default=None, help="Also export every row to this CSV")
+    args = parser.parse_args()
+    result = build_report(args.stores, args.out_prefix, charts=not args.no_charts)
+    if args.csv:
+        export_csv(args.stores, args.csv)
+    print(json.dumps({k: v for k, v in result.items() if k != "timeline"}, indent=2))
@@ -0,0 +1,222 @@
+"""Deterministic, seeded local stand-ins for every tool in `tools/`.
+
+Each stand-in has the real tool's `name` and call surface (`_arun`, plus `_arun_batch`
+where the real tool has one) and returns the same record types. Data depends only on
+`(seed, tool, arguments)`, so runs are reproducible across processes. `latency` adds
+simulated upstream time per call, either one value for every tool or a dict keyed by
+tool name. With 0 there is no sleep at all, and the agents' own CPU cost is measured.
+
+`install_standins()` swaps the stand-ins in for the tool references the agents hold
+and restores the originals on exit. `StandIns.user_state` is a fresh `UserStateCache`
+over the stand-in profile and cart tools, to be given to an orchestrator.
+"""
+import asyncio
+import random
+import time
+import types
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+from real_time_shopping_assistant.agents import alternative_agent, price_agent, review_agent
+from real_time_shopping_assistant.tools.cache import TOOL_CACHE_TTLS, ttl_cached
+from real_time_shopping_assistant.tools.code_exec_tool import simulate_batch
+from real_time_shopping_assistant.tools.price_tool import _stock_pair
+from real_time_shopping_assistant.tools.records import (Cart, CartItem, Coupon, PriceListing, PricePoint, Profile,
+                                                        Review, StockCheck)
+from real_time_shopping_assistant.tools.user_state_cache import UserStateCache
+from real_time_shopping_assistant.utils.langchain_compat import BaseTool
+
+# Fixed clock for generated timestamps, so outputs do not depend on wall time
+EPOCH = 1_700_000_000
+_SELLERS = ("RetailerA", "RetailerB", "RetailerC")
+_REVIEW_TEXTS = (
+    "Excellent sound quality and battery life.",
+    "Stopped working after a week, disappointed.",
+    "Great value for price. Highly recommend.",
+    "Mediocre build and poor customer support.",
+    "Comfortable to wear, noise cancellation decent.",
+)
+
+
+class StandInTool(BaseTool):
+    def __init__(self, seed: int = 0, latency: float = 0.0):
+        self.seed = seed
+        self.latency = latency
+        self.calls = 0
+
+    def rng(self, *key: Any) -> random.Random:
+        # String seeds hash the same way in every process (unlike hash())
+        return random.Random(f"{self.seed}:{self.name}:{key!r}")
+
+    async def _upstream(self):
+        self.calls += 1
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+
+class StandInPriceSearch(StandInTool):
+    name: str = "price_search"
+
+    async def _arun(self, product_id: str) -> List[PriceListing]:
+        await self._upstream()
+        rng = self.rng(product_id)
+        base = 100.0 + rng.uniform(-30, 80)
+        return [PriceListing(s, round(base * rng.uniform(0.9, 1.2), 2), "USD", round(rng.uniform(0, 10), 2), EPOCH)
+                for s in _SELLERS]
+
+
+class StandInPriceHistory(StandInTool):
+    name: str = "get_price_history"
+
+    async def _arun(self, product_id: str) -> List[PricePoint]:
+        await self._upstream()
+        rng = self.rng(product_id)
+        return [PricePoint(EPOCH - i * 86400, round(100 + (i % 10) * 2 + rng.uniform(-5, 5), 2)) for i in range(30)]
+
+
+class StandInCoupons(StandInTool):
+    name: str = "get_coupons"
+
+    async def _arun(self, product_id: str) -> List[Coupon]:
+        await self._upstream()
+        rng = self.rng(product_id)
+        coupons = []
+        if rng.random() > 0.6:
+            coupons.append(Coupon("SAVE10", 10.0, 7))
+        if rng.random() > 0.85:
+            coupons.append(Coupon("FREESHIP", 0.0, 2))
+        return coupons
+
+
+class StandInReviews(StandInTool):
+    name: str = "get_reviews"
+
+    async def _arun(self, product_id: str) -> List[Review]:
+        await self._upstream()
+        rng = self.rng(product_id)
+        return [Review(f"{product_id}:r_{i}", rng.randint(1, 5), rng.choice(_REVIEW_TEXTS), 0.0) for i in range(20)]
+
+
+class StandInStockCheck(StandInTool):
+    # Replaces the stock-check micro-batcher: one call resolves a list of pairs
+    name: str = "check_stock_batch"
+
+    async def _arun(self, pairs: list) -> List[StockCheck]:
+        return await self._arun_batch(pairs)
+
+    async def _arun_batch(self, pairs: list) -> List[StockCheck]:
+        await self._upstream()
+        out = []
+        for seller, product_id in map(_stock_pair, pairs):
+            availability = self.rng(seller, product_id).choice(["in_stock", "limited", "out_of_stock"])
+            out.append(StockCheck(seller, product_id, availability, 0 if availability == "in_stock" else 5))
+        return out
+
+
+class StandInProfile(StandInTool):
+    name: str = "get_user_profile"
+
+    async def _arun(self, user_id: str) -> Profile:
+        return (await self._arun_batch([user_id]))[0]
+
+    async def _arun_batch(self, user_ids: List[str]) -> List[Profile]:
+        await self._upstream()
+        out = []
+        for user_id in user_ids:
+            rng = self.rng(user_id)
+            out.append(Profile(user_id, rng.choice([300.0, 800.0, 2000.0]), round(rng.uniform(50, 1500), 2),
+                               rng.choice(["silver", "gold"]), {"brands": ["BrandA"]}))
+        return out
+
+
+class StandInCart(StandInTool):
+    name: str = "get_user_cart"
+
+    async def _arun(self, user_id: str | None = None) -> Cart:
+        await self._upstream()
+        rng = self.rng(user_id)
+        product_id = f"prod_{rng.randint(1000, 3000)}"
+        return Cart(user_id, [CartItem(product_id, f"Product {product_id}", round(rng.uniform(5, 500), 2), 1)])
+
+
+class StandInSimulation(StandInTool):
+    # Real Monte Carlo math, seeded, in a worker thread like the real tool's small batches
+    # (no process pool). A payload's result depends only on (seed, payload), so with
+    # `memoize` repeats are reused exactly.
+    name: str = "execute_price_simulation"
+    memoize: bool = False
+    _MEMO_SIZE = 10000
+
+    async def _arun(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.memoize:
+            return (await self._arun_batch([payload]))[0]
+        memo = self.__dict__.setdefault("_memo", {})
+        key = (payload.get("product_id"), payload.get("current_price"), tuple((h["ts"], h["price"]) for h in payload.get("history") or ()))
+        out = memo.get(key)
+        if out is None:
+            if len(memo) >= self._MEMO_SIZE:
+                memo.clear()
+            out = memo[key] = (await self._arun_batch([payload]))[0]
+        return dict(out)
+
+    async def _arun_batch(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        await self._upstream()
+        return await asyncio.to_thread(simulate_batch, payloads, None, None, self.seed)
+
+
+class StandIns:
+    """One stand-in per tool, sharing a seed; `latency` is a float or {tool name: seconds}.
+
+    `clock` drives the user-state cache TTLs (a simulated clock in replays). With
+    `cached=True` the tools the real code wraps in `ttl_cached` go through the same
+    shared caches and repeated simulations are memoized; by default every call
+    reaches the stand-in.
+    """
+
+    def __init__(self, seed: int = 0, latency: float | Dict[str, float] = 0.0,
+                 clock: Callable[[], float] = time.monotonic, cached: bool = False):
+        classes = (StandInPriceSearch, StandInPriceHistory, StandInCoupons, StandInReviews, StandInStockCheck,
+                   StandInProfile, StandInCart, StandInSimulation)
+        self.tools: Dict[str, StandInTool] = {}
+        for cls in classes:
+            delay = latency.get(cls.name, 0.0) if isinstance(latency, dict) else latency
+            tool = self.tools[cls.name] = cls(seed=seed, latency=delay)
+            if cached and cls.name in TOOL_CACHE_TTLS:
+                tool._arun = types.MethodType(ttl_cached(cls.name)(cls._arun), tool)
+        self.tools["execute_price_simulation"].memoize = cached
+        self.user_state = UserStateCache(self.tools["get_user_profile"], self.tools["get_user_cart"], window=0.0,
+                                         clock=clock)
+
+    def __getitem__(self, name: str) -> StandInTool:
+        return self.tools[name]
+
+    def calls(self) -> Dict[str, int]:
+        return {name: tool.calls for name, tool in self.tools.items()}
+
+
+def _bindings(standins: StandIns):
+    return [
+        (price_agent, "price_search_tool", standins["price_search"]),
+        (price_agent, "price_history_tool", standins["get_price_history"]),
+        (price_agent, "coupons_tool", standins["get_coupons"]),
+        (price_agent, "code_exec_tool", standins["execute_price_simulation"]),
+        (alternative_agent, "price_search_tool", standins["price_search"]),
+        (alternative_agent, "stock_check_batcher", standins["check_stock_batch"]),
+        (review_agent, "get_reviews_tool", standins["get_reviews"]),
+    ]
+
+
+@contextmanager
+def install_standins(seed: int = 0, latency: float | Dict[str, float] = 0.0,
+                     clock: Callable[[], float] = time.monotonic, cached: bool = False) -> Iterator[StandIns]:
+    """Point the agents at stand-in tools for the duration of the block."""
+    standins = StandIns(seed=seed, latency=latency, clock=clock, cached=cached)
+    saved = []
+    try:
+        for module, attr, tool in _bindings(standins):
+            saved.append((module, attr, getattr(module, attr)))
+            setattr(module, attr, tool)
+        yield standins
+    finally:
+        for module, attr, original in reversed(saved):
+            setattr(module, attr, original)
@@ -0,0 +1,184 @@
+"""Seeded, streaming synthetic workload generator.
+
+Events are generated in fixed-size numpy batches from one seeded generator, so a
+given `WorkloadSpec` always produces the same stream. Memory depends on the
+population sizes (one CDF per population) and the batch size, never on the number
+of events. The model has three parts:
+- Zipf popularity for users and products: rank r is drawn with weight
+  1 / (r + 1) ** skew, and skew 0 is uniform. Low ids are the popular ones.
+- Poisson arrivals at `rate` events per second of simulated time.
+- Price-alert storms: every `storm_every` seconds on average, a storm of
+  `storm_rate` events per second lasts `storm_duration` seconds. All of a
+  storm's events are `price_alert`s for one product at a dropped price.
+Other event types follow the `mix` weights.
+
+`write_events` writes JSONL as it goes; `iter_events` yields dicts for in-memory use.
+
+Run: `python -m evaluation.workload OUT.jsonl --events N --seed S [--product-skew 1.1]
+[--mix cart_add=3,price_alert=1] [--storm-every 600]` (`-` writes to stdout).
+"""
+import argparse
+import json
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, TextIO
+
+import numpy as np
+
+from real_time_shopping_assistant.evaluation.standins import EPOCH
+
+BATCH = 1 << 16
+DEFAULT_MIX = {"cart_add": 0.35, "wishlist_add": 0.3, "price_alert": 0.2, "cart_remove": 0.1, "purchase": 0.05}
+
+
+@dataclass
+class WorkloadSpec:
+    seed: int | None = 0
+    users: int = 200
+    products: int = 2000
+    user_skew: float = 0.8
+    product_skew: float = 1.0
+    rate: float = 50.0
+    mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    storm_every: float = 600.0  # mean seconds between storms; 0 disables them
+    storm_duration: float = 30.0
+    storm_rate: float = 200.0
+    min_price: float = 5.0
+    max_price: float = 1200.0
+    start: float = EPOCH
+
+
+def _zipf_cdf(n: int, skew: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1, dtype=np.float64) ** skew
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def _sample(rng: np.random.Generator, cdf: np.ndarray, size: int) -> np.ndarray:
+    return np.minimum(np.searchsorted(cdf, rng.random(size), "right"), cdf.size - 1)
+
+
+def _empty() -> Dict[str, np.ndarray]:
+    return {"ts": np.empty(0), "user": np.empty(0, np.int64), "product": np.empty(0, np.int64),
+            "type": np.empty(0, np.int64), "price": np.empty(0)}
+
+
+def _take(cols: Dict[str, np.ndarray], index) -> Dict[str, np.ndarray]:
+    return {k: v[index] for k, v in cols.items()}
+
+
+def event_types(spec: WorkloadSpec) -> List[str]:
+    # Batch `type` columns index this list; storms need price_alert even at mix weight 0
+    types = list(spec.mix)
+    if "price_alert" not in types:
+        types.append("price_alert")
+    return types
+
+
+def iter_batches(spec: WorkloadSpec, n: int) -> Iterator[Dict[str, np.ndarray]]:
+    """Column batches (ts, user, product, type, price) in time order, n rows in total."""
+    rng = np.random.default_rng(spec.seed)
+    types = event_types(spec)
+    weights = np.array([spec.mix.get(t, 0.0) for t in types], dtype=np.float64)
+    type_p = weights / weights.sum()
+    alert = types.index("price_alert")
+    user_cdf = _zipf_cdf(spec.users, spec.user_skew)
+    product_cdf = _zipf_cdf(spec.products, spec.product_skew)
+    base_price = rng.uniform(spec.min_price, spec.max_price, spec.products)
+
+    t = spec.start
+    next_storm = t + rng.exponential(spec.storm_every) if spec.storm_every > 0 else np.inf
+    pending = _empty()
+    emitted = 0
+    while emitted < n:
+        ts = t + np.cumsum(rng.exponential(1.0 / spec.rate, BATCH))
+        t = float(ts[-1])
+        product = _sample(rng, product_cdf, BATCH)
+        parts = [pending, {"ts": ts, "user": _sample(rng, user_cdf, BATCH), "product": product,
+                           "type": rng.choice(len(types), size=BATCH, p=type_p),
+                           "price": base_price[product] * rng.uniform(0.85, 1.15, BATCH)}]
+        while next_storm <= t:
+            # One hot product, dropped price, a burst of alerts from many users
+            k = int(rng.poisson(spec.storm_rate * spec.storm_duration))
+            hot = int(_sample(rng, product_cdf, 1)[0])
+            parts.append({"ts": next_storm + np.sort(rng.uniform(0.0, spec.storm_duration, k)),
+                          "user": _sample(rng, user_cdf, k), "product": np.full(k, hot, dtype=np.int64),
+                          "type": np.full(k, alert, dtype=np.int64),
+                          "price": base_price[hot] * rng.uniform(0.6, 0.9, k)})
+            next_storm += spec.storm_duration + rng.exponential(spec.storm_every)
+        merged = {k: np.concatenate([p[k] for p in parts]) for k in pending}
+        merged = _take(merged, np.argsort(merged["ts"], kind="stable"))
+        # Storm events past this batch's last arrival wait for the next batch
+        ready = int(np.searchsorted(merged["ts"], t, "right"))
+        pending = _take(merged, slice(ready, None))
+        batch = _take(merged, slice(0, min(ready, n - emitted)))
+        emitted += batch["ts"].size
+        yield batch
+
+
+def _timestamps(ts: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string((ts * 1e6).astype("datetime64[us]"), unit="us", timezone="UTC")
+
+
+def iter_events(n: int, spec: WorkloadSpec | None = None) -> Iterator[Dict[str, Any]]:
+    spec = spec or WorkloadSpec()
+    names = event_types(spec)
+    i = 0
+    for batch in iter_batches(spec, n):
+        for stamp, user, product, kind, price in zip(_timestamps(batch["ts"]), batch["user"].tolist(),
+                                                     batch["product"].tolist(), batch["type"].tolist(),
+                                                     np.round(batch["price"], 2).tolist()):
+            yield {"event_id": f"evt_{i}", "type": names[kind], "timestamp": str(stamp), "user_id": f"user_{user}",
+                   "product_id": f"prod_{product}", "product_name": f"Product prod_{product}", "price": price}
+            i += 1
+
+
+def write_events(out: str | TextIO, n: int, spec: WorkloadSpec | None = None) -> int:
+    """Stream `n` events as JSONL to a path (or open text file, `-` for stdout); returns the count."""
+    spec = spec or WorkloadSpec()
+    f = sys.stdout if out == "-" else open(out, "w", encoding="utf-8") if isinstance(out, str) else out
+    names = [json.dumps(t) for t in event_types(spec)]
+    i = 0
+    try:
+        for batch in iter_batches(spec, n):
+            # Every field is generated here (ids, ISO stamps, numbers), so no JSON escaping is needed
+            lines = [
+                f'{{"event_id": "evt_{i + j}", "type": {names[kind]}, "timestamp": "{stamp}", '
+                f'"user_id": "user_{user}", "product_id": "prod_{product}", '
+                f'"product_name": "Product prod_{product}", "price": {price}}}\n'
+                for j, (stamp, user, product, kind, price) in enumerate(zip(
+                    _timestamps(batch["ts"]), batch["user"].tolist(), batch["product"].tolist(),
+                    batch["type"].tolist(), np.round(batch["price"], 2).tolist()))
+            ]
+            f.writelines(lines)
+            i += len(lines)
+    finally:
+        if f is not out and f is not sys.stdout:
+            f.close()
+    return i
+
+
+def _parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+if __name__ == "__main__":
+    defaults = WorkloadSpec()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out", help="JSONL output path, or - for stdout")
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--mix", type=_parse_mix, default=None, help="type=weight,... (default: %s)" % ",".join(
+        f"{k}={v}" for k, v in DEFAULT_MIX.items()))
+    for name, value in asdict(defaults).items():
+        if name not in ("seed", "mix"):
+            parser.add_argument("--" + name.replace("_", "-"), type=type(value), default=value)
+    args = vars(parser.parse_args())
+    out, n = args.pop("out"), args.pop("events")
+    args["mix"] = args["mix"] or dict(DEFAULT_MIX)
+    written = write_events(out, n, WorkloadSpec(**args))
+    print(f"wrote {written} events to {out}", file=sys.stderr)
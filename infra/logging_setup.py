@@ -1,21 +1,182 @@
-"""Structured JSON logging setup for the assistant."""
+"""Structured JSON logging setup for the assistant.
+
+Log calls only enqueue the record: JSON formatting and the write to stdout happen
+on a background listener thread. The queue is bounded; when it is full, records
+are dropped and counted instead of stalling the event loop. Decision logs carry
+evidence at a configurable level (none, summary, or full for a sampled fraction).
+python-json-logger is imported when the listener formats the first record, and the
+listener thread itself starts with the first record, not at import.
+"""
+import atexit
+import functools
 import logging
-import json
+import logging.handlers
+import queue
+import random
 import sys
-from pythonjsonlogger import jsonlogger
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict
 from real_time_shopping_assistant.config.settings import settings
+from real_time_shopping_assistant.infra.metrics import registry
+from real_time_shopping_assistant.utils.lazy import lazy_singletons
+
+_dropped = registry.counter("wizecart_log_records_dropped_total", "Log records dropped because the queue was full")
+
+
+class LazyQueueListener(logging.handlers.QueueListener):
+    """Queue listener whose thread is started by the first record, not at setup."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._start_lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self.start()
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Non-blocking queue handler: never waits, counts records it had to drop."""
+
+    def __init__(self, queue, listener: LazyQueueListener | None = None):
+        super().__init__(queue)
+        self.listener = listener
+
+    def prepare(self, record):
+        # Defer message formatting to the listener thread
+        return record
+
+    def enqueue(self, record):
+        if self.listener is not None:
+            self.listener.ensure_started()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped.inc()
+
+
+@functools.lru_cache(maxsize=None)
+def _record_encoder():
+    from pythonjsonlogger import jsonlogger
+
+    class RecordEncoder(jsonlogger.JsonEncoder):
+        # Typed tool records (see tools/records.py) become plain dicts only here, on the listener thread
+        def default(self, o):
+            to_dict = getattr(o, "to_dict", None)
+            if to_dict is not None:
+                return to_dict()
+            return super().default(o)
+
+    return RecordEncoder
+
+
+class LazyJsonFormatter(logging.Formatter):
+    """Builds the python-json-logger formatter on the first record it formats."""
+
+    def __init__(self, fmt: str):
+        super().__init__(fmt)
+        self._json = None
+
+    def format(self, record):
+        if self._json is None:
+            from pythonjsonlogger import jsonlogger
+
+            self._json = jsonlogger.JsonFormatter(self._fmt, json_encoder=_record_encoder())
+        return self._json.format(record)
+
+
+__getattr__ = lazy_singletons(globals(), RecordEncoder=_record_encoder)
+
+
+_listener: LazyQueueListener | None = None
 
 
 def setup_logging():
+    global _listener
     logger = logging.getLogger()
     level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
     logger.setLevel(level)
 
     handler = logging.StreamHandler(sys.stdout)
-    formatter = jsonlogger.JsonFormatter('%(asctime)s %(levelname)s %(name)s %(message)s')
+    formatter = LazyJsonFormatter('%(asctime)s %(levelname)s %(name)s %(message)s')
     handler.setFormatter(formatter)
-    logger.handlers = [handler]
+
+    if _listener is not None:
+        _listener.stop()
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _listener = LazyQueueListener(log_queue, handler, respect_handler_level=True)
+    logger.handlers = [DroppingQueueHandler(log_queue, _listener)]
 
     return logger
 
+
+def shutdown_logging():
+    # Drain queued records; registered at exit so nothing buffered is lost
+    if _listener is not None:
+        _listener.stop()
+
+
+@contextmanager
+def discarded_output():
+    """Records are still enqueued (the hot-path cost) but dropped by the listener."""
+    if _listener is None:
+        yield
+        return
+    handlers = _listener.handlers
+    _listener.handlers = (logging.NullHandler(),)
+    try:
+        yield
+    finally:
+        _listener.queue.join()  # drain what was logged inside the block before restoring
+        _listener.handlers = handlers
+
+
+def log_stats() -> Dict[str, Any]:
+    pending = _listener.queue.qsize() if _listener is not None else 0
+    return {"dropped": int(_dropped.value), "pending": pending}
+
+
+def _summarize_evidence(evidence: Dict[str, Any]) -> Dict[str, Any]:
+    price = evidence.get("price") or {}
+    alt = evidence.get("alt") or {}
+    listings = price.get("price_listings") or []
+    best = min(listings, key=lambda l: l["price"]) if listings else None
+    coupons = price.get("coupons") or []
+    sim = price.get("simulation") or {}
+    reviews = evidence.get("reviews") or []
+    stock = alt.get("stock_checks") or []
+    alternative = alt.get("alternative")
+    return {
+        "best_listing": {"seller": best["seller"], "price": best["price"]} if best else None,
+        "n_listings": len(listings),
+        "best_coupon_pct": max((c["discount_pct"] for c in coupons), default=0.0),
+        "probability_drop": sim.get("probability_drop"),
+        "n_reviews": len(reviews),
+        "in_stock_sellers": sum(1 for s in stock if s.get("availability") == "in_stock"),
+        "alternative": {"seller": alternative["seller"], "price": alternative["price"]} if alternative else None,
+        "finance_reasoning": evidence.get("finance_reasoning"),
+    }
+
+
+def decision_log_payload(event_id: Any, decision: Dict[str, Any], **extra) -> Dict[str, Any]:
+    """Build the decision log record with evidence trimmed to LOG_EVIDENCE_LEVEL."""
+    level = settings.LOG_EVIDENCE_LEVEL
+    out = {k: v for k, v in decision.items() if k != "evidence"}
+    evidence = decision.get("evidence")
+    if evidence is not None and level != "none":
+        if level == "full" and random.random() < settings.LOG_EVIDENCE_SAMPLE_RATE:
+            out["evidence"] = evidence
+        else:
+            out["evidence_summary"] = _summarize_evidence(evidence)
+    return {"event_id": event_id, "decision": out, **extra}
+
+
 logger = setup_logging()
+atexit.register(shutdown_logging)
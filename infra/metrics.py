@@ -1,44 +1,313 @@
-"""Simple metrics exporter (CSV fallback) and counters.
+"""In-process metrics registry with batched columnar flush and Prometheus exposition.
 
-This file provides a minimal Prometheus-like metric recorder that writes
-periodically to CSV for easy inspection in the demo environment.
+Counters, gauges and fixed-bucket histograms live in memory, so recording a metric
+on the hot path is a few arithmetic operations. Per-event rows are buffered as tuples
+and appended in batches to the columnar store in `METRICS_DIR` (see `metrics_store.py`)
+by a background thread (on a timer or once the buffer reaches a size threshold). The
+registry renders Prometheus text format, which can be written to a file on every flush
+or served on a local HTTP endpoint.
 """
-import csv
+import atexit
+import bisect
+import logging
 import os
-from datetime import datetime
+import threading
+import time
+from collections import deque
 from threading import Lock
+from typing import Any, Dict, List, Sequence, Tuple
 
-METRICS_FILE = os.path.join(os.getcwd(), "metrics.csv")
+import numpy as np
+
+from real_time_shopping_assistant.config.settings import settings
+from real_time_shopping_assistant.infra.metrics_store import DECISION_CODES, ROW, STAGES, MetricsStore, stage_durations
+
+METRICS_DIR = os.path.abspath(settings.METRICS_PATH)
 _lock = Lock()
+_log = logging.getLogger(__name__)
+_NO_STAGES = (float("nan"),) * len(STAGES)
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FLUSH_ERROR_LOG_INTERVAL = 60.0  # seconds between logged flush failures
+SCORE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def reset(self):
+        self.value = 0.0
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def reset(self):
+        self.value = 0.0
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def reset(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside the owning bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lo + (hi - lo) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        # name -> (kind, help, {label_key: metric})
+        self._families: Dict[str, Tuple[str, str, Dict[LabelKey, object]]] = {}
+        self._lock = Lock()
+
+    def _get(self, cls, name: str, help_text: str, labels: Dict[str, str], **kwargs):
+        family = self._families.get(name)
+        if family is None:
+            with self._lock:
+                family = self._families.setdefault(name, (cls.kind, help_text, {}))
+        key = _label_key(labels)
+        metric = family[2].get(key)
+        if metric is None:
+            with self._lock:
+                metric = family[2].setdefault(key, cls(**kwargs))
+        return metric
 
-metrics_schema = [
-    "timestamp",
-    "loop_iteration_time",
-    "events_processed",
-    "buy_ratio",
-    "avg_buy_score",
-]
+    def counter(self, name: str, help_text: str = "", **labels) -> Counter:
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str = "", **labels) -> Gauge:
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str = "", buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+                  **labels) -> Histogram:
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def collect(self, name: str) -> Dict[LabelKey, object]:
+        family = self._families.get(name)
+        return dict(family[2]) if family else {}
+
+    def reset(self):
+        """Zero every metric in place; holders of a metric keep counting into this registry."""
+        with self._lock:
+            for _, _, children in self._families.values():
+                for metric in children.values():
+                    metric.reset()
+
+    def export(self) -> Dict[str, Tuple[str, str, Dict[LabelKey, object]]]:
+        """Plain, picklable copy of every value, e.g. to ship from a worker process."""
+        out = {}
+        for name, (kind, help_text, children) in self._families.items():
+            values = {}
+            for key, metric in children.items():
+                if kind == "histogram":
+                    values[key] = (metric.buckets, list(metric.counts), metric.sum, metric.count)
+                else:
+                    values[key] = metric.value
+            out[name] = (kind, help_text, values)
+        return out
+
+    def merge(self, exported: Dict[str, Tuple[str, str, Dict[LabelKey, object]]]):
+        """Fold in another registry's `export()`: counters and histograms add up, gauges take its value."""
+        for name, (kind, help_text, values) in exported.items():
+            for key, value in values.items():
+                labels = dict(key)
+                if kind == "histogram":
+                    buckets, counts, total, count = value
+                    metric = self.histogram(name, help_text, buckets=buckets, **labels)
+                    if metric.buckets != tuple(buckets):
+                        raise ValueError(f"histogram {name} has different buckets")
+                    metric.counts = [a + b for a, b in zip(metric.counts, counts)]
+                    metric.sum += total
+                    metric.count += count
+                elif kind == "counter":
+                    self.counter(name, help_text, **labels).inc(value)
+                else:
+                    self.gauge(name, help_text, **labels).set(value)
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for name, (kind, help_text, children) in sorted(self._families.items()):
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, metric in sorted(children.items()):
+                if kind == "histogram":
+                    cumulative = 0
+                    for bound, n in zip(list(metric.buckets) + ["+Inf"], metric.counts):
+                        cumulative += n
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', str(bound))])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {metric.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {metric.count}")
+                else:
+                    lines.append(f"{name}{_format_labels(key)} {metric.value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# deque.append and popleft are atomic, so the hot path never takes a lock and a drain never loses a row
+_pending_rows: deque = deque()
+_flusher: threading.Thread | None = None
+_flush_wakeup = threading.Event()
+_last_error_logged = float("-inf")
+_http_server = None
 
 
 def init_metrics():
-    if not os.path.exists(METRICS_FILE):
-        with open(METRICS_FILE, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(metrics_schema)
+    os.makedirs(METRICS_DIR, exist_ok=True)
 
 
-def record_metrics(loop_iteration_time, events_processed, buy_ratio, avg_buy_score):
-    row = [
-        datetime.utcnow().isoformat() + "Z",
-        loop_iteration_time,
-        events_processed,
-        buy_ratio,
-        avg_buy_score,
-    ]
+def flush_metrics():
+    # Drain what is buffered now; only flushers take this lock, never the hot path
     with _lock:
-        with open(METRICS_FILE, "a", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(row)
+        rows = [_pending_rows.popleft() for _ in range(len(_pending_rows))]
+        if rows:
+            MetricsStore(METRICS_DIR, settings.METRICS_CHUNK_ROWS).append(np.array(rows, dtype=ROW))
+        if settings.METRICS_PROM_FILE:
+            write_prometheus(settings.METRICS_PROM_FILE)
+
+
+def write_prometheus(path: str):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(registry.render_prometheus())
+    os.replace(tmp, path)
+
 
+def _guarded_flush():
+    # Never let metrics I/O take down the flusher, but keep a broken store visible
+    global _last_error_logged
+    try:
+        flush_metrics()
+    except Exception:
+        _flush_errors.inc()
+        if time.monotonic() - _last_error_logged >= FLUSH_ERROR_LOG_INTERVAL:
+            _last_error_logged = time.monotonic()
+            _log.exception("Metrics flush to %s failed", METRICS_DIR)
+
+
+def _flush_loop():
+    while True:
+        _flush_wakeup.wait(settings.METRICS_FLUSH_INTERVAL)
+        _flush_wakeup.clear()
+        _guarded_flush()
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is None:
+        with _lock:
+            if _flusher is None:
+                # The store directory is created with the first row, not at import
+                init_metrics()
+                _flusher = threading.Thread(target=_flush_loop, name="metrics-flusher", daemon=True)
+                _flusher.start()
+                atexit.register(flush_metrics)
+                if settings.METRICS_HTTP_PORT:
+                    start_http_exporter(settings.METRICS_HTTP_PORT)
+
+
+def start_http_exporter(port: int, host: str = "127.0.0.1"):
+    global _http_server
+    if _http_server is None:
+        # http.server is only imported when the exporter is enabled
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class _PrometheusHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        _http_server = ThreadingHTTPServer((host, port), _PrometheusHandler)
+        threading.Thread(target=_http_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _http_server
+
+
+_events_total = registry.counter("wizecart_events_total", "Events processed by the orchestrator")
+_buys_total = registry.counter("wizecart_buy_decisions_total", "Events that ended in a BUY decision")
+_loop_time = registry.histogram("wizecart_event_latency_seconds", "End-to-end ingest_event latency")
+_flush_errors = registry.counter("wizecart_metrics_flush_errors_total", "Background metric flushes that failed")
+_buy_score = registry.histogram("wizecart_buy_score", "Distribution of fused buy scores", buckets=SCORE_BUCKETS)
+
+
+def record_metrics(loop_iteration_time, events_processed, buy_ratio, avg_buy_score, timestamp: float | None = None,
+                   decision: str | None = None, stages: Dict[str, Dict[str, Any]] | None = None):
+    # Hot path: in-memory counters plus a buffered row tuple; `timestamp` overrides wall time,
+    # `stages` are the event's DAG timings
+    _events_total.inc(events_processed)
+    _buys_total.inc(buy_ratio * events_processed)
+    _loop_time.observe(loop_iteration_time)
+    if avg_buy_score is not None:
+        _buy_score.observe(avg_buy_score)
+    _ensure_flusher()
+    _pending_rows.append((
+        time.time() if timestamp is None else timestamp,
+        loop_iteration_time,
+        float("nan") if avg_buy_score is None else avg_buy_score,
+        DECISION_CODES.get(decision, -1),
+        *(stage_durations(stages) if stages else _NO_STAGES),
+    ))
+    if len(_pending_rows) >= settings.METRICS_FLUSH_ROWS:
+        _flush_wakeup.set()
 
-init_metrics()
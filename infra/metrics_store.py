@@ -0,0 +1,127 @@
+"""Columnar, append-only store for per-event metric rows.
+
+Rows are fixed-size numpy records (timestamp, latency, buy score, decision code and
+one duration per orchestrator stage). A flush appends raw record bytes to the
+open write-ahead chunk `wal-<n>.bin`. Once that chunk holds `chunk_rows` rows it is
+sealed into `part-<n>.npy` and the next flush starts `wal-<n+1>.bin`. Readers
+memory-map one chunk at a time, so a scan over tens of millions of rows keeps
+memory flat. A torn trailing record in a write-ahead chunk is ignored. A
+write-ahead chunk whose part already exists was sealed just before a crash and
+is dropped.
+"""
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+# Same codes as agents.fusion_agent (NOT_BUY, DEFER, BUY); -1 = not recorded
+DECISIONS = ("NOT_BUY", "DEFER", "BUY")
+DECISION_CODES = {d: i for i, d in enumerate(DECISIONS)}
+# Top-level nodes of the orchestrator's per-event DAG
+STAGES = ("profile", "cart", "price", "review", "alternative", "finance", "fusion")
+
+ROW = np.dtype([("ts", "<f8"), ("loop_time", "<f4"), ("buy_score", "<f4"), ("decision", "i1")]
+               + [(f"stage_{s}", "<f4") for s in STAGES])
+_CHUNK_RE = re.compile(r"^(wal|part)-(\d+)\.(bin|npy)$")
+
+
+class MetricsStore:
+    def __init__(self, path: str, chunk_rows: int = 65536):
+        self.path = path
+        self.chunk_rows = chunk_rows
+
+    def _chunks(self) -> Dict[int, Dict[str, str]]:
+        out: Dict[int, Dict[str, str]] = {}
+        if not os.path.isdir(self.path):
+            return out
+        for name in os.listdir(self.path):
+            m = _CHUNK_RE.match(name)
+            if m:
+                out.setdefault(int(m.group(2)), {})[m.group(1)] = os.path.join(self.path, name)
+        return out
+
+    def _open_wal(self) -> Tuple[int, str]:
+        chunks = self._chunks()
+        seq = max(chunks, default=0)
+        files = chunks.get(seq, {})
+        if "part" in files:
+            if "wal" in files:
+                os.remove(files["wal"])
+            seq += 1
+        return seq, os.path.join(self.path, f"wal-{seq:08d}.bin")
+
+    def append(self, rows: np.ndarray):
+        if not len(rows):
+            return
+        os.makedirs(self.path, exist_ok=True)
+        seq, wal = self._open_wal()
+        with open(wal, "ab") as f:
+            f.write(np.ascontiguousarray(rows, dtype=ROW).tobytes())
+        if os.path.getsize(wal) >= self.chunk_rows * ROW.itemsize:
+            self._seal(seq, wal)
+
+    def _seal(self, seq: int, wal: str):
+        part = os.path.join(self.path, f"part-{seq:08d}.npy")
+        tmp = part + ".tmp.npy"
+        np.save(tmp, _read_wal(wal))
+        os.replace(tmp, part)
+        os.remove(wal)
+
+    def seal(self):
+        """Seal the open write-ahead chunk, if any (e.g. before moving parts elsewhere)."""
+        seq, wal = self._open_wal()
+        if os.path.exists(wal):
+            self._seal(seq, wal)
+
+    def iter_chunks(self) -> Iterator[np.ndarray]:
+        for seq, files in sorted(self._chunks().items()):
+            if "part" in files:
+                chunk = np.load(files["part"], mmap_mode="r")
+            else:
+                chunk = _read_wal(files["wal"], mmap=True)
+            if len(chunk):
+                yield chunk
+
+    def __len__(self) -> int:
+        return sum(len(c) for c in self.iter_chunks())
+
+
+def _read_wal(path: str, mmap: bool = False) -> np.ndarray:
+    rows = os.path.getsize(path) // ROW.itemsize  # a torn trailing record is dropped
+    if not rows:
+        return np.empty(0, dtype=ROW)
+    if mmap:
+        return np.memmap(path, dtype=ROW, mode="r", shape=(rows,))
+    return np.fromfile(path, dtype=ROW, count=rows)
+
+
+def merge_stores(dest: str, sources: Sequence[str]):
+    """Move every chunk of `sources` into `dest` (sealing them first); no rows are copied."""
+    os.makedirs(dest, exist_ok=True)
+    target = MetricsStore(dest)
+    target.seal()
+    seq = max(target._chunks(), default=0)
+    for source in sources:
+        store = MetricsStore(source)
+        store.seal()
+        for _, files in sorted(store._chunks().items()):
+            seq += 1
+            os.replace(files["part"], os.path.join(dest, f"part-{seq:08d}.npy"))
+
+
+def iter_rows(paths: Iterable[str], batch_rows: int = 1 << 20) -> Iterator[np.ndarray]:
+    """Chunks of every store in `paths`, split so no batch exceeds `batch_rows` rows."""
+    for path in paths:
+        for chunk in MetricsStore(path).iter_chunks():
+            for lo in range(0, len(chunk), batch_rows):
+                yield chunk[lo:lo + batch_rows]
+
+
+def stage_durations(timings: Dict[str, Dict[str, float]]) -> List[float]:
+    """Seconds spent in each of `STAGES` from DAG timings; NaN for stages that did not run."""
+    out = []
+    for stage in STAGES:
+        t = timings.get(stage)
+        out.append(t["end"] - t["start"] if t else float("nan"))
+    return out
@@ -0,0 +1,132 @@
+"""Per-stage latency tracing, event-loop lag probe and sampled profiling.
+
+`traced(stage)` wraps tool `_arun` methods and agent functions (sync or async) and
+records each call's duration in a per-stage histogram of the metrics registry, so
+p50/p95/p99 per stage are exported with the rest of the metrics. `LoopLagMonitor`
+measures how late the event loop wakes up. `maybe_profile` runs a sampled fraction
+of events under cProfile and writes the stats to `settings.PROFILE_DIR`.
+"""
+import asyncio
+import cProfile
+import functools
+import inspect
+import os
+import random
+import time
+from contextlib import contextmanager
+from typing import Any, Dict
+
+from real_time_shopping_assistant.config.settings import settings
+from real_time_shopping_assistant.infra.metrics import registry
+
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_METRIC = "wizecart_stage_latency_seconds"
+LAG_METRIC = "wizecart_event_loop_lag_seconds"
+
+
+def _stage_histogram(stage: str):
+    return registry.histogram(STAGE_METRIC, "Latency per pipeline stage", buckets=STAGE_BUCKETS, stage=stage)
+
+
+@contextmanager
+def span(stage: str):
+    hist = _stage_histogram(stage)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        hist.observe(time.perf_counter() - t0)
+
+
+def traced(stage: str):
+    """Record the latency of every call to the decorated function under `stage`."""
+    def decorator(fn):
+        hist = _stage_histogram(stage)
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    hist.observe(time.perf_counter() - t0)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                hist.observe(time.perf_counter() - t0)
+        return wrapper
+    return decorator
+
+
+def stage_quantiles() -> Dict[str, Dict[str, float]]:
+    out = {}
+    for key, hist in registry.collect(STAGE_METRIC).items():
+        stage = dict(key)["stage"]
+        out[stage] = {
+            "count": hist.count,
+            "p50": round(hist.quantile(0.50), 6),
+            "p95": round(hist.quantile(0.95), 6),
+            "p99": round(hist.quantile(0.99), 6),
+        }
+    return out
+
+
+class LoopLagMonitor:
+    """Sleeps for `interval` in a loop and records how late each wake-up is."""
+
+    def __init__(self, interval: float | None = None):
+        self.interval = interval or settings.LOOP_LAG_INTERVAL
+        self.hist = registry.histogram(LAG_METRIC, "Event loop scheduling lag", buckets=STAGE_BUCKETS)
+        self.max_lag = registry.gauge("wizecart_event_loop_lag_max_seconds", "Worst observed event loop lag")
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - t0 - self.interval)
+            self.hist.observe(lag)
+            if lag > self.max_lag.value:
+                self.max_lag.set(lag)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+_profiling = False
+
+
+@contextmanager
+def maybe_profile(name: Any):
+    """Profile this block for a PROFILE_SAMPLE_RATE fraction of calls.
+
+    Only one profile runs at a time; because the profiler is per-thread it also
+    captures other coroutines interleaved on the event loop while it is active.
+    """
+    global _profiling
+    if _profiling or settings.PROFILE_SAMPLE_RATE <= 0 or random.random() >= settings.PROFILE_SAMPLE_RATE:
+        yield
+        return
+    _profiling = True
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _profiling = False
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        safe_name = str(name).replace(os.sep, "_")
+        profiler.dump_stats(os.path.join(settings.PROFILE_DIR, f"event_{safe_name}_{int(time.time() * 1000)}.prof"))
@@ -5,30 +5,32 @@ Provides CLI to run in 'loop' mode or quick demo. Supports safe shutdown.
 import argparse
 import asyncio
 import signal
-import json
 import os
 from infra.logging_setup import logger
+from utils.event_stream import stream_events
 from agents.loop_orchestrator import orchestrator
 
 
-def load_events(path: str):
+def load_events(path: str, follow: bool = False):
     # Resolve relative path against the package if needed
     candidate = path
     if not os.path.isabs(candidate):
         candidate = os.path.join(os.path.dirname(__file__), path)
         if not os.path.exists(candidate):
             candidate = path  # fallback to literal
-    try:
-        with open(candidate, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        logger.exception("Failed loading events: %s", candidate)
+    if not os.path.exists(candidate):
+        logger.error("Events file not found: %s", candidate)
         return []
+    # Stream JSONL or JSON-array files lazily instead of loading them whole
+    return stream_events(candidate, follow=follow)
 
 
-async def main_loop(events_path: str, stop_after: int | None = None):
-    events = load_events(events_path)
-    await orchestrator.run_loop(events, stop_after=stop_after)
+async def main_loop(events_path: str, stop_after: int | None = None, follow: bool = False):
+    events = load_events(events_path, follow=follow)
+    try:
+        await orchestrator.run_loop(events, stop_after=stop_after)
+    finally:
+        orchestrator.persist_state()
 
 
 def run():
@@ -36,6 +38,7 @@ def run():
     default_events = os.path.join(os.path.dirname(__file__), "synthetic_transactions.json")
     parser.add_argument("--events", default=default_events)
     parser.add_argument("--stop-after", type=int, default=None)
+    parser.add_argument("--follow", action="store_true", help="Tail a growing JSONL events file")
     args = parser.parse_args()
 
     loop = asyncio.get_event_loop()
@@ -47,7 +50,7 @@ def run():
     signal.signal(signal.SIGINT, _signal_handler)
     signal.signal(signal.SIGTERM, _signal_handler)
 
-    loop.run_until_complete(main_loop(args.events, args.stop_after))
+    loop.run_until_complete(main_loop(args.events, args.stop_after, args.follow))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,349 @@
+"""Append-only, segmented decision history with per-user and per-product indexes.
+
+Every decision is appended as a fixed-size binary record to the active segment's
+write-ahead file. When the active segment fills up it is sealed into a directory of
+column files (user, product, ts, score, decision), plus sort orders that cluster
+rows by user and by product with time ascending within each group. A lookup is
+then a binary search per segment followed by a slice. Sealed segments are
+memory-mapped on load, and a background thread merges runs of similar-sized old
+segments (size-tiered compaction) so the segment count stays logarithmic.
+"""
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from real_time_shopping_assistant.config.settings import settings
+from real_time_shopping_assistant.utils.lazy import lazy_singletons
+
+# Same codes as agents.fusion_agent (NOT_BUY, DEFER, BUY)
+DECISIONS = ("NOT_BUY", "DEFER", "BUY")
+_DECISION_CODES = {d: i for i, d in enumerate(DECISIONS)}
+
+_RECORD = np.dtype([("user", "<i4"), ("product", "<i4"), ("ts", "<f8"), ("score", "<f4"), ("decision", "i1")])
+_COLUMNS = _RECORD.names
+_SEGMENT_RE = re.compile(r"^seg_(\d+)_(\d+)$")
+_WAL_RE = re.compile(r"^wal_(\d+)\.bin$")
+
+
+def _records(cols: Dict[str, np.ndarray], rows: np.ndarray) -> np.ndarray:
+    out = np.empty(rows.size, dtype=_RECORD)
+    for name in _COLUMNS:
+        out[name] = cols[name][rows]
+    return out
+
+
+class _Segment:
+    """Sealed, immutable segment covering write-ahead ids lo..hi."""
+
+    def __init__(self, path: str, lo: int, hi: int):
+        self.path, self.lo, self.hi = path, lo, hi
+        load = lambda name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r")
+        self.cols = {name: load(name) for name in _COLUMNS}
+        self.index = {kind: (load(kind + "_order"), load(kind + "_keys")) for kind in ("user", "product")}
+
+    def __len__(self) -> int:
+        return self.cols["ts"].shape[0]
+
+    @classmethod
+    def write(cls, root: str, lo: int, hi: int, cols: Dict[str, np.ndarray]) -> "_Segment":
+        path = os.path.join(root, f"seg_{lo:08d}_{hi:08d}")
+        tmp = path + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name in _COLUMNS:
+            np.save(os.path.join(tmp, name + ".npy"), np.ascontiguousarray(cols[name]))
+        for kind in ("user", "product"):
+            order = np.lexsort((cols["ts"], cols[kind])).astype(np.int32)
+            np.save(os.path.join(tmp, kind + "_order.npy"), order)
+            np.save(os.path.join(tmp, kind + "_keys.npy"), np.ascontiguousarray(cols[kind][order]))
+        os.replace(tmp, path)
+        return cls(path, lo, hi)
+
+    def rows_for(self, kind: str, code: int) -> np.ndarray:
+        """Row ids for one user/product code, time ascending."""
+        order, keys = self.index[kind]
+        # Match the key dtype, otherwise numpy casts the whole column per lookup
+        code = keys.dtype.type(code)
+        lo = np.searchsorted(keys, code, "left")
+        hi = np.searchsorted(keys, code, "right")
+        return order[lo:hi]
+
+
+class DecisionHistory:
+    def __init__(self, path: str | None = None, segment_rows: int | None = None,
+                 compact_fanout: int | None = None, background: bool = True):
+        self.path = path or settings.DECISION_LOG_PATH
+        self.segment_rows = segment_rows or settings.DECISION_LOG_SEGMENT_ROWS
+        self.compact_fanout = max(2, compact_fanout or settings.DECISION_LOG_COMPACT_FANOUT)
+        self.background = background
+        self._codes: Dict[str, Dict[str, int]] = {"user": {}, "product": {}}
+        self._names: Dict[str, List[str]] = {"user": [], "product": []}
+        self._dict_files: Dict[str, Any] = {}
+        self._segments: Tuple[_Segment, ...] = ()
+        self._active = np.zeros(self.segment_rows, dtype=_RECORD)
+        self._active_len = 0
+        self._active_index: Dict[str, Dict[int, List[int]]] = {"user": {}, "product": {}}
+        self._wal_id = 0
+        self._wal = None
+        self._lock = threading.Lock()
+        self._compactor: threading.Thread | None = None
+        self.compactions = 0
+        if os.path.isdir(self.path):
+            self._load()
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self._segments) + self._active_len
+
+    @property
+    def segments(self) -> int:
+        return len(self._segments)
+
+    # --- loading -------------------------------------------------------------
+
+    def _load(self):
+        for kind in ("user", "product"):
+            names_path = os.path.join(self.path, kind + "s.txt")
+            if os.path.exists(names_path):
+                with open(names_path, encoding="utf-8") as f:
+                    names = f.read().split("\n")[:-1]
+                self._names[kind] = names
+                self._codes[kind] = {n: i for i, n in enumerate(names)}
+
+        found = []
+        for entry in os.listdir(self.path):
+            m = _SEGMENT_RE.match(entry)
+            if m:
+                found.append((int(m.group(1)), int(m.group(2)), entry))
+            elif entry.endswith(".tmp"):
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+        # A crash mid-compaction can leave both the merged segment and its inputs
+        segments = []
+        for lo, hi, entry in sorted(found, key=lambda s: (s[0], -s[1])):
+            if segments and hi <= segments[-1].hi:
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+                continue
+            segments.append(_Segment(os.path.join(self.path, entry), lo, hi))
+        self._segments = tuple(segments)
+        self._wal_id = segments[-1].hi + 1 if segments else 0
+
+        for entry in os.listdir(self.path):
+            m = _WAL_RE.match(entry)
+            if not m:
+                continue
+            wal_id = int(m.group(1))
+            if wal_id < self._wal_id:
+                # Already sealed; the write-ahead file outlived its segment
+                os.remove(os.path.join(self.path, entry))
+            elif wal_id == self._wal_id:
+                wal_path = os.path.join(self.path, entry)
+                records = np.fromfile(wal_path, dtype=np.uint8)
+                valid = records.size - records.size % _RECORD.itemsize
+                # Drop a torn trailing record so later appends stay aligned
+                os.truncate(wal_path, valid)
+                records = records[:valid].view(_RECORD)
+                # Replay every row: the file may hold a full segment (crash before sealing) or
+                # more rows than a smaller DECISION_LOG_SEGMENT_ROWS now allows
+                if records.size > self._active.shape[0]:
+                    self._active = np.zeros(records.size, dtype=_RECORD)
+                for rec in records:
+                    self._append_active(rec)
+                if self._active_len >= self.segment_rows:
+                    self._wal = open(wal_path, "ab")
+                    self._seal()
+
+    # --- writes --------------------------------------------------------------
+
+    def _code(self, kind: str, name: str) -> int:
+        code = self._codes[kind].get(name)
+        if code is None:
+            code = self._codes[kind][name] = len(self._names[kind])
+            self._names[kind].append(name)
+            f = self._dict_files.get(kind)
+            if f is None:
+                os.makedirs(self.path, exist_ok=True)
+                f = self._dict_files[kind] = open(os.path.join(self.path, kind + "s.txt"), "a", encoding="utf-8")
+            f.write(name + "\n")
+        return code
+
+    def _append_active(self, rec):
+        row = self._active_len
+        self._active[row] = rec
+        self._active_len += 1
+        self._active_index["user"].setdefault(int(rec["user"]), []).append(row)
+        self._active_index["product"].setdefault(int(rec["product"]), []).append(row)
+
+    def record(self, user_id: str, product_id: str, buy_score: float | None, decision: str,
+               ts: float | None = None):
+        rec = np.zeros(1, dtype=_RECORD)
+        rec["user"] = self._code("user", str(user_id))
+        rec["product"] = self._code("product", str(product_id))
+        rec["ts"] = time.time() if ts is None else ts
+        rec["score"] = np.nan if buy_score is None else buy_score
+        rec["decision"] = _DECISION_CODES.get(decision, -1)
+        if self._wal is None:
+            os.makedirs(self.path, exist_ok=True)
+            self._wal = open(os.path.join(self.path, f"wal_{self._wal_id:08d}.bin"), "ab")
+        self._wal.write(rec.tobytes())
+        self._append_active(rec[0])
+        if self._active_len >= self.segment_rows:
+            self._seal()
+
+    def flush(self):
+        # Dictionaries first, so every code in the write-ahead file has a name on disk
+        for f in self._dict_files.values():
+            f.flush()
+        if self._wal is not None:
+            self._wal.flush()
+
+    def _seal(self):
+        self.flush()
+        n = self._active_len
+        seg = _Segment.write(self.path, self._wal_id, self._wal_id,
+                             {name: self._active[name][:n] for name in _COLUMNS})
+        with self._lock:
+            self._segments = self._segments + (seg,)
+        self._wal.close()
+        os.remove(self._wal.name)
+        self._wal = None
+        self._wal_id += 1
+        self._active_len = 0
+        self._active_index = {"user": {}, "product": {}}
+        if self._active.shape[0] != self.segment_rows:
+            self._active = np.zeros(self.segment_rows, dtype=_RECORD)
+        self._maybe_compact()
+
+    def close(self):
+        self.flush()
+        if self._compactor is not None:
+            self._compactor.join()
+        for f in self._dict_files.values():
+            f.close()
+        self._dict_files = {}
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+
+    # --- compaction ----------------------------------------------------------
+
+    def _tier(self, seg: _Segment) -> int:
+        # Tier t holds segments of roughly segment_rows * fanout**t rows
+        tier, size = 0, self.segment_rows * self.compact_fanout
+        while len(seg) >= size:
+            tier, size = tier + 1, size * self.compact_fanout
+        return tier
+
+    def _compaction_run(self) -> Tuple[_Segment, ...]:
+        segs = self._segments
+        start = 0
+        for i in range(1, len(segs) + 1):
+            if i == len(segs) or self._tier(segs[i]) != self._tier(segs[start]):
+                if i - start >= self.compact_fanout:
+                    return segs[start:start + self.compact_fanout]
+                start = i
+        return ()
+
+    def _maybe_compact(self):
+        if not self._compaction_run() or (self._compactor is not None and self._compactor.is_alive()):
+            return
+        if self.background:
+            self._compactor = threading.Thread(target=self.compact, name="decision-compactor", daemon=True)
+            self._compactor.start()
+        else:
+            self.compact()
+
+    def compact(self):
+        """Merge runs of `compact_fanout` same-tier segments until none are left."""
+        while True:
+            run = self._compaction_run()
+            if not run:
+                return
+            cols = {name: np.concatenate([s.cols[name] for s in run]) for name in _COLUMNS}
+            merged = _Segment.write(self.path, run[0].lo, run[-1].hi, cols)
+            with self._lock:
+                cur = self._segments
+                i = cur.index(run[0])
+                self._segments = cur[:i] + (merged,) + cur[i + len(run):]
+            for seg in run:
+                shutil.rmtree(seg.path, ignore_errors=True)
+            self.compactions += 1
+
+    # --- queries -------------------------------------------------------------
+
+    def _query(self, kind: str, key: str, n: int | None = None, start: float | None = None,
+               end: float | None = None, product_id: str | None = None) -> List[Dict[str, Any]]:
+        code = self._codes[kind].get(str(key))
+        if code is None:
+            return []
+        product_code = None
+        if product_id is not None:
+            product_code = self._codes["product"].get(str(product_id))
+            if product_code is None:
+                return []
+
+        parts = []
+        for seg in self._segments:
+            rows = seg.rows_for(kind, code)
+            if not rows.size:
+                continue
+            if start is not None or end is not None:
+                ts = seg.cols["ts"][rows]
+                lo = 0 if start is None else np.searchsorted(ts, start, "left")
+                hi = rows.size if end is None else np.searchsorted(ts, end, "right")
+                rows = rows[lo:hi]
+            if product_code is not None:
+                rows = rows[seg.cols["product"][rows] == product_code]
+            if n is not None:
+                rows = rows[-n:]
+            if rows.size:
+                parts.append(_records(seg.cols, rows))
+        active_rows = self._active_index[kind].get(code)
+        if active_rows:
+            recs = self._active[np.array(active_rows)]
+            if start is not None:
+                recs = recs[recs["ts"] >= start]
+            if end is not None:
+                recs = recs[recs["ts"] <= end]
+            if product_code is not None:
+                recs = recs[recs["product"] == product_code]
+            parts.append(recs)
+        if not parts:
+            return []
+
+        recs = np.concatenate(parts)
+        recs = recs[np.argsort(-recs["ts"], kind="stable")]
+        if n is not None:
+            recs = recs[:n]
+        users, products = self._names["user"], self._names["product"]
+        return [
+            {
+                "user_id": users[r["user"]],
+                "product_id": products[r["product"]],
+                "timestamp": float(r["ts"]),
+                "buy_score": None if np.isnan(r["score"]) else round(float(r["score"]), 4),
+                "decision": DECISIONS[r["decision"]] if r["decision"] >= 0 else None,
+            }
+            for r in recs
+        ]
+
+    def last_n(self, user_id: str, n: int = 10, product_id: str | None = None) -> List[Dict[str, Any]]:
+        """Most recent decisions for a user (optionally for one product), newest first."""
+        return self._query("user", user_id, n=n, product_id=product_id)
+
+    def user_range(self, user_id: str, start: float | None = None, end: float | None = None) -> List[Dict[str, Any]]:
+        return self._query("user", user_id, start=start, end=end)
+
+    def product_last_n(self, product_id: str, n: int = 10) -> List[Dict[str, Any]]:
+        return self._query("product", product_id, n=n)
+
+    def last_decision(self, user_id: str, product_id: str) -> Dict[str, Any] | None:
+        found = self._query("user", user_id, n=1, product_id=product_id)
+        return found[0] if found else None
+
+
+# Segments are mapped and the WAL replayed on first access, not at import
+__getattr__ = lazy_singletons(globals(), decision_history=DecisionHistory)
@@ -1,76 +1,483 @@
-"""Long-term memory using a vectorstore (FAISS/Chromadb) via LangChain's VectorStoreMemory.
+"""Long-term memory backed by a local NumPy vector index.
 
-This module provides a wrapper with embedding placeholder and compaction.
-It includes fallbacks so the demo can run even if LangChain/FAISS aren't
-installed yet. Replace with production vectorstore and embeddings as needed.
+Documents are embedded with a deterministic hashing embedder (no network, no model
+download) and stored as rows of one contiguous float32 matrix; top-k cosine search
+is a single matrix-vector product. Large corpora can be partitioned IVF-style
+(k-means centroids fitted on save, inverted lists; only the nearest lists are
+scanned). The index persists to `settings.VECTOR_STORE_PATH` as append-only raw
+files that stay memory-mapped, so a restart neither re-embeds nor reads the
+whole index into RAM. Rows added since the last save sit in an in-memory tail that
+`LongTermMemory` saves into the mapped files once it passes VECTOR_STORE_SAVE_ROWS
+or VECTOR_STORE_SAVE_INTERVAL seconds, so the tail stays bounded between shutdowns.
+
+Set VECTOR_STORE_BACKEND=faiss to use LangChain's FAISS store instead when installed.
+LangChain is imported only on that path. `vectorstore` / `long_term_memory` are
+created (and the on-disk index mapped) on first access, not at import.
 """
+import json
 import os
+import re
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
 from real_time_shopping_assistant.config.settings import settings
+from real_time_shopping_assistant.utils.lazy import lazy_singletons
+
+_TOKEN_RE = re.compile(r"[a-z0-9_.]+")
 
-try:
-    from langchain.embeddings.base import Embeddings
-    from langchain.memory import VectorStoreRetrieverMemory
-    from langchain.vectorstores import FAISS
-    # OpenAIEmbeddings could be used if keys provided
-    from langchain.embeddings.openai import OpenAIEmbeddings  # type: ignore
-    _HAS_LANGCHAIN = True
-except Exception:
-    _HAS_LANGCHAIN = False
 
+class HashingEmbeddings:
+    """Deterministic feature-hashing embedder over words and character trigrams."""
 
-class DummyEmbeddings:
-    """Placeholder embedding implementation for demo/testing."""
-    def __init__(self):
-        pass
+    def __init__(self, dim: int | None = None):
+        self.dim = dim or settings.VECTOR_DIM
+
+    def _features(self, text: str) -> List[str]:
+        words = _TOKEN_RE.findall(text.lower())
+        grams = [w[i:i + 3] for w in words if len(w) > 3 for i in range(len(w) - 2)]
+        return words + grams
+
+    def embed_matrix(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                # Hash picks the column, its top bit the sign (keeps collisions unbiased)
+                out[row, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
 
     def embed_documents(self, texts):
-        # Very naive embedding: use length only (not for production)
-        return [[float(len(t))] for t in texts]
+        return self.embed_matrix(list(texts)).tolist()
 
     def embed_query(self, text):
-        return [float(len(text))]
+        return self.embed_matrix([text])[0].tolist()
+
+
+# Kept for callers of the old placeholder
+DummyEmbeddings = HashingEmbeddings
+
+
+def _grow(buf: np.ndarray, n: int) -> np.ndarray:
+    """`buf` with room for at least n rows (capacity doubles; contents kept)."""
+    if n <= buf.shape[0]:
+        return buf
+    grown = np.zeros((max(n, 2 * buf.shape[0], 256),) + buf.shape[1:], dtype=buf.dtype)
+    grown[:buf.shape[0]] = buf
+    return grown
+
+
+class VectorIndex:
+    """Contiguous float32 matrix of unit vectors with exact or IVF top-k cosine search.
+
+    Saved rows stay memory-mapped (vectors, and document offsets into the docs file);
+    rows added since the last save live in an in-memory tail until the next save
+    appends them and remaps. IVF keeps one growable row array per list, so a probe
+    only touches its lists. Centroids are fitted by `maybe_train()` (called from
+    `save()`), never on the search path.
+    """
+
+    _META = "meta.json"
+    _VECTORS = "vectors.f32"
+    _DOCS = "docs.jsonl"
+    _DOC_INDEX = "docs.idx"
+    _CENTROIDS = "centroids.npy"
+    _ASSIGN = "assignments.npy"
+
+    def __init__(self, dim: int, path: str | None = None, n_lists: int = 0, n_probe: int = 8,
+                 ivf_min_size: int = 10000, seed: int = 0):
+        self.dim = dim
+        self.path = path
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.ivf_min_size = ivf_min_size
+        self.seed = seed
+        self._size = 0
+        # Saved rows [0, _base_n) are mapped from disk; later rows sit in the tail buffers
+        self._base_n = 0
+        self._base = np.zeros((0, dim), dtype=np.float32)
+        self._doc_offsets = np.zeros(1, dtype=np.uint64)
+        self._docs_bytes = 0
+        self._tail = np.zeros((0, dim), dtype=np.float32)
+        self._tail_docs: List[Tuple[str, Dict[str, Any]]] = []
+        self._centroids: np.ndarray | None = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._lists: List[np.ndarray] = []
+        self._list_sizes = np.zeros(0, dtype=np.int64)
+        self._trained_size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def unsaved(self) -> int:
+        """Rows held in the in-memory tail, not yet in the mapped files."""
+        return self._size - self._base_n
+
+    def _segments(self) -> List[np.ndarray]:
+        return [self._base, self._tail[:self._size - self._base_n]]
+
+    @property
+    def vectors(self) -> np.ndarray:
+        base, tail = self._segments()
+        return np.concatenate([base, tail]) if len(base) and len(tail) else (tail if len(tail) else base)
+
+    def add(self, vectors: np.ndarray, texts: Sequence[str], metadatas: Sequence[Dict[str, Any]] | None = None) -> List[int]:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        n = vectors.shape[0]
+        if n != len(texts):
+            raise ValueError("vectors and texts must have the same length")
+        metadatas = metadatas or [{} for _ in texts]
+        start = self._size
+        offset = start - self._base_n
+        self._tail = _grow(self._tail, offset + n)
+        self._tail[offset:offset + n] = vectors
+        self._tail_docs.extend(zip(texts, metadatas))
+        self._size += n
+        if self._centroids is not None:
+            self._assign = _grow(self._assign, self._size)
+            assign = self._nearest_lists(vectors, 1)[:, 0]
+            self._assign[start:self._size] = assign
+            self._append_to_lists(np.arange(start, self._size, dtype=np.int32), assign)
+        return list(range(start, start + n))
+
+    def _append_to_lists(self, rows: np.ndarray, assign: np.ndarray):
+        order = np.argsort(assign, kind="stable")
+        lists, starts, counts = np.unique(assign[order], return_index=True, return_counts=True)
+        for lst, lo, count in zip(lists.tolist(), starts.tolist(), counts.tolist()):
+            size = int(self._list_sizes[lst])
+            self._lists[lst] = _grow(self._lists[lst], size + count)
+            self._lists[lst][size:size + count] = rows[order[lo:lo + count]]
+            self._list_sizes[lst] = size + count
+
+    def _build_lists(self):
+        k = self._centroids.shape[0]
+        assign = self._assign[:self._size]
+        order = np.argsort(assign, kind="stable").astype(np.int32)
+        self._list_sizes = np.bincount(assign, minlength=k).astype(np.int64)
+        self._lists = [rows.copy() for rows in np.split(order, np.cumsum(self._list_sizes)[:-1])]
+
+    def _nearest_lists(self, vectors: np.ndarray, n: int) -> np.ndarray:
+        sims = vectors @ self._centroids.T
+        n = min(n, sims.shape[1])
+        return np.argpartition(-sims, n - 1, axis=1)[:, :n].astype(np.int32)
+
+    def train(self, iterations: int = 10):
+        """Fit IVF centroids with spherical k-means over the stored vectors."""
+        data = self.vectors
+        k = min(self.n_lists, self._size)
+        if k <= 0:
+            return
+        rng = np.random.default_rng(self.seed)
+        centroids = data[rng.choice(self._size, size=k, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, data)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty lists keep their previous centroid
+            nonempty = norms[:, 0] > 0
+            centroids[nonempty] = sums[nonempty] / norms[nonempty]
+        self._centroids = centroids
+        self._assign = np.argmax(data @ centroids.T, axis=1).astype(np.int32)
+        self._build_lists()
+        self._trained_size = self._size
+
+    def maybe_train(self) -> bool:
+        """Fit (or refit, once the corpus has doubled) the IVF centroids; True if it trained."""
+        if not self.n_lists or self._size < self.ivf_min_size:
+            return False
+        if self._centroids is None or self._size >= 2 * self._trained_size:
+            self.train()
+            return True
+        return False
+
+    def _similarities(self, query: np.ndarray, rows: np.ndarray | None) -> np.ndarray:
+        base, tail = self._segments()
+        if rows is None:
+            return np.concatenate([base @ query, tail @ query])
+        sims = np.empty(rows.size, dtype=np.float32)
+        in_base = rows < self._base_n
+        sims[in_base] = base[rows[in_base]] @ query
+        sims[~in_base] = tail[rows[~in_base] - self._base_n] @ query
+        return sims
+
+    def search(self, query: np.ndarray, k: int = 4) -> List[Tuple[int, float]]:
+        """Return up to k (row, cosine similarity) pairs, best first."""
+        if not self._size or k <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        rows = None
+        if self._centroids is not None:
+            probes = self._nearest_lists(query[None, :], self.n_probe)[0]
+            rows = np.concatenate([self._lists[p][:self._list_sizes[p]] for p in probes])
+        sims = self._similarities(query, rows)
+        k = min(k, sims.size)
+        if k == 0:
+            return []
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        ids = rows[top] if rows is not None else top
+        return [(int(i), float(s)) for i, s in zip(ids, sims[top])]
+
+    def document(self, row: int) -> Tuple[str, Dict[str, Any]]:
+        if row >= self._base_n:
+            return self._tail_docs[row - self._base_n]
+        lo, hi = int(self._doc_offsets[row]), int(self._doc_offsets[row + 1])
+        with open(os.path.join(self.path, self._DOCS), "rb") as f:
+            f.seek(lo)
+            rec = json.loads(f.read(hi - lo))
+        return rec["text"], rec["metadata"]
+
+    def _copy_base(self, path: str):
+        # Saving to a new location: the mapped rows and their documents go first
+        with open(os.path.join(path, self._VECTORS), "wb") as f:
+            for lo in range(0, self._base_n, 1 << 16):
+                f.write(np.ascontiguousarray(self._base[lo:lo + (1 << 16)]).tobytes())
+        with open(os.path.join(self.path, self._DOCS), "rb") as src, \
+                open(os.path.join(path, self._DOCS), "wb") as dst:
+            remaining = self._docs_bytes
+            while remaining:
+                block = src.read(min(remaining, 1 << 20))
+                dst.write(block)
+                remaining -= len(block)
+        with open(os.path.join(path, self._DOC_INDEX), "wb") as f:
+            f.write(np.ascontiguousarray(self._doc_offsets).tobytes())
+
+    def save(self, path: str | None = None):
+        """Append rows added since the last save, commit the new count in meta.json and remap."""
+        path = path or self.path
+        os.makedirs(path, exist_ok=True)
+        if path != self.path and self._base_n:
+            self._copy_base(path)
+        self.path = path
+        self.maybe_train()
+        vec_path = os.path.join(path, self._VECTORS)
+        docs_path = os.path.join(path, self._DOCS)
+        idx_path = os.path.join(path, self._DOC_INDEX)
+        _, tail = self._segments()
+        offsets = []
+        # Truncate first so rows from an interrupted save are overwritten, not duplicated
+        with open(vec_path, "ab") as f:
+            f.truncate(self._base_n * self.dim * 4)
+            f.write(np.ascontiguousarray(tail).tobytes())
+        with open(docs_path, "ab") as f:
+            f.truncate(self._docs_bytes)
+            for text, metadata in self._tail_docs:
+                f.write(json.dumps({"text": text, "metadata": metadata}, default=str).encode("utf-8") + b"\n")
+                offsets.append(f.tell())
+            docs_bytes = f.tell()
+        with open(idx_path, "ab") as f:
+            f.truncate((self._base_n + 1) * 8)
+            f.write(np.array(offsets, dtype=np.uint64).tobytes())
+        if self._centroids is not None:
+            np.save(os.path.join(path, self._CENTROIDS), self._centroids)
+            np.save(os.path.join(path, self._ASSIGN), self._assign[:self._size])
+        meta = {"dim": self.dim, "count": self._size, "docs_bytes": docs_bytes,
+                "trained_size": self._trained_size}
+        tmp = os.path.join(path, self._META + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, self._META))
+        self._docs_bytes = docs_bytes
+        self._map(self._size)
 
+    def _map(self, count: int):
+        # Everything up to `count` is on disk: map it and drop the in-memory tail
+        if count:
+            self._base = np.memmap(os.path.join(self.path, self._VECTORS), dtype=np.float32, mode="r",
+                                   shape=(count, self.dim))
+            self._doc_offsets = np.memmap(os.path.join(self.path, self._DOC_INDEX), dtype=np.uint64, mode="r",
+                                          shape=(count + 1,))
+        self._base_n = count
+        self._tail = np.zeros((0, self.dim), dtype=np.float32)
+        self._tail_docs = []
 
-class DummyVectorStore:
-    def __init__(self):
-        self.docs = []
+    def _index_docs(self):
+        # Stores saved before docs.idx existed: record line offsets once, streaming
+        offsets = [0]
+        with open(os.path.join(self.path, self._DOCS), "rb") as f:
+            while offsets[-1] < self._docs_bytes:
+                offsets.append(offsets[-1] + len(f.readline()))
+        with open(os.path.join(self.path, self._DOC_INDEX), "wb") as f:
+            f.write(np.array(offsets, dtype=np.uint64).tobytes())
 
     @classmethod
-    def from_texts(cls, texts, embedding):
-        vs = cls()
-        vs.docs = list(texts)
+    def load(cls, path: str, **kwargs) -> "VectorIndex":
+        with open(os.path.join(path, cls._META), encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(meta["dim"], path=path, **kwargs)
+        count = meta["count"]
+        index._size = count
+        index._docs_bytes = meta["docs_bytes"]
+        idx_path = os.path.join(path, cls._DOC_INDEX)
+        if count and (not os.path.exists(idx_path) or os.path.getsize(idx_path) < (count + 1) * 8):
+            index._index_docs()
+        index._map(count)
+        if os.path.exists(os.path.join(path, cls._CENTROIDS)) and meta.get("trained_size"):
+            index._centroids = np.load(os.path.join(path, cls._CENTROIDS))
+            index._assign = np.load(os.path.join(path, cls._ASSIGN))[:count]
+            index._build_lists()
+            index._trained_size = meta["trained_size"]
+        return index
+
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        return os.path.exists(os.path.join(path, cls._META))
+
+
+class LocalVectorStore:
+    """Text-level wrapper: embeds with HashingEmbeddings and stores in a VectorIndex."""
+
+    def __init__(self, embedding: HashingEmbeddings, index: VectorIndex):
+        self.embedding = embedding
+        self.index = index
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, path: str | None = None):
+        vs = cls(embedding, VectorIndex(
+            embedding.dim,
+            path=path,
+            n_lists=settings.VECTOR_IVF_LISTS,
+            n_probe=settings.VECTOR_IVF_PROBES,
+            ivf_min_size=settings.VECTOR_IVF_MIN_SIZE,
+        ))
+        vs.add_texts(texts, metadatas)
         return vs
 
-    def as_retriever(self):
-        # Simple retriever returning stored docs
-        class Retriever:
-            def __init__(self, docs):
-                self.docs = docs
+    @classmethod
+    def load(cls, path: str, embedding) -> "LocalVectorStore":
+        return cls(embedding, VectorIndex.load(
+            path,
+            n_lists=settings.VECTOR_IVF_LISTS,
+            n_probe=settings.VECTOR_IVF_PROBES,
+            ivf_min_size=settings.VECTOR_IVF_MIN_SIZE,
+        ))
+
+    def add_texts(self, texts: Iterable[str], metadatas: Sequence[Dict[str, Any]] | None = None) -> List[int]:
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.index.add(self.embedding.embed_matrix(texts), texts, metadatas)
+
+    def similarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple[str, Dict[str, Any], float]]:
+        hits = self.index.search(self.embedding.embed_matrix([query])[0], k)
+        return [(*self.index.document(row), score) for row, score in hits]
+
+    def similarity_search(self, query: str, k: int = 4) -> List[str]:
+        return [text for text, _, _ in self.similarity_search_with_score(query, k)]
 
+    def save(self, path: str | None = None):
+        self.index.save(path)
+
+    def as_retriever(self, k: int = 4):
+        store = self
+
+        class Retriever:
             def get_relevant_documents(self, query: str):
-                return self.docs
+                return store.similarity_search(query, k)
 
-        return Retriever(self.docs)
+        return Retriever()
+
+
+class LongTermMemory:
+    """Memory facade: buffers saved contexts and inserts them into the store in batches."""
+
+    def __init__(self, store: LocalVectorStore, memory_key: str = "long_term", batch_size: int | None = None):
+        self.store = store
+        self.retriever = store.as_retriever()
+        self.memory_key = memory_key
+        self.batch_size = batch_size or settings.LONG_TERM_BATCH_SIZE
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+        self._last_save = time.monotonic()
+
+    @staticmethod
+    def _document(inputs: Dict[str, Any], outputs: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        event = inputs.get("input") or {}
+        decision = outputs.get("output") or {}
+        metadata = {
+            "event_id": event.get("event_id"),
+            "user_id": event.get("user_id"),
+            "product_id": event.get("product_id"),
+            "decision": decision.get("decision"),
+            "buy_score": decision.get("buy_score"),
+            "timestamp": decision.get("timestamp"),
+        }
+        text = (f"user {metadata['user_id']} {event.get('type', 'event')} product {metadata['product_id']} "
+                f"{event.get('product_name', '')} price {event.get('price')} decision {metadata['decision']} "
+                f"action {decision.get('recommended_action')} buy_score {metadata['buy_score']}")
+        return text, metadata
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, Any]):
+        self._pending.append(self._document(inputs, outputs))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        pending, self._pending = self._pending, []
+        if pending:
+            texts, metadatas = zip(*pending)
+            self.store.add_texts(texts, metadatas)
+            self._maybe_save()
+
+    def _maybe_save(self):
+        # Move the tail into the mapped files by size or age, like metrics flushes and history seals
+        index = self.store.index
+        if not index.path or not index.unsaved:
+            return
+        if (index.unsaved >= settings.VECTOR_STORE_SAVE_ROWS
+                or time.monotonic() - self._last_save >= settings.VECTOR_STORE_SAVE_INTERVAL):
+            self.store.save()
+            self._last_save = time.monotonic()
+
+    def load_memory_variables(self, inputs: Dict[str, Any] | None = None, k: int = 4) -> Dict[str, Any]:
+        self.flush()
+        query = str((inputs or {}).get("input", ""))
+        return {self.memory_key: self.store.similarity_search(query, k)}
+
+    def save(self, path: str | None = None):
+        self.flush()
+        self.store.save(path or settings.VECTOR_STORE_PATH)
+        self._last_save = time.monotonic()
+
+
+def _langchain_faiss():
+    try:
+        from langchain.memory import VectorStoreRetrieverMemory
+        from langchain.vectorstores import FAISS
+        return FAISS, VectorStoreRetrieverMemory
+    except Exception:
+        return None
 
 
 def create_vectorstore_and_memory():
-    if _HAS_LANGCHAIN:
-        emb = DummyEmbeddings()  # replace with OpenAIEmbeddings() in prod
+    faiss = _langchain_faiss() if settings.VECTOR_STORE_BACKEND == "faiss" else None
+    if faiss is not None:
+        FAISS, VectorStoreRetrieverMemory = faiss
+        emb = HashingEmbeddings()  # replace with OpenAIEmbeddings() in prod
         vs = FAISS.from_texts([], emb)
         memory = VectorStoreRetrieverMemory(retriever=vs.as_retriever(), memory_key="long_term")
         return vs, memory
+    emb = HashingEmbeddings()
+    path = settings.VECTOR_STORE_PATH
+    if VectorIndex.exists(path):
+        vs = LocalVectorStore.load(path, emb)
+        if vs.index.dim != emb.dim:
+            raise ValueError(f"Vector store at {path} has dim {vs.index.dim}, VECTOR_DIM is {emb.dim}")
     else:
-        emb = DummyEmbeddings()
-        vs = DummyVectorStore.from_texts([], emb)
-        # Minimal memory object with retriever attribute
-        class SimpleMemory:
-            def __init__(self, retriever, memory_key="long_term"):
-                self.retriever = retriever
-                self.memory_key = memory_key
-
-        memory = SimpleMemory(retriever=vs.as_retriever(), memory_key="long_term")
-        return vs, memory
+        vs = LocalVectorStore.from_texts([], emb, path=path)
+    memory = LongTermMemory(vs, memory_key="long_term")
+    return vs, memory
+
+
+def _create_singletons() -> Dict[str, Any]:
+    vs, memory = create_vectorstore_and_memory()
+    return {"vectorstore": vs, "long_term_memory": memory}
 
 
-# expose factory
-vectorstore, long_term_memory = create_vectorstore_and_memory()
+# expose factory; built on first access of either name
+__getattr__ = lazy_singletons(globals(), vectorstore=_create_singletons, long_term_memory=_create_singletons)
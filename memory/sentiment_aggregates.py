@@ -0,0 +1,145 @@
+"""Incremental per-product sentiment aggregates.
+
+Keeps a running, time-decayed sentiment mean per product in a compact columnar
+table (one NumPy array per field, one row per product). Each fold only scores
+reviews newer than the product's high-water mark (latest review timestamp, plus
+64-bit digests of the review_ids already seen at that timestamp), and the current
+score is read in O(1). At most `MAX_BOUNDARY_IDS` ids are tracked per timestamp;
+further reviews tied on it (e.g. sources without timestamps) are treated as seen. The table can be snapshotted to a single `.npz` file and reloaded on restart.
+"""
+import hashlib
+import os
+import math
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from real_time_shopping_assistant.config.settings import settings
+from real_time_shopping_assistant.utils.lazy import lazy_singletons
+
+_FIELDS = {
+    "weighted_sum": np.float64,
+    "weight": np.float64,
+    "count": np.int64,
+    "last_ts": np.float64,
+}
+MAX_BOUNDARY_IDS = 256
+
+
+def _digest(review_id: Any) -> int:
+    return int.from_bytes(hashlib.blake2b(str(review_id).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class SentimentAggregates:
+    def __init__(self, half_life: float = 0.0, capacity: int = 1024):
+        self.half_life = half_life
+        self._index: Dict[str, int] = {}
+        self._cols = {name: np.zeros(capacity, dtype=dtype) for name, dtype in _FIELDS.items()}
+        self._cols["last_ts"].fill(-np.inf)
+        # Digests of review_ids seen at each product's high-water timestamp (ties on timestamp)
+        self._boundary_ids: Dict[str, set] = {}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _row(self, product_id: str) -> int:
+        row = self._index.get(product_id)
+        if row is None:
+            row = len(self._index)
+            if row >= self._cols["weight"].size:
+                for name, col in self._cols.items():
+                    grown = np.zeros(col.size * 2, dtype=col.dtype)
+                    if name == "last_ts":
+                        grown.fill(-np.inf)
+                    grown[:col.size] = col
+                    self._cols[name] = grown
+            self._index[product_id] = row
+        return row
+
+    def _decay(self, dt: float) -> float:
+        if not self.half_life or dt <= 0:
+            return 1.0
+        return math.pow(0.5, dt / self.half_life)
+
+    def fold(self, product_id: str, reviews: List[Dict[str, Any]], score_review: Callable[[Dict[str, Any]], float]) -> float | None:
+        """Fold reviews newer than the high-water mark into the product's aggregate."""
+        row = self._row(product_id)
+        cols = self._cols
+        last_ts = cols["last_ts"][row]
+        boundary = self._boundary_ids.get(product_id, set())
+        fresh = [r for r in reviews if float(r.get("timestamp") or 0.0) >= last_ts]
+        for review in sorted(fresh, key=lambda r: float(r.get("timestamp") or 0.0)):
+            ts = float(review.get("timestamp") or 0.0)
+            key = _digest(review.get("review_id"))
+            if ts > last_ts:
+                # Age the existing aggregate to the new reference time
+                factor = self._decay(ts - last_ts) if np.isfinite(last_ts) else 1.0
+                cols["weighted_sum"][row] *= factor
+                cols["weight"][row] *= factor
+                last_ts = ts
+                boundary = set()
+            elif key in boundary or len(boundary) >= MAX_BOUNDARY_IDS:
+                continue
+            cols["weighted_sum"][row] += score_review(review)
+            cols["weight"][row] += 1.0
+            cols["count"][row] += 1
+            boundary.add(key)
+        if boundary:
+            self._boundary_ids[product_id] = boundary
+        cols["last_ts"][row] = last_ts
+        return self.score(product_id)
+
+    def score(self, product_id: str) -> float | None:
+        row = self._index.get(product_id)
+        if row is None or self._cols["weight"][row] <= 0:
+            return None
+        return round(float(self._cols["weighted_sum"][row] / self._cols["weight"][row]), 3)
+
+    def count(self, product_id: str) -> int:
+        row = self._index.get(product_id)
+        return 0 if row is None else int(self._cols["count"][row])
+
+    def snapshot(self, path: str | None = None):
+        path = path or settings.SENTIMENT_SNAPSHOT_PATH
+        n = len(self._index)
+        products = np.array(list(self._index), dtype=str)
+        b_rows = [self._index[p] for p, ids in self._boundary_ids.items() for _ in ids]
+        b_ids = [i for ids in self._boundary_ids.values() for i in ids]
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            products=products,
+            boundary_rows=np.array(b_rows, dtype=np.int64),
+            boundary_digests=np.array(b_ids, dtype=np.uint64),
+            half_life=np.array(self.half_life),
+            **{name: col[:n] for name, col in self._cols.items()},
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str | None = None) -> "SentimentAggregates":
+        path = path or settings.SENTIMENT_SNAPSHOT_PATH
+        with np.load(path) as data:
+            products = data["products"].tolist()
+            agg = cls(half_life=float(data["half_life"]), capacity=max(1024, len(products)))
+            agg._index = {p: i for i, p in enumerate(products)}
+            for name in _FIELDS:
+                agg._cols[name][:len(products)] = data[name]
+            if "boundary_digests" in data:
+                digests = data["boundary_digests"].tolist()
+            else:  # older snapshots stored the raw review_ids
+                digests = [_digest(i) for i in data["boundary_ids"].tolist()]
+            for row, digest in zip(data["boundary_rows"].tolist(), digests):
+                agg._boundary_ids.setdefault(products[row], set()).add(digest)
+        return agg
+
+
+def load_or_create(path: str | None = None) -> SentimentAggregates:
+    path = path or settings.SENTIMENT_SNAPSHOT_PATH
+    if os.path.exists(path):
+        return SentimentAggregates.load(path)
+    return SentimentAggregates(half_life=settings.SENTIMENT_DECAY_HALF_LIFE)
+
+
+# Snapshot is read on first access, not at import
+__getattr__ = lazy_singletons(globals(), sentiment_aggregates=load_or_create)
@@ -1,27 +1,93 @@
-"""Short-term session memory using LangChain ConversationBufferMemory.
+"""Short-term session memory.
 
-This module provides a graceful fallback if LangChain's memory classes
-are not available in the running environment (helps in fresh installs).
+`SessionMemory` keeps one bounded history per user, with LRU/idle-TTL eviction
+and a global entry cap, so memory stays flat as the number of shoppers grows.
+It exposes the `save_context`/`load_memory_variables` shape of LangChain's buffer
+memories, keyed by user, without depending on LangChain.
 """
-try:
-    from langchain.memory import ConversationBufferMemory
-except Exception:
-    # Lightweight fallback implementation with the minimal interface used
-    class ConversationBufferMemory:
-        def __init__(self, memory_key: str = "session_history", k: int = 10):
-            self.memory_key = memory_key
-            self.k = k
-            self.buffer = []
-
-        def save_context(self, inputs, outputs):
-            self.buffer.append({"input": inputs, "output": outputs})
-            if len(self.buffer) > self.k:
-                self.buffer = self.buffer[-self.k:]
-
-        def load_memory_variables(self, inputs=None):
-            return {self.memory_key: self.buffer}
-
-
-def create_short_term_memory():
-    # Stores recent conversation/events; configured to keep last 10 events
-    return ConversationBufferMemory(memory_key="session_history", k=10)
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict
+
+from real_time_shopping_assistant.config.settings import settings
+
+
+class _Session:
+    __slots__ = ("history", "last_seen")
+
+    def __init__(self, k: int, now: float):
+        self.history = deque(maxlen=k)
+        self.last_seen = now
+
+
+class SessionMemory:
+    """Per-user bounded histories in LRU order.
+
+    Sessions idle longer than `idle_ttl` are dropped, as are the least recently used
+    ones once `max_sessions` users or `max_entries` stored turns are exceeded. Saves
+    are O(1) amortized: every eviction pops from the cold end of the LRU order.
+    """
+
+    def __init__(self, k: int | None = None, max_sessions: int | None = None, idle_ttl: float | None = None,
+                 max_entries: int | None = None, memory_key: str = "session_history",
+                 clock: Callable[[], float] = time.monotonic):
+        self.k = k or settings.SESSION_HISTORY_K
+        self.max_sessions = max_sessions or settings.SESSION_MAX_USERS
+        self.idle_ttl = settings.SESSION_IDLE_TTL if idle_ttl is None else idle_ttl
+        self.max_entries = max_entries or settings.SESSION_MAX_ENTRIES
+        self.memory_key = memory_key
+        self._clock = clock
+        self._sessions: "OrderedDict[Any, _Session]" = OrderedDict()
+        self.entries = 0
+        self.evictions = {"ttl": 0, "lru": 0, "cap": 0}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict_oldest(self, reason: str):
+        _, session = self._sessions.popitem(last=False)
+        self.entries -= len(session.history)
+        self.evictions[reason] += 1
+
+    def _evict(self, now: float):
+        sessions = self._sessions
+        if self.idle_ttl > 0:
+            while sessions and now - next(iter(sessions.values())).last_seen > self.idle_ttl:
+                self._evict_oldest("ttl")
+        while len(sessions) > self.max_sessions:
+            self._evict_oldest("lru")
+        # Never evict the session that was just written
+        while self.entries > self.max_entries and len(sessions) > 1:
+            self._evict_oldest("cap")
+
+    def save_context(self, user_id: Any, inputs: Dict[str, Any], outputs: Dict[str, Any]):
+        now = self._clock()
+        session = self._sessions.get(user_id)
+        if session is None:
+            session = self._sessions[user_id] = _Session(self.k, now)
+        else:
+            session.last_seen = now
+            self._sessions.move_to_end(user_id)
+        if len(session.history) < self.k:
+            self.entries += 1
+        session.history.append({"input": inputs, "output": outputs})
+        self._evict(now)
+
+    def load_memory_variables(self, user_id: Any) -> Dict[str, Any]:
+        session = self._sessions.get(user_id)
+        if session is None or (self.idle_ttl > 0 and self._clock() - session.last_seen > self.idle_ttl):
+            return {self.memory_key: []}
+        return {self.memory_key: list(session.history)}
+
+    def clear(self, user_id: Any):
+        session = self._sessions.pop(user_id, None)
+        if session is not None:
+            self.entries -= len(session.history)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sessions": len(self._sessions), "entries": self.entries, "evictions": dict(self.evictions)}
+
+
+def create_session_memory(clock: Callable[[], float] = time.monotonic) -> SessionMemory:
+    # One bounded history per user; limits come from settings
+    return SessionMemory(memory_key="session_history", clock=clock)
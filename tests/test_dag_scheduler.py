@@ -0,0 +1,38 @@
+"""Unit tests for the dependency-graph scheduler used by ingest_event."""
+import asyncio
+import pytest
+from real_time_shopping_assistant.agents.dag_scheduler import DagScheduler
+
+
+def _sleeper(delay, value):
+    async def run(*_):
+        await asyncio.sleep(delay)
+        return value
+    return run
+
+
+def test_nodes_start_when_own_inputs_ready():
+    dag = DagScheduler()
+    dag.add("slow", _sleeper(0.05, 1))
+    dag.add("fast", _sleeper(0.01, 2))
+    dag.add("after_fast", lambda fast: fast * 10, inputs=("fast",))
+    dag.add("join", lambda slow, after_fast: slow + after_fast, inputs=("slow", "after_fast"))
+
+    results = asyncio.run(dag.run())
+
+    assert results["join"] == 21
+    # after_fast must not wait for the unrelated slow node
+    assert dag.timings["after_fast"]["start"] < dag.timings["slow"]["end"]
+    assert dag.critical_path() == ["slow", "join"]
+
+
+def test_rejects_cycles_and_unknown_inputs():
+    dag = DagScheduler()
+    dag.add("a", lambda b: b, inputs=("b",))
+    dag.add("b", lambda a: a, inputs=("a",))
+    with pytest.raises(ValueError):
+        asyncio.run(dag.run())
+
+    dag = DagScheduler().add("a", lambda missing: missing, inputs=("missing",))
+    with pytest.raises(ValueError):
+        asyncio.run(dag.run())
@@ -0,0 +1,69 @@
+"""Unit tests for the segmented decision history."""
+from real_time_shopping_assistant.memory.decision_history import DecisionHistory
+
+
+def _fill(history, n, users=5, products=3):
+    for i in range(n):
+        history.record(f"u{i % users}", f"p{i % products}", i / n, ("BUY", "DEFER", "NOT_BUY")[i % 3], ts=float(i))
+
+
+def test_queries_span_sealed_and_active_segments(tmp_path):
+    history = DecisionHistory(str(tmp_path), segment_rows=8, compact_fanout=100)
+    _fill(history, 30)
+    assert len(history) == 30 and history.segments == 3
+
+    last = history.last_n("u1", 3)
+    assert [d["timestamp"] for d in last] == [26.0, 21.0, 16.0]
+    assert last[0] == {"user_id": "u1", "product_id": "p2", "timestamp": 26.0, "buy_score": round(26 / 30, 4),
+                       "decision": "NOT_BUY"}
+    assert [d["timestamp"] for d in history.user_range("u0", 5, 20)] == [20.0, 15.0, 10.0, 5.0]
+    assert history.last_decision("u1", "p0")["timestamp"] == 21.0
+    assert [d["timestamp"] for d in history.product_last_n("p0", 2)] == [27.0, 24.0]
+    assert history.last_n("nobody") == [] and history.last_decision("u1", "nope") is None
+
+
+def test_reload_restores_segments_and_write_ahead_records(tmp_path):
+    history = DecisionHistory(str(tmp_path), segment_rows=8, compact_fanout=100)
+    _fill(history, 20)
+    history.close()
+
+    reloaded = DecisionHistory(str(tmp_path), segment_rows=8, compact_fanout=100)
+    assert len(reloaded) == 20 and reloaded.segments == 2
+    assert reloaded.last_n("u3", 10) == history.last_n("u3", 10)
+    reloaded.record("u3", "p9", None, "BUY", ts=100.0)
+    assert reloaded.last_n("u3", 1)[0] == {"user_id": "u3", "product_id": "p9", "timestamp": 100.0,
+                                           "buy_score": None, "decision": "BUY"}
+
+
+def test_reopen_seals_full_or_oversized_write_ahead_files(tmp_path):
+    # Restart with a smaller segment size than the write-ahead file already holds
+    history = DecisionHistory(str(tmp_path / "smaller"), segment_rows=8, compact_fanout=100)
+    _fill(history, 5)
+    history.close()
+    reopened = DecisionHistory(str(tmp_path / "smaller"), segment_rows=4, compact_fanout=100)
+    assert len(reopened) == 5 and reopened.segments == 1
+    reopened.record("u9", "p9", 0.5, "BUY", ts=50.0)
+    assert len(reopened) == 6 and reopened.last_n("u9", 1)[0]["timestamp"] == 50.0
+
+    # Crash after the row that fills a segment was written, before it was sealed
+    path = str(tmp_path / "crash")
+    history = DecisionHistory(path, segment_rows=4, compact_fanout=100)
+    history._seal = lambda: None
+    _fill(history, 4)
+    history.close()
+    recovered = DecisionHistory(path, segment_rows=4, compact_fanout=100)
+    assert len(recovered) == 4 and recovered.segments == 1
+    recovered.record("u0", "p0", None, "DEFER", ts=9.0)
+    assert [d["timestamp"] for d in recovered.last_n("u0", 2)] == [9.0, 0.0]
+
+
+def test_compaction_merges_same_tier_segments(tmp_path):
+    history = DecisionHistory(str(tmp_path), segment_rows=4, compact_fanout=2, background=False)
+    _fill(history, 32)
+    assert history.compactions > 0 and history.segments == 1
+    before = history.last_n("u2", 100)
+    assert len(before) == 32 // 5 + (2 < 32 % 5)
+    history.close()
+
+    reloaded = DecisionHistory(str(tmp_path), segment_rows=4, compact_fanout=2)
+    assert reloaded.segments == 1 and reloaded.last_n("u2", 100) == before
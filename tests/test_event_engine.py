@@ -0,0 +1,95 @@
+"""Unit tests for the concurrent, per-user-ordered event engine and streaming readers."""
+import asyncio
+import json
+from real_time_shopping_assistant.agents.event_engine import EventEngine
+from real_time_shopping_assistant.utils.event_stream import stream_events
+
+
+def _events(n_users: int, per_user: int):
+    return [
+        {"event_id": f"{u}_{i}", "user_id": f"user_{u}", "seq": i}
+        for i in range(per_user)
+        for u in range(n_users)
+    ]
+
+
+def test_per_user_order_and_parallelism():
+    seen = {}
+
+    async def handler(event):
+        await asyncio.sleep(0.01)
+        seen.setdefault(event["user_id"], []).append(event["seq"])
+
+    engine = EventEngine(handler, workers=4, max_in_flight=8)
+    stats = asyncio.run(engine.run(_events(4, 5)))
+
+    assert stats["processed"] == 20
+    assert stats["peak_concurrency"] == 4
+    for seqs in seen.values():
+        assert seqs == list(range(5))
+
+
+def test_idle_backoff_only_on_empty_polls():
+    async def handler(event):
+        return None
+
+    stream = [{"user_id": "a"}, None, None, {"user_id": "b"}]
+    engine = EventEngine(handler, workers=2, idle_backoff_min=0.001, idle_backoff_max=0.002)
+    stats = asyncio.run(engine.run(stream))
+
+    assert stats["processed"] == 2
+    assert stats["idle_sleeps"] == 2
+
+
+def test_stop_after_and_failures_counted():
+    async def handler(event):
+        if event["seq"] == 1:
+            raise RuntimeError("boom")
+
+    engine = EventEngine(handler, workers=2)
+    stats = asyncio.run(engine.run(_events(1, 10), stop_after=3))
+
+    assert stats["processed"] == 2
+    assert stats["failed"] == 1
+
+
+def test_stream_events_jsonl_and_json_array(tmp_path):
+    events = [{"event_id": f"e{i}", "user_id": f"user_{i % 3}", "text": "x" * 5000} for i in range(40)]
+    array_path = tmp_path / "events.json"
+    array_path.write_text(json.dumps(events, indent=2))
+    jsonl_path = tmp_path / "events.jsonl"
+    jsonl_path.write_text("\n".join(json.dumps(e) for e in events) + "\n")
+
+    async def collect(path):
+        return [e async for e in stream_events(str(path))]
+
+    assert asyncio.run(collect(array_path)) == events
+    assert asyncio.run(collect(jsonl_path)) == events
+
+    seen = []
+
+    async def handler(event):
+        seen.append(event["event_id"])
+
+    engine = EventEngine(handler, workers=2, max_in_flight=4)
+    stats = asyncio.run(engine.run(stream_events(str(jsonl_path))))
+    assert stats["processed"] == 40 and sorted(seen) == sorted(e["event_id"] for e in events)
+
+
+def test_follow_mode_tails_appended_lines(tmp_path):
+    path = tmp_path / "live.jsonl"
+    path.write_text(json.dumps({"event_id": "a"}) + "\n")
+
+    async def scenario():
+        got = []
+        async for event in stream_events(str(path), follow=True):
+            if event is None:
+                if len(got) == 2:
+                    break
+                with open(path, "a") as f:
+                    f.write(json.dumps({"event_id": "b"}) + "\n")
+                continue
+            got.append(event["event_id"])
+        return got
+
+    assert asyncio.run(scenario()) == ["a", "b"]
@@ -0,0 +1,42 @@
+"""Unit tests for the non-blocking log pipeline and decision evidence levels."""
+import logging
+import queue
+from real_time_shopping_assistant.config.settings import settings
+from real_time_shopping_assistant.infra import logging_setup
+from real_time_shopping_assistant.infra.logging_setup import DroppingQueueHandler, decision_log_payload
+
+DECISION = {
+    "decision": "BUY",
+    "buy_score": 0.7,
+    "evidence": {
+        "price": {"price_listings": [{"seller": "A", "price": 12.0}, {"seller": "B", "price": 10.0}],
+                  "coupons": [{"discount_pct": 10.0}], "simulation": {"probability_drop": 0.3}},
+        "reviews": [{"review_id": "r1"}] * 20,
+        "alt": {"alternative": {"seller": "A", "price": 12.0}, "stock_checks": [{"availability": "in_stock"}]},
+        "finance_reasoning": "ok",
+    },
+}
+
+
+def test_evidence_levels(monkeypatch):
+    monkeypatch.setattr(settings, "LOG_EVIDENCE_LEVEL", "none")
+    assert "evidence" not in decision_log_payload("e1", DECISION)["decision"]
+
+    monkeypatch.setattr(settings, "LOG_EVIDENCE_LEVEL", "summary")
+    summary = decision_log_payload("e1", DECISION)["decision"]["evidence_summary"]
+    assert summary["best_listing"] == {"seller": "B", "price": 10.0}
+    assert summary["n_reviews"] == 20 and summary["in_stock_sellers"] == 1
+
+    monkeypatch.setattr(settings, "LOG_EVIDENCE_LEVEL", "full")
+    monkeypatch.setattr(settings, "LOG_EVIDENCE_SAMPLE_RATE", 1.0)
+    assert decision_log_payload("e1", DECISION)["decision"]["evidence"] is DECISION["evidence"]
+    monkeypatch.setattr(settings, "LOG_EVIDENCE_SAMPLE_RATE", 0.0)
+    assert "evidence_summary" in decision_log_payload("e1", DECISION)["decision"]
+
+
+def test_full_queue_drops_and_counts():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    before = logging_setup.log_stats()["dropped"]
+    for i in range(3):
+        handler.handle(logging.LogRecord("t", logging.INFO, __file__, 1, {"i": i}, None, None))
+    assert logging_setup.log_stats()["dropped"] - before == 2
@@ -0,0 +1,102 @@
+"""Unit tests for the NumPy vector index behind long-term memory."""
+import numpy as np
+
+from real_time_shopping_assistant.memory.long_term_memory import (
+    HashingEmbeddings,
+    LocalVectorStore,
+    LongTermMemory,
+    VectorIndex,
+)
+
+
+def test_hashing_embeddings_are_deterministic_unit_vectors():
+    emb = HashingEmbeddings(dim=64)
+    a = emb.embed_matrix(["user u1 product p_123 decision BUY", ""])
+    b = emb.embed_matrix(["user u1 product p_123 decision BUY"])
+    assert a.dtype == np.float32 and a.shape == (2, 64)
+    assert np.allclose(a[0], b[0])
+    assert abs(float(np.linalg.norm(a[0])) - 1.0) < 1e-5
+    assert not a[1].any()
+
+
+def test_store_search_and_mmap_persistence(tmp_path):
+    store = LocalVectorStore.from_texts(
+        ["wireless headphones BUY", "kitchen blender NOT_BUY", "running shoes DEFER"],
+        HashingEmbeddings(dim=128),
+        metadatas=[{"i": 0}, {"i": 1}, {"i": 2}],
+    )
+    assert store.similarity_search("kitchen blender", k=1) == ["kitchen blender NOT_BUY"]
+    store.save(str(tmp_path))
+    store.add_texts(["coffee grinder BUY"], [{"i": 3}])
+    store.save()
+
+    loaded = LocalVectorStore.load(str(tmp_path), HashingEmbeddings(dim=128))
+    assert isinstance(loaded.index._base, np.memmap)
+    assert len(loaded.index) == 4
+    text, metadata, score = loaded.similarity_search_with_score("coffee grinder", k=1)[0]
+    assert (text, metadata) == ("coffee grinder BUY", {"i": 3})
+    # Appending after load keeps the mapping; only the new row is held in memory
+    loaded.add_texts(["desk lamp BUY"])
+    assert isinstance(loaded.index._base, np.memmap) and len(loaded.index._tail_docs) == 1
+    assert loaded.similarity_search("desk lamp", k=1) == ["desk lamp BUY"]
+    loaded.save()
+    assert loaded.index._base.shape[0] == 5 and not loaded.index._tail_docs
+    assert loaded.similarity_search("kitchen blender", k=1) == ["kitchen blender NOT_BUY"]
+
+
+def test_ivf_search_finds_exact_match(tmp_path):
+    rng = np.random.default_rng(1)
+    data = rng.standard_normal((2000, 32)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    exact = VectorIndex(32)
+    ivf = VectorIndex(32, n_lists=16, n_probe=4, ivf_min_size=100)
+    texts = [str(i) for i in range(len(data))]
+    exact.add(data[:1000], texts[:1000])
+    ivf.add(data[:1000], texts[:1000])
+    assert ivf.search(data[0], k=1)[0][0] == 0 and ivf._centroids is None  # search never trains
+    assert ivf.maybe_train() and ivf._centroids.shape == (16, 32)
+    # Rows added after training are appended to their inverted lists
+    exact.add(data[1000:], texts[1000:])
+    ivf.add(data[1000:], texts[1000:])
+    assert int(ivf._list_sizes.sum()) == 2000
+
+    for row in (0, 777, 1999):
+        assert ivf.search(data[row], k=1)[0][0] == row
+        assert exact.search(data[row], k=3)[0][0] == row
+
+    ivf.save(str(tmp_path))
+    loaded = VectorIndex.load(str(tmp_path), n_lists=16, n_probe=4, ivf_min_size=100)
+    assert loaded.search(data[1999], k=1)[0][0] == 1999
+    assert loaded.document(1999) == ("1999", {})
+
+
+def test_memory_batches_decisions_into_store():
+    memory = LongTermMemory(LocalVectorStore.from_texts([], HashingEmbeddings(dim=64)), batch_size=2)
+    event = {"event_id": "e1", "user_id": "u1", "product_id": "p_9", "price": 10.0}
+    memory.save_context({"input": event}, {"output": {"decision": "BUY", "buy_score": 0.7}})
+    assert len(memory.store.index) == 0
+    memory.save_context({"input": {**event, "event_id": "e2", "product_id": "p_4"}}, {"output": {"decision": "DEFER"}})
+    assert len(memory.store.index) == 2
+
+    hits = memory.load_memory_variables({"input": "product p_9"}, k=1)["long_term"]
+    assert hits and "p_9" in hits[0]
+
+
+def test_memory_saves_tail_into_mapped_files_past_threshold(tmp_path, monkeypatch):
+    from real_time_shopping_assistant.config.settings import settings
+
+    monkeypatch.setattr(settings, "VECTOR_STORE_SAVE_ROWS", 4)
+    monkeypatch.setattr(settings, "VECTOR_STORE_SAVE_INTERVAL", 3600.0)
+    store = LocalVectorStore.from_texts([], HashingEmbeddings(dim=64), path=str(tmp_path))
+    memory = LongTermMemory(store, batch_size=2)
+    for i in range(6):
+        memory.save_context({"input": {"event_id": f"e{i}", "product_id": f"p_{i}"}}, {"output": {}})
+        # The tail never grows past the threshold before it is saved and mapped
+        assert store.index.unsaved < 4
+    assert len(store.index) == 6 and store.index.unsaved == 2
+    assert len(VectorIndex.load(str(tmp_path))) == 4
+
+    monkeypatch.setattr(settings, "VECTOR_STORE_SAVE_INTERVAL", 0.0)
+    memory.save_context({"input": {"event_id": "e6"}}, {"output": {}})
+    memory.flush()
+    assert store.index.unsaved == 0 and len(VectorIndex.load(str(tmp_path))) == 7
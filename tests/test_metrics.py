@@ -0,0 +1,125 @@
+"""Unit tests for the in-memory metrics registry and the batched columnar store."""
+import asyncio
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from real_time_shopping_assistant.infra import metrics
+from real_time_shopping_assistant.infra.metrics import MetricsRegistry
+from real_time_shopping_assistant.infra.metrics_store import ROW, MetricsStore, merge_stores
+
+
+def test_registry_renders_prometheus_text():
+    reg = MetricsRegistry()
+    reg.counter("requests_total", "Requests", tool="price").inc(3)
+    reg.gauge("queue_depth").set(7)
+    hist = reg.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0), stage="fusion")
+    for v in (0.05, 0.5, 0.5, 2.0):
+        hist.observe(v)
+
+    text = reg.render_prometheus()
+    assert 'requests_total{tool="price"} 3.0' in text
+    assert "queue_depth 7" in text
+    assert 'latency_seconds_bucket{stage="fusion",le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{stage="fusion",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{stage="fusion"} 4' in text
+    assert 0.1 <= hist.quantile(0.5) <= 1.0
+
+
+def test_isolated_state_zeroes_registry_and_restores_it(tmp_path):
+    from real_time_shopping_assistant.evaluation.benchmarks import isolated_state
+    from real_time_shopping_assistant.tools.price_tool import check_stock_tool, stock_check_stats
+
+    asyncio.run(check_stock_tool._arun([("RetailerA", "p1")]))
+    outer = stock_check_stats()
+    with isolated_state(str(tmp_path)):
+        assert stock_check_stats() == {"pairs": 0, "upstream_calls": 0}
+        asyncio.run(check_stock_tool._arun([("RetailerA", "p1"), ("RetailerB", "p1")]))
+        assert stock_check_stats() == {"pairs": 2, "upstream_calls": 2}
+        exported = metrics.registry.export()
+    assert stock_check_stats() == outer
+    assert exported["wizecart_stock_upstream_calls_total"][2] == {(): 2.0}
+
+
+def test_record_metrics_buffers_until_flush(tmp_path, monkeypatch):
+    path = tmp_path / "metrics"
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(path))
+    metrics.init_metrics()
+    metrics.flush_metrics()
+
+    metrics.record_metrics(0.01, 1, 1.0, 0.7, decision="BUY",
+                           stages={"price": {"start": 0.001, "end": 0.004}})
+    metrics.record_metrics(0.02, 1, 0.0, 0.3)
+    assert len(MetricsStore(str(path))) == 0  # nothing stored until the batch is flushed
+
+    metrics.flush_metrics()
+    rows = np.concatenate(list(MetricsStore(str(path)).iter_chunks()))
+    assert rows["buy_score"].tolist() == pytest.approx([0.7, 0.3])
+    assert rows["decision"].tolist() == [2, -1]
+    assert rows["stage_price"][0] == pytest.approx(0.003)
+    assert np.isnan(rows["stage_review"]).all()
+
+
+def test_concurrent_flushes_lose_no_rows_and_failures_are_counted(tmp_path, monkeypatch):
+    path = tmp_path / "metrics"
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(path))
+    metrics.flush_metrics()
+
+    def record():
+        for _ in range(5000):
+            metrics.record_metrics(0.01, 1, 0.0, 0.5, stages={"price": {"start": 0.0, "end": 0.001}})
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads):
+        metrics.flush_metrics()
+    metrics.flush_metrics()
+    assert len(MetricsStore(str(path))) == 20000
+
+    # A broken store directory is counted (and logged) instead of silently swallowed
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path / "not_a_dir"))
+    (tmp_path / "not_a_dir").write_text("")
+    failures = metrics._flush_errors.value
+    metrics.record_metrics(0.01, 1, 0.0, 0.5)
+    metrics._guarded_flush()
+    assert metrics._flush_errors.value > failures
+
+
+def test_store_seals_chunks_and_skips_torn_records(tmp_path):
+    store = MetricsStore(str(tmp_path / "m"), chunk_rows=4)
+    rows = np.zeros(3, dtype=ROW)
+    rows["ts"] = [1, 2, 3]
+    store.append(rows)
+    store.append(rows)  # 6 rows >= 4: sealed into part-00000000.npy
+    store.append(rows[:1])
+    with open(tmp_path / "m" / "wal-00000001.bin", "ab") as f:
+        f.write(b"\x00" * 5)  # torn trailing record from a crash mid-write
+    assert sorted(os.listdir(tmp_path / "m")) == ["part-00000000.npy", "wal-00000001.bin"]
+    assert [len(c) for c in store.iter_chunks()] == [6, 1]
+
+    merge_stores(str(tmp_path / "all"), [str(tmp_path / "m")])
+    assert len(MetricsStore(str(tmp_path / "all"))) == 7
+
+
+def test_traced_records_per_stage_latency():
+    import asyncio
+    from real_time_shopping_assistant.infra.tracing import traced, stage_quantiles
+
+    @traced("test.async_stage")
+    async def slow():
+        await asyncio.sleep(0.002)
+        return 1
+
+    @traced("test.sync_stage")
+    def fast():
+        return 2
+
+    assert asyncio.run(slow()) == 1
+    assert fast() == 2
+    stages = stage_quantiles()
+    assert stages["test.async_stage"]["count"] == 1
+    assert stages["test.async_stage"]["p50"] > 0
+    assert stages["test.sync_stage"]["count"] == 1
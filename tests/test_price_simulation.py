@@ -0,0 +1,38 @@
+"""Unit tests for the vectorized Monte Carlo price simulation."""
+from real_time_shopping_assistant.tools.code_exec_tool import fit_price_model, simulate_batch
+
+
+def _history(prices):
+    return [{"ts": i * 86400, "price": p} for i, p in enumerate(prices)]
+
+
+def test_fit_uses_history_order_by_timestamp():
+    rising = _history([100, 101, 102, 103, 104])
+    drift, vol = fit_price_model(list(reversed(rising)))
+    assert drift > 0 and vol > 0
+    assert fit_price_model([]) == (0.0, 0.02)
+
+
+def test_batch_is_seeded_and_reflects_trend():
+    falling = {"current_price": 100.0, "history": _history([120 - 2 * i + (i % 2) for i in range(30)])}
+    rising = {"current_price": 100.0, "history": _history([80 + 2 * i + (i % 2) for i in range(30)])}
+
+    a = simulate_batch([falling, rising], n_paths=4000, horizon=7, seed=7)
+    b = simulate_batch([falling, rising], n_paths=4000, horizon=7, seed=7)
+
+    assert a == b
+    assert a[0]["probability_drop"] > a[1]["probability_drop"]
+    lo, hi = a[0]["probability_drop_ci"]
+    assert lo <= a[0]["probability_drop"] <= hi
+    assert a[0]["expected_drop"] > 0
+
+
+def test_seeded_draws_are_per_product_and_batch_independent():
+    history = _history([100 + (i % 3) for i in range(20)])
+    a = {"product_id": "p1", "current_price": 100.0, "history": history}
+    b = {**a, "product_id": "p2"}
+
+    alone = simulate_batch([a], n_paths=500, horizon=5, seed=3)[0]
+    both = simulate_batch([b, a], n_paths=500, horizon=5, seed=3)
+    assert both[1] == alone
+    assert both[0]["expected_drop"] != alone["expected_drop"]
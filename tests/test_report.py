@@ -0,0 +1,49 @@
+import json
+
+import numpy as np
+import pytest
+
+from real_time_shopping_assistant.evaluation.report import Timeline, aggregate, build_report
+from real_time_shopping_assistant.infra.metrics_store import ROW, MetricsStore
+
+
+def _rows(n, t0, latency):
+    rows = np.zeros(n, dtype=ROW)
+    rows["ts"] = t0 + np.arange(n)
+    rows["loop_time"] = latency
+    rows["buy_score"] = np.linspace(0, 1, n)
+    rows["decision"] = np.arange(n) % 3
+    for name in ROW.names[4:]:
+        rows[name] = np.nan
+    rows["stage_price"] = latency / 2
+    return rows
+
+
+def test_report_aggregates_chunks_in_bounded_state(tmp_path):
+    store = MetricsStore(str(tmp_path / "a"), chunk_rows=1000)
+    for k in range(5):
+        store.append(_rows(1000, 1_700_000_000 + 1000 * k, np.full(1000, 0.004 * (k + 1), dtype=np.float32)))
+    summary = aggregate([store.path], batch_rows=300)
+    report = summary.to_dict()
+
+    assert report["rows"] == 5000
+    assert report["decisions"] == {"NOT_BUY": 1670, "DEFER": 1665, "BUY": 1665}
+    assert report["latency_s"]["p50"] == pytest.approx(0.012, rel=0.03)
+    assert report["latency_s"]["p99"] == pytest.approx(0.020, rel=0.03)
+    assert report["stages"]["price"]["p50"] == pytest.approx(0.006, rel=0.03)
+    assert "review" not in report["stages"]
+    # 5000 one-second buckets would exceed the cap; the timeline coarsens instead
+    assert len(summary.timeline.events) <= summary.timeline.max_buckets
+    assert sum(r["events"] for r in report["timeline"]) == 5000
+
+    out = build_report([store.path], out_prefix=str(tmp_path / "r"), charts=False)
+    assert json.loads((tmp_path / "r.json").read_text())["rows"] == 5000
+    assert "| price |" in (tmp_path / "r.md").read_text()
+    assert out["charts"] == []
+
+
+def test_timeline_grows_left_for_earlier_chunks():
+    timeline = Timeline(width=1.0, max_buckets=8)
+    timeline.add(np.array([10.0, 11.0]), np.array([0.1, 0.1]))
+    timeline.add(np.array([2.0]), np.array([0.3]))
+    assert timeline.origin <= 2.0 and timeline.events.sum() == 3
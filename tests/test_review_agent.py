@@ -0,0 +1,74 @@
+"""Unit tests for the compiled sentiment scorer."""
+from real_time_shopping_assistant.agents.review_agent import SentimentScorer, lexicon_sentiment_score
+
+
+def test_matches_lexicon_semantics_and_handles_negation():
+    scorer = SentimentScorer()
+    assert scorer.score_text("Great value for price. Highly recommend.") == 0.7
+    assert scorer.score_text("Stopped working after a week, disappointed.") == 0.2
+    assert scorer.score_text("Not a problem, recommended") == 0.75
+    assert lexicon_sentiment_score([]) == 0.5
+
+
+def test_weighted_terms_cache_and_batch():
+    scorer = SentimentScorer({"superb": 0.4, "broken": -0.4})
+    reviews = [{"review_id": "a", "text": "Superb!"}, {"review_id": "b", "text": "arrived broken"}]
+
+    assert scorer.score(reviews) == 0.5
+    assert scorer.cache_misses == 2
+    # Same ids are never re-scored, even if the text were to differ
+    assert scorer.score([{"review_id": "a", "text": "broken"}]) == 0.9
+    assert scorer.cache_hits == 1
+
+    batch = scorer.score_batch({"p1": reviews[:1], "p2": reviews[1:], "p3": []})
+    assert batch == {"p1": 0.9, "p2": 0.1, "p3": 0.5}
+
+
+def test_sentiment_aggregates_fold_incrementally_and_snapshot(tmp_path):
+    from real_time_shopping_assistant.memory.sentiment_aggregates import SentimentAggregates
+
+    scored = []
+
+    def score(review):
+        scored.append(review["review_id"])
+        return review["s"]
+
+    agg = SentimentAggregates(half_life=0)
+    first = [{"review_id": "a", "timestamp": 1, "s": 1.0}, {"review_id": "b", "timestamp": 2, "s": 0.0}]
+    assert agg.fold("p", first, score) == 0.5
+    assert agg.fold("p", first + [{"review_id": "c", "timestamp": 2, "s": 1.0}], score) == 0.667
+    assert scored == ["a", "b", "c"]
+
+    path = str(tmp_path / "agg.npz")
+    agg.snapshot(path)
+    restored = SentimentAggregates.load(path)
+    assert restored.score("p") == 0.667 and restored.count("p") == 3
+    assert restored.fold("p", first, score) == 0.667
+    assert scored == ["a", "b", "c"]
+
+    decayed = SentimentAggregates(half_life=1.0)
+    decayed.fold("q", [{"review_id": "old", "timestamp": 0, "s": 0.0}, {"review_id": "new", "timestamp": 1, "s": 1.0}], score)
+    assert decayed.score("q") == 0.667
+
+
+def test_sentiment_aggregates_bound_tied_timestamps(tmp_path):
+    from real_time_shopping_assistant.memory.sentiment_aggregates import MAX_BOUNDARY_IDS, SentimentAggregates
+
+    agg = SentimentAggregates()
+    # Sources without timestamps report 0.0 for every review: all of them tie
+    tied = [{"review_id": f"r{i}", "timestamp": 0.0} for i in range(MAX_BOUNDARY_IDS * 3)]
+    agg.fold("p", tied[:10], lambda r: 1.0)
+    agg.fold("p", tied, lambda r: 1.0)
+    assert agg.count("p") == MAX_BOUNDARY_IDS and len(agg._boundary_ids["p"]) == MAX_BOUNDARY_IDS
+    agg.fold("p", tied, lambda r: 1.0)
+    assert agg.count("p") == MAX_BOUNDARY_IDS
+
+    path = str(tmp_path / "agg.npz")
+    agg.snapshot(path)
+    restored = SentimentAggregates.load(path)
+    restored.fold("p", tied, lambda r: 1.0)
+    assert restored.count("p") == MAX_BOUNDARY_IDS
+    # A newer review resets the boundary to just itself
+    restored.fold("p", [{"review_id": "new", "timestamp": 5.0}], lambda r: 0.0)
+    assert len(restored._boundary_ids["p"]) == 1
+
@@ -0,0 +1,41 @@
+"""Unit tests for per-user session memory."""
+from real_time_shopping_assistant.memory.short_term_memory import SessionMemory
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_histories_are_per_user_and_bounded():
+    memory = SessionMemory(k=3, max_sessions=10, idle_ttl=0, max_entries=100)
+    for i in range(5):
+        memory.save_context("u1", {"i": i}, {"out": i})
+    memory.save_context("u2", {"i": 99}, {"out": 99})
+
+    history = memory.load_memory_variables("u1")["session_history"]
+    assert [turn["input"]["i"] for turn in history] == [2, 3, 4]
+    assert memory.load_memory_variables("u2")["session_history"][0]["output"] == {"out": 99}
+    assert memory.stats() == {"sessions": 2, "entries": 4, "evictions": {"ttl": 0, "lru": 0, "cap": 0}}
+
+
+def test_lru_ttl_and_entry_cap_eviction():
+    clock = FakeClock()
+    memory = SessionMemory(k=2, max_sessions=3, idle_ttl=60, max_entries=4, clock=clock)
+    for user in ("a", "b", "c"):
+        memory.save_context(user, {}, {})
+    memory.save_context("a", {}, {})  # a becomes most recent
+    memory.save_context("d", {}, {})  # evicts b (least recently used)
+    assert memory.load_memory_variables("b")["session_history"] == []
+    assert memory.evictions["lru"] == 1
+
+    memory.save_context("d", {}, {})  # 5 entries > cap of 4: evicts c
+    assert len(memory) == 2 and memory.entries == 4 and memory.evictions["cap"] == 1
+
+    clock.now = 61
+    assert memory.load_memory_variables("a")["session_history"] == []
+    memory.save_context("e", {}, {})
+    assert len(memory) == 1 and memory.entries == 1 and memory.evictions["ttl"] == 2
@@ -0,0 +1,10 @@
+from real_time_shopping_assistant.evaluation.bench_startup import IMPORT_BUDGET_S, measure_import
+
+
+def test_orchestrator_import_is_lazy_and_within_budget():
+    report = measure_import(runs=3)
+    # Heavy optional dependencies and disk-backed singletons wait for first use
+    assert report["heavy_modules_loaded"] == []
+    assert report["files_created"] == []
+    assert report["threads_started"] == 0
+    assert report["median_s"] <= IMPORT_BUDGET_S, report
@@ -1,6 +1,7 @@
 """Unit tests for the synthetic simulation and scoring functions."""
 import asyncio
-from real_time_shopping_assistant.agents.fusion_agent import fusion_decision
+import numpy as np
+from real_time_shopping_assistant.agents.fusion_agent import fusion_decision, compute_buy_score, score_batch, DECISIONS
 from real_time_shopping_assistant.agents.user_finance_agent import affordability_score
 
 
@@ -16,7 +17,25 @@ def test_fusion_high_buy():
     assert out["decision"] == "BUY"
 
 
+def test_fusion_batch_matches_single_path():
+    rows = [
+        {"affordability_score": 0.9, "price_attractiveness": 0.9, "sentiment_score": 0.9, "availability_score": 1.0, "preference_score": 0.8},
+        {"affordability_score": 0.4, "price_attractiveness": 0.5, "availability_score": 0.6},
+        {"affordability_score": 0.05, "price_attractiveness": 0.1, "sentiment_score": 0.2, "availability_score": 0.0, "preference_score": 0.1},
+    ]
+    scores, codes = score_batch(rows)
+    for row, score, code in zip(rows, scores, codes):
+        single = fusion_decision(row)
+        assert single["buy_score"] == score
+        assert single["decision"] == DECISIONS[code]
+    assert list(DECISIONS[codes]) == ["BUY", "DEFER", "NOT_BUY"]
+
+    matrix_scores, _ = score_batch(np.array([[0.9, 0.9, 0.9, 1.0, 0.8]]))
+    assert matrix_scores[0] == compute_buy_score(rows[0])
+
+
 if __name__ == "__main__":
     test_affordability_easy()
     test_fusion_high_buy()
+    test_fusion_batch_matches_single_path()
     print("Tests passed")
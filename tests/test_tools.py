@@ -0,0 +1,418 @@
+"""Unit tests for the tool layer: per-event fetch context and shared helpers."""
+import asyncio
+from real_time_shopping_assistant.tools.cache import TTLCache
+from real_time_shopping_assistant.tools.fetch_context import FetchContext
+
+
+class CountingTool:
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def _arun(self, arg):
+        self.calls += 1
+        await asyncio.sleep(0.001)
+        return {"arg": arg, "n": self.calls}
+
+
+class FakeProfiles:
+    name = "get_user_profile"
+
+    def __init__(self):
+        self.batches = []
+
+    async def _arun(self, user_id):
+        return (await self._arun_batch([user_id]))[0]
+
+    async def _arun_batch(self, user_ids):
+        self.batches.append(list(user_ids))
+        return [f"profile:{u}:{len(self.batches)}" for u in user_ids]
+
+
+def test_fetch_context_memoizes_per_arguments():
+    tool = CountingTool()
+    ctx = FetchContext()
+
+    async def scenario():
+        a, b = await asyncio.gather(ctx.call(tool, "p1"), ctx.call(tool, "p1"))
+        c = await ctx.call(tool, {"seller": "A", "product_id": "p1"})
+        d = await ctx.call(tool, {"product_id": "p1", "seller": "A"})
+        return a, b, c, d
+
+    a, b, c, d = asyncio.run(scenario())
+    assert a is b
+    assert c is d
+    assert tool.calls == 2
+    assert ctx.stats() == {"upstream_calls": 2, "calls_saved": 2}
+
+
+def test_ttl_cache_lru_and_stale_while_revalidate():
+    now = [0.0]
+    cache = TTLCache("t", ttl=10, max_size=2, stale_ttl=5, clock=lambda: now[0])
+    fetched = []
+
+    def fetcher(key):
+        async def fetch():
+            fetched.append(key)
+            return f"{key}@{now[0]}"
+        return fetch
+
+    async def scenario():
+        assert await cache.get_or_fetch("a", fetcher("a")) == "a@0.0"
+        assert await cache.get_or_fetch("a", fetcher("a")) == "a@0.0"
+        now[0] = 12.0
+        # stale: served immediately, refreshed in the background
+        assert await cache.get_or_fetch("a", fetcher("a")) == "a@0.0"
+        await asyncio.sleep(0)
+        assert await cache.get_or_fetch("a", fetcher("a")) == "a@12.0"
+        await cache.get_or_fetch("b", fetcher("b"))
+        await cache.get_or_fetch("c", fetcher("c"))
+
+    asyncio.run(scenario())
+    stats = cache.stats()
+    assert fetched == ["a", "a", "b", "c"]
+    assert (stats["hits"], stats["stale_hits"], stats["misses"]) == (2, 1, 3)
+    assert stats["evictions"] == 1 and stats["size"] == 2
+
+
+def test_stock_batch_splits_per_seller_and_coalesces():
+    from real_time_shopping_assistant.tools.price_tool import (
+        check_stock_tool, StockCheckBatcher, stock_check_stats,
+    )
+    pairs = [("RetailerA", "p1"), {"seller": "RetailerB", "product_id": "p1"}, ("RetailerA", "p2")]
+    before = stock_check_stats()["upstream_calls"]
+    rows = asyncio.run(check_stock_tool._arun(pairs))
+    assert [(r["seller"], r["product_id"]) for r in rows] == [("RetailerA", "p1"), ("RetailerB", "p1"), ("RetailerA", "p2")]
+    assert stock_check_stats()["upstream_calls"] - before == 2
+
+    batcher = StockCheckBatcher(check_stock_tool, window=0.001)
+
+    async def burst():
+        return await asyncio.gather(*[
+            batcher._arun([("RetailerA", f"p{i}"), ("RetailerB", f"p{i}")]) for i in range(10)
+        ])
+
+    before = stock_check_stats()["upstream_calls"]
+    results = asyncio.run(burst())
+    assert len(results) == 10 and all(len(r) == 2 for r in results)
+    assert batcher.flushes == 1
+    assert stock_check_stats()["upstream_calls"] - before == 2
+
+
+def test_micro_batcher_fails_every_caller_on_short_results():
+    from real_time_shopping_assistant.tools.batching import MicroBatcher
+
+    class ShortBatch:
+        name = "short"
+
+        async def _arun_batch(self, items):
+            return items[:-1]
+
+    batcher = MicroBatcher(ShortBatch(), window=0.001)
+
+    async def burst():
+        return await asyncio.wait_for(asyncio.gather(batcher._arun([1, 2]), batcher._arun([3]),
+                                                     return_exceptions=True), 1.0)
+
+    results = asyncio.run(burst())
+    # wait_for would raise TimeoutError if any caller were left hanging
+    assert len(results) == 2 and all(isinstance(r, ValueError) for r in results)
+
+
+def test_user_state_cache_invalidates_by_event_type_and_multi_gets():
+    from real_time_shopping_assistant.tools.user_state_cache import UserStateCache
+
+    profiles, carts = FakeProfiles(), CountingTool()
+    cache = UserStateCache(profiles, carts, profile_ttl=60, cart_ttl=60, window=0.001)
+
+    async def scenario():
+        warm = await cache.get_profiles(["u1", "u2", "u1", "u3"])
+        assert profiles.batches == [["u1", "u2", "u3"]] and warm["u2"] == "profile:u2:1"
+        # Concurrent misses coalesce into one batch call
+        await asyncio.gather(*[cache.get_profile(u) for u in ("u4", "u5", "u1")])
+        assert profiles.batches[1:] == [["u4", "u5"]]
+
+        await cache.get_cart("u1")
+        assert cache.on_event({"type": "cart_add", "user_id": "u1"}) == ("cart",)
+        await cache.get_cart("u1")
+        assert carts.calls == 2 and await cache.get_profile("u1") == "profile:u1:1"
+
+        cache.on_event({"type": "checkout", "user_id": "u1"})
+        assert await cache.get_profile("u1") == "profile:u1:3"
+
+        # An invalidation that lands while a multi-get is in flight is not overwritten
+        pending = asyncio.ensure_future(cache.get_profiles(["u6"]))
+        await asyncio.sleep(0)
+        cache.on_event({"type": "profile_update", "user_id": "u6"})
+        await pending
+        assert cache.profiles.lookup("u6")[1] is False
+
+    asyncio.run(scenario())
+
+
+def test_batches_fetch_each_profile_once(tmp_path):
+    from real_time_shopping_assistant.evaluation.benchmarks import isolated_state
+    from real_time_shopping_assistant.evaluation.standins import install_standins
+    from real_time_shopping_assistant.tools.user_state_cache import UserStateCache
+
+    profiles = FakeProfiles()
+    events = [{"event_id": f"e{i}", "type": kind, "user_id": user, "product_id": "p1", "price": 20.0}
+              for i, (kind, user) in enumerate([("cart_add", "u1"), ("purchase", "u1"), ("checkout", "u2"),
+                                                ("profile_update", "u3"), ("wishlist_add", "u2")])]
+
+    async def scenario(orchestrator):
+        orchestrator.user_state = UserStateCache(profiles, CountingTool(), profile_ttl=60, cart_ttl=60, window=0.001)
+        await orchestrator.run_loop(list(events))
+        # Only u1 is prefetched: u2 and u3 open with events that drop the profile anyway
+        assert profiles.batches[0] == ["u1"]
+        fetched = sorted(u for batch in profiles.batches for u in batch)
+        profiles.batches.clear()
+        orchestrator.user_state = UserStateCache(profiles, CountingTool(), profile_ttl=60, cart_ttl=60, window=0.001)
+        assert len(await orchestrator.ingest_batch(events)) == 5
+        assert profiles.batches[0] == ["u1"]
+        assert sorted(u for batch in profiles.batches for u in batch) == fetched
+
+    with install_standins(seed=1), isolated_state(str(tmp_path)) as orchestrator:
+        asyncio.run(scenario(orchestrator))
+
+
+def test_batches_invalidate_per_event_in_order(tmp_path):
+    from real_time_shopping_assistant.evaluation.benchmarks import isolated_state
+    from real_time_shopping_assistant.evaluation.standins import install_standins
+    from real_time_shopping_assistant.tools.user_state_cache import UserStateCache
+
+    events = [{"event_id": f"e{i}", "type": kind, "user_id": "u1", "product_id": "p1", "price": 20.0}
+              for i, kind in enumerate(["wishlist_add", "cart_add"])]
+
+    async def scenario(orchestrator, run):
+        carts = CountingTool()
+        orchestrator.user_state = UserStateCache(FakeProfiles(), carts, profile_ttl=60, cart_ttl=60, window=0.001)
+        await run(list(events))
+        return carts.calls
+
+    with install_standins(seed=1), isolated_state(str(tmp_path)) as orchestrator:
+        # The cart read by wishlist_add is dropped by cart_add and fetched again for it
+        assert asyncio.run(scenario(orchestrator, orchestrator.ingest_batch)) == 2
+        assert asyncio.run(scenario(orchestrator, orchestrator.run_loop)) == 2
+
+
+def test_single_flight_shares_result_error_and_survives_cancellation():
+    from real_time_shopping_assistant.tools.single_flight import SingleFlight
+
+    flight = SingleFlight("test_single_flight")
+    calls = []
+
+    async def fetch(value, fail=False):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        if fail:
+            raise RuntimeError("upstream down")
+        return {"value": value}
+
+    async def scenario():
+        results = await asyncio.gather(*[flight.do("k", lambda: fetch("a")) for _ in range(5)])
+        assert all(r is results[0] for r in results) and calls == ["a"]
+
+        errors = await asyncio.gather(*[flight.do("k", lambda: fetch("b", fail=True)) for _ in range(3)],
+                                      return_exceptions=True)
+        assert all(isinstance(e, RuntimeError) for e in errors) and calls == ["a", "b"]
+
+        first = asyncio.ensure_future(flight.do("k", lambda: fetch("c")))
+        second = asyncio.ensure_future(flight.do("k", lambda: fetch("c")))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == {"value": "c"} and first.cancelled()
+
+    asyncio.run(scenario())
+    assert flight.stats() == {"upstream": 3, "coalesced": 7, "in_flight": 0}
+
+
+def test_shared_calls_and_refreshes_run_without_the_callers_deadline():
+    from real_time_shopping_assistant.tools.cache import TTLCache
+    from real_time_shopping_assistant.tools.single_flight import SingleFlight
+    from real_time_shopping_assistant.tools.fetch_context import deadline_scope, time_left
+
+    flight = SingleFlight("test_single_flight_deadline")
+    seen = []
+
+    async def fetch():
+        seen.append(time_left())
+        await asyncio.sleep(0.05)
+        return "fresh"
+
+    async def call(budget):
+        with deadline_scope(budget):
+            return await flight.do("k", fetch)
+
+    async def scenario():
+        # The leader's short budget bounds only its own wait, not the call the others share
+        results = await asyncio.gather(call(0.01), call(None), return_exceptions=True)
+        assert isinstance(results[0], asyncio.TimeoutError) and results[1] == "fresh"
+
+        now = [0.0]
+        cache = TTLCache("test_swr_deadline", ttl=1.0, stale_ttl=10.0, clock=lambda: now[0])
+        cache.store("k", "stale")
+        now[0] = 2.0
+        with deadline_scope(0.01):
+            assert await cache.get_or_fetch("k", fetch) == "stale"
+        await asyncio.sleep(0.1)
+        assert cache.lookup("k") == ("fresh", True)
+
+    asyncio.run(scenario())
+    assert seen == [None, None]
+
+
+def test_breaker_deadline_and_degraded_fallbacks():
+    from real_time_shopping_assistant.agents.dag_scheduler import DagScheduler
+    from real_time_shopping_assistant.tools.resilience import (CircuitBreaker, ToolUnavailable, deadline_retry,
+                                                               deadline_scope, guarded)
+
+    now = [0.0]
+    breaker = CircuitBreaker("t", failure_threshold=2, reset_timeout=5.0, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN and not breaker.allow()
+    now[0] = 5.0
+    assert breaker.allow() and breaker.state == breaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == breaker.CLOSED
+
+    class Flaky:
+        name = "flaky_test"
+
+        def __init__(self):
+            self.calls = 0
+            self.fail = False
+
+        @guarded("flaky_test")
+        @deadline_retry(10, multiplier=0.05, max_wait=0.05)
+        async def _arun(self, arg):
+            self.calls += 1
+            if self.fail:
+                raise RuntimeError("upstream down")
+            return f"ok:{arg}"
+
+    async def scenario():
+        tool = Flaky()
+        assert await tool._arun("a") == "ok:a"
+        tool.fail, tool.calls = True, 0
+        with deadline_scope(0.12):
+            # Retries stop once the next backoff no longer fits; last good value is served
+            assert await tool._arun("a") == "ok:a"
+        assert 1 <= tool.calls < 10
+        with deadline_scope(0.01):
+            try:
+                await tool._arun("b")
+                raise AssertionError("expected ToolUnavailable")
+            except ToolUnavailable:
+                pass
+
+        async def hang():
+            await asyncio.sleep(1)
+
+        def boom():
+            raise RuntimeError("boom")
+
+        dag = DagScheduler()
+        dag.add("slow", hang, fallback=lambda exc: "neutral")
+        dag.add("bad", boom, fallback=lambda exc: "neutral")
+        dag.add("sum", lambda a, b: a + b, inputs=("slow", "bad"))
+        with deadline_scope(0.02):
+            results = await dag.run()
+        return results, dag.timings
+
+    results, timings = asyncio.run(scenario())
+    assert results["sum"] == "neutralneutral"
+    assert timings["slow"]["degraded"] and timings["bad"]["degraded"]
+
+
+def test_guarded_batch_serves_last_good_values_per_item():
+    from real_time_shopping_assistant.tools.resilience import ToolUnavailable, guarded
+
+    class FlakyBatch:
+        fail = False
+
+        @guarded("flaky_batch_test", batch=True)
+        async def _arun_batch(self, ids):
+            if self.fail:
+                raise RuntimeError("upstream down")
+            return [f"ok:{i}" for i in ids]
+
+    async def scenario():
+        tool = FlakyBatch()
+        await tool._arun_batch(["a", "b"])
+        await tool._arun_batch(["c"])
+        tool.fail = True
+        # Items seen in different batches still combine into a degraded answer
+        assert await tool._arun_batch(["c", "a"]) == ["ok:c", "ok:a"]
+        try:
+            await tool._arun_batch(["a", "z"])
+            raise AssertionError("expected ToolUnavailable")
+        except ToolUnavailable:
+            pass
+
+    asyncio.run(scenario())
+
+
+def test_records_read_like_dicts_and_serialize_only_at_the_edge():
+    import json
+    import pickle
+    from real_time_shopping_assistant.infra.logging_setup import RecordEncoder
+    from real_time_shopping_assistant.tools.records import PriceListing, Profile, to_plain
+
+    listing = PriceListing("A", 10.0, "USD", 1.5, 0.0)
+    assert not hasattr(listing, "__dict__")
+    assert listing["price"] == listing.get("price") == 10.0 and listing.get("to_dict") is None
+    assert pickle.loads(pickle.dumps(listing)) == listing
+    profile = Profile("u1", 800.0, 250.0, "gold", {"brands": ["B"]})
+    payload = {"evidence": {"listings": [listing], "profile": profile}}
+    plain = to_plain(payload)
+    assert plain["evidence"]["listings"][0] == {"seller": "A", "price": 10.0, "currency": "USD",
+                                                "shipping": 1.5, "timestamp": 0.0}
+    assert json.loads(json.dumps(payload, cls=RecordEncoder)) == plain
+
+
+def test_agents_accept_plain_dict_tool_outputs(monkeypatch):
+    from real_time_shopping_assistant.agents import alternative_agent, price_agent
+
+    class DictTool:
+        def __init__(self, name, value):
+            self.name = name
+            self.value = value
+
+        async def _arun(self, arg):
+            return self.value
+
+    listings = [{"seller": "A", "price": 30.0}, {"seller": "B", "price": 20.0}]
+    for module in (price_agent, alternative_agent):
+        monkeypatch.setattr(module, "price_search_tool", DictTool("price_search", listings))
+    monkeypatch.setattr(price_agent, "price_history_tool", DictTool("get_price_history", []))
+    monkeypatch.setattr(price_agent, "coupons_tool", DictTool("get_coupons", [{"discount_pct": 10.0}]))
+    monkeypatch.setattr(price_agent, "code_exec_tool", DictTool("execute_price_simulation", {"probability_drop": 0.0}))
+    monkeypatch.setattr(alternative_agent, "stock_check_batcher", DictTool(
+        "check_stock", [{"seller": "B", "availability": "in_stock"}, {"seller": "A", "availability": "limited"}]))
+
+    price = asyncio.run(price_agent.run_price_agent("p1"))
+    alt = asyncio.run(alternative_agent.run_alternative_agent("p1"))
+    assert price["current_price"] == 20.0 and price["price_attractiveness"] > 0
+    assert alt["alternative"] == listings[0] and alt["availability_score"] == 0.8
+
+    # No listings (e.g. price_search degraded): price 0.0 scores as fully attractive, as before
+    monkeypatch.setattr(price_agent, "price_search_tool", DictTool("price_search", []))
+    empty = asyncio.run(price_agent.run_price_agent("p1"))
+    assert empty["current_price"] == 0.0 and empty["price_attractiveness"] == 1.0
+
+
+def test_profile_multi_get_is_counted_in_the_registry(tmp_path):
+    from real_time_shopping_assistant.evaluation.benchmarks import isolated_state
+    from real_time_shopping_assistant.infra.metrics import registry
+    from real_time_shopping_assistant.tools.profile_tool import profile_stats, tool
+
+    with isolated_state(str(tmp_path)):
+        profiles = asyncio.run(tool._arun_batch(["u1", "u2", "u3"]))
+        assert [p["user_id"] for p in profiles] == ["u1", "u2", "u3"]
+        assert profile_stats() == {"upstream_calls": 1, "profiles": 3}
+        assert registry.export()["wizecart_profiles_fetched_total"][2] == {(): 3.0}
@@ -0,0 +1,37 @@
+import json
+from collections import Counter
+
+from real_time_shopping_assistant.evaluation.workload import WorkloadSpec, iter_events, write_events
+
+
+def test_workload_is_seeded_and_time_ordered():
+    spec = WorkloadSpec(seed=4, users=50, products=500)
+    events = list(iter_events(5000, spec))
+    assert events == list(iter_events(5000, WorkloadSpec(seed=4, users=50, products=500)))
+    assert events != list(iter_events(5000, WorkloadSpec(seed=5, users=50, products=500)))
+    stamps = [e["timestamp"] for e in events]
+    assert stamps == sorted(stamps) and len(events) == 5000
+
+
+def test_workload_skew_storms_and_mix():
+    spec = WorkloadSpec(seed=1, products=1000, rate=100, storm_every=20, storm_duration=5, storm_rate=400,
+                        mix={"cart_add": 3, "wishlist_add": 1})
+    events = list(iter_events(20000, spec))
+    types = Counter(e["type"] for e in events)
+    # Storms are the only source of price alerts here, and each one targets a single product
+    assert set(types) == {"cart_add", "wishlist_add", "price_alert"}
+    assert 2.5 < types["cart_add"] / types["wishlist_add"] < 3.5
+    alerts = Counter(e["product_id"] for e in events if e["type"] == "price_alert")
+    assert alerts.most_common(1)[0][1] > 1000
+    # Zipf popularity: the top product is far above its uniform share (20 of 20000)
+    products = Counter(e["product_id"] for e in events if e["type"] != "price_alert")
+    assert products["prod_0"] > 20 * 20
+
+
+def test_write_events_streams_jsonl(tmp_path):
+    path = tmp_path / "events.jsonl"
+    spec = WorkloadSpec(seed=2)
+    assert write_events(str(path), 70000, spec) == 70000
+    lines = path.read_text().splitlines()
+    assert len(lines) == 70000
+    assert [json.loads(line) for line in lines[:100]] == list(iter_events(100, spec))
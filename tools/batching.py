@@ -0,0 +1,56 @@
+"""Micro-batching for tools that expose a batch endpoint.
+
+`MicroBatcher` collects the items that concurrent callers submit within `window`
+seconds and resolves all of them with one `tool._arun_batch(items)` call. Each caller
+gets back the results for its own items, in order. A batch call that fails, is
+cancelled or returns the wrong number of results fails every caller in it.
+"""
+import asyncio
+from typing import Any, List
+
+from real_time_shopping_assistant.infra.tracing import span
+
+
+class MicroBatcher:
+    def __init__(self, tool, window: float = 0.002, name: str | None = None):
+        self.tool = tool
+        self.window = window
+        self.name = name or f"{tool.name}_batch"
+        self._pending: List[tuple] = []
+        self._flush_task: asyncio.Task | None = None
+        self.flushes = 0
+
+    async def _arun(self, items: list) -> List[Any]:
+        with span(f"tool.{self.name}"):
+            loop = asyncio.get_running_loop()
+            futures = []
+            for item in items:
+                fut = loop.create_future()
+                self._pending.append((item, fut))
+                futures.append(fut)
+            if self._flush_task is None:
+                self._flush_task = loop.create_task(self._flush_later())
+            return list(await asyncio.gather(*futures))
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        pending, self._pending = self._pending, []
+        self._flush_task = None
+        self.flushes += 1
+        try:
+            results = await self.tool._arun_batch([item for item, _ in pending])
+            if len(results) != len(pending):
+                raise ValueError(f"{self.name}: {len(results)} results for {len(pending)} items")
+        except asyncio.CancelledError:
+            # Never leave a caller waiting on a future nobody will resolve
+            for _, fut in pending:
+                fut.cancel()
+            raise
+        except Exception as exc:
+            for _, fut in pending:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for (_, fut), result in zip(pending, results):
+            if not fut.done():
+                fut.set_result(result)
@@ -0,0 +1,197 @@
+"""Shared product-level cache for upstream tools.
+
+Each tool gets its own bounded LRU cache with a TTL. Entries past their TTL but
+still inside the stale window are served immediately while a single background
+refresh fetches a new value (stale-while-revalidate); the refresh outlives the
+request that triggered it, so it runs without that request's deadline. Hit/miss/eviction counters
+are kept per cache and exposed through `cache_stats()`.
+"""
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+from real_time_shopping_assistant.config.settings import settings
+from real_time_shopping_assistant.tools.fetch_context import freeze_args, without_deadline
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, name: str, ttl: float, max_size: int = 10000, stale_ttl: float = 0.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        # key -> (value, stored_at)
+        self._data: "OrderedDict[Any, Tuple[Any, float]]" = OrderedDict()
+        self._refreshing: set = set()
+        self._tasks: set = set()
+        # In-flight fetch counts per key, and keys invalidated while a fetch was running
+        self._fetching: Dict[Any, int] = {}
+        self._invalidated: set = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.invalidations = 0
+
+    def lookup(self, key: Any) -> Tuple[Any, bool]:
+        """Return (value, fresh); value is _MISSING when absent or too old to serve."""
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING, False
+        value, stored_at = entry
+        age = self.clock() - stored_at
+        if age <= self.ttl:
+            self._data.move_to_end(key)
+            return value, True
+        if age <= self.ttl + self.stale_ttl:
+            self._data.move_to_end(key)
+            return value, False
+        del self._data[key]
+        return _MISSING, False
+
+    def store(self, key: Any, value: Any):
+        self._data[key] = (value, self.clock())
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Any):
+        """Drop `key`; a fetch already in flight for it will not be stored either."""
+        self._data.pop(key, None)
+        self.invalidations += 1
+        if key in self._fetching:
+            self._invalidated.add(key)
+
+    def clear(self):
+        self._data.clear()
+
+    def begin_fetch(self, key: Any):
+        """Mark an upstream fetch for `key` as in flight (pair with `end_fetch`)."""
+        self._fetching[key] = self._fetching.get(key, 0) + 1
+
+    def end_fetch(self, key: Any, value: Any = _MISSING):
+        """Finish a fetch; `value` is stored unless `key` was invalidated meanwhile (_MISSING = failed)."""
+        remaining = self._fetching[key] - 1
+        if remaining:
+            self._fetching[key] = remaining
+        else:
+            del self._fetching[key]
+        if key in self._invalidated:
+            if key not in self._fetching:
+                self._invalidated.discard(key)
+        elif value is not _MISSING:
+            self.store(key, value)
+
+    async def _fetch_and_store(self, key: Any, fetch: Callable[[], Any]) -> Any:
+        self.begin_fetch(key)
+        value = _MISSING
+        try:
+            value = await fetch()
+        finally:
+            self.end_fetch(key, value)
+        return value
+
+    async def get_or_fetch(self, key: Any, fetch: Callable[[], Any]) -> Any:
+        value, fresh = self.lookup(key)
+        if value is not _MISSING:
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._schedule_refresh(key, fetch)
+            return value
+        self.misses += 1
+        return await self._fetch_and_store(key, fetch)
+
+    def _schedule_refresh(self, key: Any, fetch: Callable[[], Any]):
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def _refresh():
+            try:
+                await self._fetch_and_store(key, fetch)
+                self.refreshes += 1
+            except Exception:
+                # Keep serving the stale entry; the next lookup will retry
+                pass
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.ensure_future(without_deadline(_refresh))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "refreshes": self.refreshes,
+            "invalidations": self.invalidations,
+        }
+
+
+# Per-tool TTLs: listings move quickly, history and reviews can live much longer
+TOOL_CACHE_TTLS = {
+    "price_search": settings.CACHE_TTL_PRICE_SEARCH,
+    "get_price_history": settings.CACHE_TTL_PRICE_HISTORY,
+    "get_reviews": settings.CACHE_TTL_REVIEWS,
+    "get_coupons": settings.CACHE_TTL_COUPONS,
+}
+
+_caches: Dict[str, TTLCache] = {}
+_clock: Callable[[], float] = time.monotonic
+
+
+def get_cache(name: str) -> TTLCache:
+    cache = _caches.get(name)
+    if cache is None:
+        ttl = TOOL_CACHE_TTLS.get(name, 60.0)
+        cache = _caches[name] = TTLCache(
+            name,
+            ttl=ttl,
+            max_size=settings.CACHE_MAX_ENTRIES,
+            stale_ttl=ttl * settings.CACHE_STALE_FACTOR,
+            clock=_clock,
+        )
+    return cache
+
+
+def set_clock(clock: Callable[[], float]):
+    """Time source for every shared cache, e.g. a simulated clock during a replay."""
+    global _clock
+    _clock = clock
+    for cache in _caches.values():
+        cache.clock = clock
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+def clear_caches():
+    for cache in _caches.values():
+        cache.clear()
+
+
+def ttl_cached(name: str):
+    """Decorate a tool's `_arun(self, arg)` with the shared cache named `name`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(self, arg):
+            if not settings.CACHE_ENABLED:
+                return await fn(self, arg)
+            return await get_cache(name).get_or_fetch(freeze_args(arg), lambda: fn(self, arg))
+        return wrapper
+    return decorator
@@ -1,39 +1,31 @@
 """Tool: get_user_cart
 
-Async LangChain-style Tool that returns synthetic cart JSON or loads from a data source.
+Async LangChain-style Tool that returns a synthetic `Cart` record or loads from a data source.
 """
-from typing import Dict, Any
-from pydantic import BaseModel
 import asyncio
-import json
-import os
 
-from langchain.tools import BaseTool
-from tenacity import retry, stop_after_attempt, wait_exponential
-
-
-class CartSchema(BaseModel):
-    user_id: str
-    items: list[Dict[str, Any]]
+from real_time_shopping_assistant.infra.tracing import traced
+from real_time_shopping_assistant.tools.records import Cart, CartItem
+from real_time_shopping_assistant.tools.resilience import deadline_retry, guarded
+from real_time_shopping_assistant.utils.langchain_compat import BaseTool
 
 
 class GetUserCartTool(BaseTool):
     name: str = "get_user_cart"
-    description: str = "Returns the current user's cart as structured JSON."
+    description: str = "Returns the current user's cart as a structured record."
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.5, max=4))
-    async def _arun(self, query: str | None = None) -> str:
+    @traced("tool.get_user_cart")
+    @guarded("get_user_cart")
+    @deadline_retry(3, multiplier=0.5, max_wait=4)
+    async def _arun(self, query: str | None = None) -> Cart:
         # Simulate async fetch; in production, call DB or API
         await asyncio.sleep(0.05)
-        sample = {
-            "user_id": "user_001",
-            "items": [
-                {"product_id": "prod_1001", "name": "Wireless Headphones Model X", "price": 129.99, "qty": 1}
-            ],
-        }
-        return CartSchema(**sample).json()
-
-    def _run(self, query: str | None = None) -> str:
+        return Cart(
+            user_id="user_001",
+            items=[CartItem(product_id="prod_1001", name="Wireless Headphones Model X", price=129.99, qty=1)],
+        )
+
+    def _run(self, query: str | None = None) -> Cart:
         return asyncio.get_event_loop().run_until_complete(self._arun(query))
 
 
@@ -1,12 +1,122 @@
 """Tool: execute_price_simulation
 
 Executes local computation (Monte Carlo price drop simulation) as a code-execution tool.
-This uses a deterministic pseudo-simulation for demo and evaluation.
+Drift and volatility are fitted from the product's daily log returns, and thousands of
+paths are simulated in one NumPy array operation. Batches of products share a single
+call; heavy batches run in a process pool and small ones (e.g. one per event) in a
+worker thread, so the event loop is never blocked. With a seed, every product draws
+from its own generator seeded by (seed, product_id), so results do not depend on
+which batch a product lands in and different products get independent shocks.
 """
-from langchain.tools import BaseTool
 import asyncio
-import random
-from typing import Dict, Any
+import math
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+
+from real_time_shopping_assistant.config.settings import settings
+from real_time_shopping_assistant.infra.tracing import traced
+from real_time_shopping_assistant.utils.langchain_compat import BaseTool
+
+# Cap on floats materialised per chunk (products x paths x horizon) to bound memory
+_MAX_CHUNK_ELEMENTS = 4_000_000
+_Z95 = 1.96
+
+
+def fit_price_model(history: List[Dict[str, Any]]) -> Tuple[float, float]:
+    """Return (drift, volatility) of daily log returns, oldest point first."""
+    prices = np.array([h["price"] for h in sorted(history or [], key=lambda h: h.get("ts", 0))], dtype=np.float64)
+    prices = prices[prices > 0]
+    if prices.size < 2:
+        return 0.0, 0.02
+    returns = np.diff(np.log(prices))
+    vol = float(returns.std(ddof=1)) if returns.size > 1 else 0.02
+    return float(returns.mean()), max(vol, 1e-6)
+
+
+def _summarize(current: float, path_min: np.ndarray, terminal: np.ndarray, drop_threshold: float) -> Dict[str, Any]:
+    n = path_min.size
+    dropped = path_min <= current * (1.0 - drop_threshold)
+    p = float(dropped.mean())
+    p_half = _Z95 * math.sqrt(max(p * (1 - p), 0.0) / n)
+    drop = np.maximum(current - path_min, 0.0)
+    e_drop = float(drop.mean())
+    e_half = _Z95 * float(drop.std(ddof=1)) / math.sqrt(n) if n > 1 else 0.0
+    lo, hi = np.percentile(terminal, [5, 95])
+    return {
+        "probability_drop": round(p, 4),
+        "probability_drop_ci": [round(max(0.0, p - p_half), 4), round(min(1.0, p + p_half), 4)],
+        "expected_drop": round(e_drop, 2),
+        "expected_drop_ci": [round(max(0.0, e_drop - e_half), 2), round(e_drop + e_half, 2)],
+        "terminal_price_90ci": [round(float(lo), 2), round(float(hi), 2)],
+    }
+
+
+def payload_seed(seed: int, payload: Dict[str, Any]) -> List[int]:
+    """Seed material for one payload: (seed, product_id), or its inputs when there is no id."""
+    key = payload.get("product_id")
+    if key is None:
+        key = (payload.get("current_price"), [(h.get("ts"), h.get("price")) for h in payload.get("history") or ()])
+    return [seed, zlib.crc32(repr(key).encode("utf-8"))]
+
+
+def simulate_batch(payloads: List[Dict[str, Any]], n_paths: int | None = None, horizon: int | None = None,
+                   seed: int | None = None, drop_threshold: float | None = None) -> List[Dict[str, Any]]:
+    """Simulate price paths for many products at once.
+
+    Each payload is {"current_price": float, "history": [{"ts":..., "price":...}, ...]},
+    optionally with "product_id" (seeds that product's draws when `seed` is set).
+    """
+    n_paths = n_paths or settings.SIM_N_PATHS
+    horizon = horizon or settings.SIM_HORIZON_DAYS
+    drop_threshold = settings.SIM_DROP_THRESHOLD if drop_threshold is None else drop_threshold
+    rng = np.random.default_rng() if seed is None else None
+    if not payloads:
+        return []
+
+    current = np.array([float(p.get("current_price", 100.0) or 0.0) for p in payloads])
+    fitted = np.array([fit_price_model(p.get("history")) for p in payloads])
+    drift, vol = fitted[:, 0], fitted[:, 1]
+
+    out: List[Dict[str, Any]] = []
+    chunk = max(1, _MAX_CHUNK_ELEMENTS // (n_paths * horizon))
+    for start in range(0, len(payloads), chunk):
+        sl = slice(start, start + chunk)
+        if seed is None:
+            shocks = rng.standard_normal((len(current[sl]), n_paths, horizon))
+        else:
+            shocks = np.stack([np.random.default_rng(payload_seed(seed, p)).standard_normal((n_paths, horizon))
+                               for p in payloads[sl]])
+        log_paths = np.cumsum(drift[sl, None, None] + vol[sl, None, None] * shocks, axis=2)
+        paths = current[sl, None, None] * np.exp(log_paths)
+        path_min = paths.min(axis=2)
+        terminal = paths[:, :, -1]
+        for i in range(paths.shape[0]):
+            res = _summarize(float(current[sl][i]), path_min[i], terminal[i], drop_threshold)
+            res.update({"drift": round(float(drift[sl][i]), 6), "volatility": round(float(vol[sl][i]), 6),
+                        "n_paths": n_paths, "horizon_days": horizon})
+            out.append(res)
+    return out
+
+
+_process_pool: ProcessPoolExecutor | None = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=settings.SIM_POOL_WORKERS or os.cpu_count())
+    return _process_pool
+
+
+def shutdown_simulation_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
 
 
 class ExecutePriceSimulationTool(BaseTool):
@@ -14,12 +124,16 @@ class ExecutePriceSimulationTool(BaseTool):
     description: str = "Run a quick Monte Carlo simulation to estimate probability of price drop."
 
     async def _arun(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        # payload: {"current_price":float, "history": [...]} - simple simulation
-        await asyncio.sleep(0.02)
-        current = payload.get("current_price", 100.0)
-        prob_drop = max(0.1, min(0.9, random.gauss(0.3, 0.15)))
-        expected_drop = round(current * prob_drop * random.uniform(0.01, 0.15), 2)
-        return {"probability_drop": prob_drop, "expected_drop": expected_drop}
+        # payload: {"current_price":float, "history": [...]}
+        return (await self._arun_batch([payload]))[0]
+
+    @traced("tool.execute_price_simulation")
+    async def _arun_batch(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if len(payloads) < settings.SIM_POOL_MIN_BATCH:
+            # NumPy releases the GIL for the heavy parts, so a thread keeps the loop responsive
+            return await asyncio.to_thread(simulate_batch, payloads, None, None, settings.SIM_SEED)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_process_pool(), simulate_batch, payloads, None, None, settings.SIM_SEED)
 
     def _run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         return asyncio.get_event_loop().run_until_complete(self._arun(payload))
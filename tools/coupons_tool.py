@@ -2,32 +2,34 @@
 
 Returns applicable coupons and estimated savings.
 """
-from typing import List, Dict, Any
+from typing import List
 import asyncio
-from pydantic import BaseModel
-from tenacity import retry, stop_after_attempt, wait_exponential
-from langchain.tools import BaseTool
 import random
 
-
-class Coupon(BaseModel):
-    code: str
-    discount_pct: float
-    expires_in_days: int
+from real_time_shopping_assistant.infra.tracing import traced
+from real_time_shopping_assistant.tools.resilience import deadline_retry, guarded
+from real_time_shopping_assistant.tools.cache import ttl_cached
+from real_time_shopping_assistant.tools.records import Coupon
+from real_time_shopping_assistant.tools.single_flight import single_flight
+from real_time_shopping_assistant.utils.langchain_compat import BaseTool
 
 
 class CouponsTool(BaseTool):
     name: str = "get_coupons"
     description: str = "Return coupons applicable to a product."
 
-    @retry(stop=stop_after_attempt(2), wait=wait_exponential(multiplier=0.2, max=1))
-    async def _arun(self, product_id: str) -> List[Dict[str, Any]]:
+    @traced("tool.get_coupons")
+    @ttl_cached("get_coupons")
+    @single_flight("get_coupons")
+    @guarded("get_coupons")
+    @deadline_retry(2, multiplier=0.2, max_wait=1)
+    async def _arun(self, product_id: str) -> List[Coupon]:
         await asyncio.sleep(0.02)
         coupons = []
         if random.random() > 0.6:
-            coupons.append(Coupon(code="SAVE10", discount_pct=10.0, expires_in_days=7).dict())
+            coupons.append(Coupon(code="SAVE10", discount_pct=10.0, expires_in_days=7))
         if random.random() > 0.85:
-            coupons.append(Coupon(code="FREESHIP", discount_pct=0.0, expires_in_days=2).dict())
+            coupons.append(Coupon(code="FREESHIP", discount_pct=0.0, expires_in_days=2))
         return coupons
 
     def _run(self, product_id: str):
@@ -0,0 +1,86 @@
+"""Request-scoped fetch context.
+
+One `FetchContext` is created per ingested event and passed to every agent. Tool
+results are memoized by (tool name, arguments) for the life of the event, so each
+upstream lookup happens once and all agents see the same snapshot. Concurrent
+callers share the in-flight task rather than issuing a second request. The context
+also collects the event's per-node DAG timings and the tools that were degraded.
+The event's deadline lives in a context variable (`deadline_scope`/`time_left`);
+work shared across events or outliving one runs `without_deadline`.
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List
+
+_deadline: ContextVar[float | None] = ContextVar("wizecart_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(budget: float | None):
+    """Give the enclosed work `budget` seconds; None or <= 0 means no deadline."""
+    token = _deadline.set(time.monotonic() + budget if budget and budget > 0 else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left() -> float | None:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+async def without_deadline(fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """Await `fetch()` with no event deadline (tasks copy the context they start in)."""
+    with deadline_scope(None):
+        return await fetch()
+
+
+def freeze_args(value: Any) -> Any:
+    # Turn dict/list payloads into hashable keys
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze_args(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_args(v) for v in value)
+    return value
+
+
+class FetchContext:
+    def __init__(self):
+        self._results: Dict[Any, asyncio.Future] = {}
+        self.calls = 0
+        self.saved = 0
+        self.started = time.perf_counter()
+        self.timings: Dict[str, Dict[str, Any]] = {}
+        self.degraded: List[str] = []
+
+    async def call(self, tool, arg: Any) -> Any:
+        key = (tool.name, freeze_args(arg))
+        fut = self._results.get(key)
+        if fut is None:
+            self.calls += 1
+            fut = self._results[key] = asyncio.ensure_future(tool._arun(arg))
+        else:
+            self.saved += 1
+        return await fut
+
+    async def call_or(self, tool, arg: Any, default: Any) -> Any:
+        """Like `call`, but returns `default` (and records the tool as degraded) on failure.
+
+        The wait is bounded by the event deadline; the shared call itself is not cancelled.
+        """
+        left = time_left()
+        try:
+            call = asyncio.shield(asyncio.ensure_future(self.call(tool, arg)))
+            return await (call if left is None else asyncio.wait_for(call, max(left, 0.0)))
+        except Exception:
+            self.degraded.append(tool.name)
+            return default
+
+    def stats(self) -> Dict[str, Any]:
+        out = {"upstream_calls": self.calls, "calls_saved": self.saved}
+        if self.degraded:
+            out["degraded"] = sorted(set(self.degraded))
+        return out
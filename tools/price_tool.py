@@ -1,45 +1,49 @@
 """Tool: price_search, get_price_history, check_stock
 
-These tools return synthetic price listings, history, and stock checks. They are async
-and include retry/backoff logic for robustness.
+These tools return synthetic price listings, history, and stock checks as typed records.
+They are async and include retry/backoff logic for robustness.
 """
 from typing import Any, Dict, List
 import asyncio
-from pydantic import BaseModel
-from tenacity import retry, stop_after_attempt, wait_exponential
-from langchain.tools import BaseTool
 import random
 import time
 
-
-class PriceListing(BaseModel):
-    seller: str
-    price: float
-    currency: str
-    shipping: float
-    timestamp: float
+from real_time_shopping_assistant.config.settings import settings
+from real_time_shopping_assistant.infra.metrics import registry
+from real_time_shopping_assistant.infra.tracing import traced
+from real_time_shopping_assistant.tools.resilience import deadline_retry, guarded
+from real_time_shopping_assistant.tools.batching import MicroBatcher
+from real_time_shopping_assistant.tools.cache import ttl_cached
+from real_time_shopping_assistant.tools.records import PriceListing, PricePoint, StockCheck
+from real_time_shopping_assistant.tools.single_flight import single_flight
+from real_time_shopping_assistant.utils.langchain_compat import BaseTool
 
 
 class PriceSearchTool(BaseTool):
     name: str = "price_search"
-    description: str = "Search prices for a product across retailers. Returns JSON list of listings."
-
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.2, max=1))
-    async def _arun(self, product_id_or_query: str) -> str:
+    description: str = "Search prices for a product across retailers. Returns a list of listings."
+
+    @traced("tool.price_search")
+    @ttl_cached("price_search")
+    @single_flight("price_search")
+    @guarded("price_search")
+    @deadline_retry(3, multiplier=0.2, max_wait=1)
+    async def _arun(self, product_id_or_query: str) -> List[PriceListing]:
         await asyncio.sleep(0.05)
         base = 100.0 + random.uniform(-30, 80)
-        listings = []
-        for seller in ["RetailerA", "RetailerB", "RetailerC"]:
-            listings.append(PriceListing(
+        now = time.time()
+        return [
+            PriceListing(
                 seller=seller,
                 price=round(base * random.uniform(0.9, 1.2), 2),
                 currency="USD",
                 shipping=round(random.uniform(0, 10), 2),
-                timestamp=time.time(),
-            ).dict())
-        return listings
+                timestamp=now,
+            )
+            for seller in ("RetailerA", "RetailerB", "RetailerC")
+        ]
 
-    def _run(self, product_id_or_query: str) -> List[Dict[str, Any]]:
+    def _run(self, product_id_or_query: str) -> List[PriceListing]:
         return asyncio.get_event_loop().run_until_complete(self._arun(product_id_or_query))
 
 
@@ -47,34 +51,106 @@ class PriceHistoryTool(BaseTool):
     name: str = "get_price_history"
     description: str = "Return a simple price time series for the product."
 
-    @retry(stop=stop_after_attempt(2), wait=wait_exponential(multiplier=0.2, max=1))
-    async def _arun(self, product_id: str) -> str:
+    @traced("tool.get_price_history")
+    @ttl_cached("get_price_history")
+    @single_flight("get_price_history")
+    @guarded("get_price_history")
+    @deadline_retry(2, multiplier=0.2, max_wait=1)
+    async def _arun(self, product_id: str) -> List[PricePoint]:
         await asyncio.sleep(0.02)
         # Simple synthetic history
         now = int(time.time())
-        history = [{"ts": now - i * 86400, "price": round(100 + (i % 10) * 2 + random.uniform(-5, 5), 2)} for i in range(30)]
-        return history
+        return [PricePoint(now - i * 86400, round(100 + (i % 10) * 2 + random.uniform(-5, 5), 2)) for i in range(30)]
 
     def _run(self, product_id: str):
         return asyncio.get_event_loop().run_until_complete(self._arun(product_id))
 
 
+# Upstream accounting for stock checks (pairs requested vs. per-seller calls made)
+_stock_pairs = registry.counter("wizecart_stock_pairs_total", "Seller/product pairs requested from check_stock")
+_stock_upstream = registry.counter("wizecart_stock_upstream_calls_total",
+                                   "Per-seller upstream requests made by check_stock")
+
+
+def stock_check_stats() -> Dict[str, int]:
+    return {"pairs": int(_stock_pairs.value), "upstream_calls": int(_stock_upstream.value)}
+
+
+def _stock_pair(pair) -> tuple:
+    if isinstance(pair, dict):
+        return pair.get("seller"), pair.get("product_id")
+    return tuple(pair)
+
+
 class CheckStockTool(BaseTool):
     name: str = "check_stock"
     description: str = "Check stock for a product at a seller. Returns availability and ETA."
 
-    @retry(stop=stop_after_attempt(2), wait=wait_exponential(multiplier=0.1, max=1))
-    async def _arun(self, payload: dict) -> dict:
-        # payload: {"seller":..., "product_id":...}
+    async def _arun(self, payload: dict | list) -> dict | list:
+        # payload: {"seller":..., "product_id":...} or a list of such pairs
+        if isinstance(payload, (list, tuple)):
+            return await self._arun_batch(payload)
+        return (await self._arun_batch([payload]))[0]
+
+    @traced("tool.check_stock")
+    async def _arun_batch(self, pairs: list, max_concurrency: int | None = None) -> List[StockCheck]:
+        # Resolve many (seller, product_id) pairs: one upstream call per seller chunk,
+        # with at most `max_concurrency` seller calls in flight. Results keep input order.
+        keys = [_stock_pair(p) for p in pairs]
+        by_seller: Dict[Any, List[Any]] = {}
+        for seller, product_id in dict.fromkeys(keys):
+            by_seller.setdefault(seller, []).append(product_id)
+
+        chunk = max(1, settings.STOCK_BATCH_MAX_SIZE)
+        sem = asyncio.Semaphore(max_concurrency or settings.STOCK_BATCH_CONCURRENCY)
+
+        async def _run_chunk(seller, product_ids):
+            async with sem:
+                return await self._fetch_seller_stock(seller, product_ids)
+
+        chunks = await asyncio.gather(*[
+            _run_chunk(seller, product_ids[i:i + chunk])
+            for seller, product_ids in by_seller.items()
+            for i in range(0, len(product_ids), chunk)
+        ])
+        resolved = {(r["seller"], r["product_id"]): r for rows in chunks for r in rows}
+        _stock_pairs.inc(len(keys))
+        missing = [k for k in keys if k not in resolved]
+        if missing:
+            raise LookupError(f"check_stock: no result for {len(missing)} pairs, e.g. {missing[0]}")
+        return [resolved[k] for k in keys]
+
+    @guarded("check_stock", batch=True)
+    @deadline_retry(2, multiplier=0.1, max_wait=1)
+    async def _fetch_seller_stock(self, seller: str, product_ids: List[str]) -> List[StockCheck]:
+        # One simulated upstream request covering every product for this seller
+        _stock_upstream.inc()
         await asyncio.sleep(0.01)
-        availability = random.choice(["in_stock", "limited", "out_of_stock"])
-        eta_days = 0 if availability == "in_stock" else random.choice([2,5,10])
-        return {"seller": payload.get("seller"), "product_id": payload.get("product_id"), "availability": availability, "eta_days": eta_days}
-
-    def _run(self, payload: dict) -> dict:
+        rows = []
+        for product_id in product_ids:
+            availability = random.choice(["in_stock", "limited", "out_of_stock"])
+            eta_days = 0 if availability == "in_stock" else random.choice([2,5,10])
+            rows.append(StockCheck(seller, product_id, availability, eta_days))
+        return rows
+
+    def _run(self, payload: dict | list) -> dict | list:
         return asyncio.get_event_loop().run_until_complete(self._arun(payload))
 
+
+class StockCheckBatcher(MicroBatcher):
+    """Coalesces stock checks from concurrent events into shared per-seller batches.
+
+    Pairs submitted within `window` seconds of each other are flushed together
+    through `CheckStockTool._arun_batch`, so many products per second cost one
+    upstream call per seller per window instead of one per pair.
+    """
+
+    def __init__(self, tool: CheckStockTool, window: float = 0.002):
+        super().__init__(tool, window=window, name="check_stock_batch")
+
+
 # Export tool instances for LangChain usage
 price_search_tool = PriceSearchTool()
 price_history_tool = PriceHistoryTool()
 check_stock_tool = CheckStockTool()
+stock_check_batcher = StockCheckBatcher(check_stock_tool, window=settings.STOCK_BATCH_WINDOW)
@@ -1,39 +1,55 @@
 """Tool: get_user_profile
 
-Returns user financial profile, preferences, budget constraints.
+Returns user financial profile, preferences, budget constraints as `Profile` records.
+`_arun_batch` fetches many profiles in one upstream request.
 """
-from typing import Dict, Any
-from pydantic import BaseModel
+from typing import Dict, List
 import asyncio
-from langchain.tools import BaseTool
-from tenacity import retry, stop_after_attempt, wait_exponential
 
+from real_time_shopping_assistant.infra.metrics import registry
+from real_time_shopping_assistant.infra.tracing import traced
+from real_time_shopping_assistant.tools.records import Profile
+from real_time_shopping_assistant.tools.resilience import deadline_retry, guarded
+from real_time_shopping_assistant.utils.langchain_compat import BaseTool
 
-class ProfileSchema(BaseModel):
-    user_id: str
-    monthly_budget: float
-    current_balance: float
-    loyalty_tier: str
-    preferences: Dict[str, Any]
+
+# Upstream request accounting for the batch endpoint
+_profile_upstream = registry.counter("wizecart_profile_upstream_calls_total",
+                                     "Multi-get requests made by get_user_profile")
+_profiles_fetched = registry.counter("wizecart_profiles_fetched_total", "Profiles fetched by get_user_profile")
+
+
+def profile_stats() -> Dict[str, int]:
+    return {"upstream_calls": int(_profile_upstream.value), "profiles": int(_profiles_fetched.value)}
 
 
 class GetUserProfileTool(BaseTool):
     name: str = "get_user_profile"
     description: str = "Returns user profile with budget and preferences."
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.2, max=2))
-    async def _arun(self, user_id: str) -> str:
+    async def _arun(self, user_id: str) -> Profile:
+        return (await self._arun_batch([user_id]))[0]
+
+    @traced("tool.get_user_profile")
+    @guarded("get_user_profile", batch=True)
+    @deadline_retry(3, multiplier=0.2, max_wait=2)
+    async def _arun_batch(self, user_ids: List[str]) -> List[Profile]:
+        # Multi-get: one upstream request for every profile in the batch, in input order
+        _profile_upstream.inc()
+        _profiles_fetched.inc(len(user_ids))
         await asyncio.sleep(0.02)
-        sample = {
-            "user_id": user_id,
-            "monthly_budget": 800.0,
-            "current_balance": 250.0,
-            "loyalty_tier": "gold",
-            "preferences": {"brands": ["BrandA"], "avoid_categories": ["expensive_gadgets"]},
-        }
-        return ProfileSchema(**sample).json()
-
-    def _run(self, user_id: str) -> str:
+        return [
+            Profile(
+                user_id=user_id,
+                monthly_budget=800.0,
+                current_balance=250.0,
+                loyalty_tier="gold",
+                preferences={"brands": ["BrandA"], "avoid_categories": ["expensive_gadgets"]},
+            )
+            for user_id in user_ids
+        ]
+
+    def _run(self, user_id: str) -> Profile:
         return asyncio.get_event_loop().run_until_complete(self._arun(user_id))
 
 
@@ -0,0 +1,131 @@
+"""Typed internal records passed between tools and agents.
+
+Tools return these `__slots__` objects directly. Nothing on the hot path validates,
+copies or serializes them; that happens only at the edges (logs, HTTP, storage) via
+`to_dict` / `to_plain`. `rec["field"]` and `rec.get("field")` work like on a dict, and
+agents read fields that way (not as attributes), so they also accept plain dicts from
+outside (tests, JSON input).
+Records are shared through caches and fetch contexts, so treat them as read-only.
+"""
+from typing import Any, Dict, List
+
+
+class Record:
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def keys(self):
+        return self.__slots__
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {f: to_plain(getattr(self, f)) for f in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{f}={getattr(self, f)!r}" for f in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+def to_plain(obj: Any) -> Any:
+    """Recursively turn records (and containers of them) into JSON-ready dicts/lists."""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    if isinstance(obj, dict):
+        return {k: to_plain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_plain(v) for v in obj]
+    return obj
+
+
+class PriceListing(Record):
+    __slots__ = ("seller", "price", "currency", "shipping", "timestamp")
+
+    def __init__(self, seller: str, price: float, currency: str, shipping: float, timestamp: float):
+        self.seller = seller
+        self.price = price
+        self.currency = currency
+        self.shipping = shipping
+        self.timestamp = timestamp
+
+
+class PricePoint(Record):
+    __slots__ = ("ts", "price")
+
+    def __init__(self, ts: float, price: float):
+        self.ts = ts
+        self.price = price
+
+
+class Coupon(Record):
+    __slots__ = ("code", "discount_pct", "expires_in_days")
+
+    def __init__(self, code: str, discount_pct: float, expires_in_days: int):
+        self.code = code
+        self.discount_pct = discount_pct
+        self.expires_in_days = expires_in_days
+
+
+class Review(Record):
+    __slots__ = ("review_id", "rating", "text", "timestamp")
+
+    def __init__(self, review_id: str, rating: int, text: str, timestamp: float):
+        self.review_id = review_id
+        self.rating = rating
+        self.text = text
+        self.timestamp = timestamp
+
+
+class StockCheck(Record):
+    __slots__ = ("seller", "product_id", "availability", "eta_days")
+
+    def __init__(self, seller: str, product_id: str, availability: str, eta_days: int):
+        self.seller = seller
+        self.product_id = product_id
+        self.availability = availability
+        self.eta_days = eta_days
+
+
+class Profile(Record):
+    __slots__ = ("user_id", "monthly_budget", "current_balance", "loyalty_tier", "preferences")
+
+    def __init__(self, user_id: str, monthly_budget: float, current_balance: float, loyalty_tier: str,
+                 preferences: Dict[str, Any]):
+        self.user_id = user_id
+        self.monthly_budget = monthly_budget
+        self.current_balance = current_balance
+        self.loyalty_tier = loyalty_tier
+        self.preferences = preferences
+
+
+class CartItem(Record):
+    __slots__ = ("product_id", "name", "price", "qty")
+
+    def __init__(self, product_id: str, name: str, price: float, qty: int):
+        self.product_id = product_id
+        self.name = name
+        self.price = price
+        self.qty = qty
+
+
+class Cart(Record):
+    __slots__ = ("user_id", "items")
+
+    def __init__(self, user_id: str, items: List[CartItem]):
+        self.user_id = user_id
+        self.items = items
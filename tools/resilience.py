@@ -0,0 +1,168 @@
+"""Per-event deadlines, deadline-aware retries, circuit breakers and degraded fallbacks.
+
+`deadline_scope(budget)` (from `fetch_context`) sets an absolute deadline in a
+context variable, so every tool call made while handling the event (including tasks
+it spawns) sees the same remaining budget. `deadline_retry` stops retrying once the
+next backoff no longer fits in that budget. `guarded(name)` bounds each upstream call by the remaining
+budget and reports the outcome to the tool's circuit breaker. While the breaker is
+open, calls fail fast. Every failure returns the tool's last good value for the same
+arguments when there is one, and raises `ToolUnavailable` otherwise. Batch methods
+(`guarded(name, batch=True)`) keep last good values per item instead, so a degraded
+batch is served whenever every one of its items has been seen before, in any batch.
+"""
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity.stop import stop_base
+
+from real_time_shopping_assistant.config.settings import settings
+from real_time_shopping_assistant.infra.metrics import registry
+from real_time_shopping_assistant.tools.fetch_context import deadline_scope, freeze_args, time_left  # noqa: F401
+
+
+class ToolUnavailable(RuntimeError):
+    """A tool failed (error, timeout or open circuit) and has no last good value."""
+
+
+class CircuitOpenError(ToolUnavailable):
+    pass
+
+
+class stop_at_deadline(stop_base):
+    # Tenacity computes the upcoming sleep before asking the stop condition
+    def __call__(self, retry_state) -> bool:
+        left = time_left()
+        return left is not None and left <= (retry_state.upcoming_sleep or 0.0)
+
+
+def deadline_retry(attempts: int, multiplier: float, max_wait: float):
+    """Exponential-backoff retry that also gives up when the event's budget runs out."""
+    return retry(
+        stop=stop_after_attempt(attempts) | stop_at_deadline(),
+        wait=wait_exponential(multiplier=multiplier, max=max_wait),
+        reraise=True,
+    )
+
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures; one trial call
+    per `reset_timeout` while open (half-open), closing again on success."""
+
+    CLOSED, OPEN, HALF_OPEN = 0, 1, 2
+
+    def __init__(self, name: str, failure_threshold: int | None = None, reset_timeout: float | None = None,
+                 clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = settings.BREAKER_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._state_gauge = registry.gauge("wizecart_circuit_state", "0 closed, 1 open, 2 half-open", tool=name)
+        self.short_circuits = registry.counter("wizecart_tool_short_circuits_total",
+                                               "Calls rejected by an open circuit", tool=name)
+
+    def _set_state(self, state: int):
+        self.state = state
+        self._state_gauge.set(state)
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        now = self.clock()
+        if now - self._opened_at >= self.reset_timeout:
+            # Let one trial through; re-arm the timer so a hung trial cannot wedge the breaker
+            self._opened_at = now
+            self._set_state(self.HALF_OPEN)
+            return True
+        self.short_circuits.inc()
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        if self.state != self.CLOSED:
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._opened_at = self.clock()
+            self._set_state(self.OPEN)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name)
+    return breaker
+
+
+def breaker_states() -> Dict[str, int]:
+    return {name: breaker.state for name, breaker in _breakers.items()}
+
+
+def guarded(name: str, batch: bool = False):
+    """Bound a tool method by the event deadline, behind the tool's circuit breaker.
+
+    With `batch=True` the last positional argument is a list of items and the method
+    returns one result per item, in order; last good values are then kept per item.
+    """
+    def decorator(fn):
+        breaker = get_breaker(name)
+        last_good: "OrderedDict[Any, Any]" = OrderedDict()
+        failures = registry.counter("wizecart_tool_failures_total", "Failed or timed-out tool calls", tool=name)
+        degraded = registry.counter("wizecart_tool_degraded_total", "Tool calls served from the last good value",
+                                    tool=name)
+
+        def _keys(args) -> List[Any]:
+            if batch:
+                return [freeze_args((*args[:-1], item)) for item in args[-1]]
+            return [freeze_args(args)]
+
+        def _fallback(keys, exc: Exception):
+            if all(key in last_good for key in keys):
+                degraded.inc()
+                values = [last_good[key] for key in keys]
+                return values if batch else values[0]
+            if isinstance(exc, ToolUnavailable):
+                raise exc
+            raise ToolUnavailable(f"{name} unavailable: {exc!r}") from exc
+
+        def _remember(keys, value):
+            values = value if batch else [value]
+            if len(values) != len(keys):
+                return
+            for key, item in zip(keys, values):
+                last_good[key] = item
+                last_good.move_to_end(key)
+            while len(last_good) > settings.CACHE_MAX_ENTRIES:
+                last_good.popitem(last=False)
+
+        @functools.wraps(fn)
+        async def wrapper(self, *args, **kwargs):
+            keys = _keys(args)
+            if not breaker.allow():
+                return _fallback(keys, CircuitOpenError(f"{name} circuit open"))
+            left = time_left()
+            try:
+                if left is not None and left <= 0:
+                    raise asyncio.TimeoutError("event deadline exceeded")
+                call = fn(self, *args, **kwargs)
+                value = await (call if left is None else asyncio.wait_for(call, left))
+            except Exception as exc:
+                failures.inc()
+                breaker.record_failure()
+                return _fallback(keys, exc)
+            breaker.record_success()
+            _remember(keys, value)
+            return value
+        return wrapper
+    return decorator
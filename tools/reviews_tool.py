@@ -2,27 +2,28 @@
 
 Returns synthetic reviews and demonstrates a deterministic sentiment fallback.
 """
-from typing import List, Dict, Any
+from typing import List
 import asyncio
-from pydantic import BaseModel
-from tenacity import retry, stop_after_attempt, wait_exponential
-from langchain.tools import BaseTool
 import random
 
-
-class Review(BaseModel):
-    review_id: str
-    rating: int
-    text: str
-    timestamp: float
+from real_time_shopping_assistant.infra.tracing import traced
+from real_time_shopping_assistant.tools.resilience import deadline_retry, guarded
+from real_time_shopping_assistant.tools.cache import ttl_cached
+from real_time_shopping_assistant.tools.records import Review
+from real_time_shopping_assistant.tools.single_flight import single_flight
+from real_time_shopping_assistant.utils.langchain_compat import BaseTool
 
 
 class GetReviewsTool(BaseTool):
     name: str = "get_reviews"
     description: str = "Return raw reviews and metadata for a product."
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.2, max=1))
-    async def _arun(self, product_id: str) -> List[Dict[str, Any]]:
+    @traced("tool.get_reviews")
+    @ttl_cached("get_reviews")
+    @single_flight("get_reviews")
+    @guarded("get_reviews")
+    @deadline_retry(3, multiplier=0.2, max_wait=1)
+    async def _arun(self, product_id: str) -> List[Review]:
         await asyncio.sleep(0.03)
         # generate synthetic reviews
         sample_texts = [
@@ -32,10 +33,12 @@ class GetReviewsTool(BaseTool):
             "Mediocre build and poor customer support.",
             "Comfortable to wear, noise cancellation decent.",
         ]
+        # Seed per product so a review_id always refers to the same review text
+        rng = random.Random(product_id)
         reviews = []
         for i in range(20):
-            text = random.choice(sample_texts)
-            reviews.append(Review(review_id=f"r_{i}", rating=random.randint(1,5), text=text, timestamp=0).dict())
+            text = rng.choice(sample_texts)
+            reviews.append(Review(f"{product_id}:r_{i}", rng.randint(1,5), text, 0.0))
         return reviews
 
     def _run(self, product_id: str):
@@ -0,0 +1,79 @@
+"""Single-flight coalescing of concurrent identical tool calls.
+
+While a call for some arguments is in flight, further calls with the same arguments
+await the same task instead of issuing another upstream request. Every waiter gets
+the result or the exception. The shared call runs without any caller's deadline; each
+waiter is bounded by its own `time_left()` instead, and waiters are shielded, so a
+waiter timing out or being cancelled does not cancel the shared call. Leader and coalesced counts are kept per tool and exported
+as `wizecart_tool_upstream_calls_total` / `wizecart_tool_calls_coalesced_total`.
+"""
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict
+
+from real_time_shopping_assistant.infra.metrics import registry
+from real_time_shopping_assistant.tools.fetch_context import freeze_args, time_left, without_deadline
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Any, asyncio.Future] = {}
+        self._leaders = registry.counter("wizecart_tool_upstream_calls_total",
+                                         "Tool calls that went upstream (single-flight leaders)", tool=name)
+        self._coalesced = registry.counter("wizecart_tool_calls_coalesced_total",
+                                           "Tool calls that joined an identical in-flight call", tool=name)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def _done(self, key: Any, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Any, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(without_deadline(fetch))
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._done, key))
+            self._leaders.inc()
+        else:
+            self._coalesced.inc()
+        left = time_left()
+        shared = asyncio.shield(task)
+        return await (shared if left is None else asyncio.wait_for(shared, max(left, 0.0)))
+
+    def stats(self) -> Dict[str, int]:
+        return {"upstream": int(self._leaders.value), "coalesced": int(self._coalesced.value),
+                "in_flight": len(self._inflight)}
+
+
+_flights: Dict[str, SingleFlight] = {}
+
+
+def get_flight(name: str) -> SingleFlight:
+    flight = _flights.get(name)
+    if flight is None:
+        flight = _flights[name] = SingleFlight(name)
+    return flight
+
+
+def single_flight_stats() -> Dict[str, Dict[str, int]]:
+    return {name: flight.stats() for name, flight in _flights.items()}
+
+
+def single_flight(name: str):
+    """Decorate a tool's `_arun(self, arg)` so identical concurrent calls share one task."""
+    def decorator(fn):
+        flight = get_flight(name)
+
+        @functools.wraps(fn)
+        async def wrapper(self, arg):
+            return await flight.do(freeze_args(arg), lambda: fn(self, arg))
+        return wrapper
+    return decorator
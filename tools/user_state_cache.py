@@ -0,0 +1,129 @@
+"""Per-user cache for profiles and carts with event-driven invalidation.
+
+A user's profile rarely changes between their events, so profiles and carts are
+cached per user. Instead of relying only on a short TTL, each incoming event drops
+the state it makes stale (`cart_add` drops the cart but keeps the profile).
+Profile misses from concurrent events are coalesced into one multi-get, and
+`prefetch_profiles` warms the cache for a whole batch of events with a single upstream
+call; invalidation still happens per event, in order.
+"""
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+from real_time_shopping_assistant.config.settings import settings
+from real_time_shopping_assistant.tools.batching import MicroBatcher
+from real_time_shopping_assistant.tools.cache import TTLCache, _MISSING
+from real_time_shopping_assistant.tools.cart_tool import tool as cart_tool
+from real_time_shopping_assistant.tools.profile_tool import tool as profile_tool
+from real_time_shopping_assistant.tools.records import Cart, Profile
+
+# Which cached user state each event type makes stale; unknown types rely on the TTL
+EVENT_INVALIDATIONS: Dict[str, tuple] = {
+    "cart_add": ("cart",),
+    "cart_remove": ("cart",),
+    "cart_update": ("cart",),
+    "checkout": ("cart", "profile"),
+    "purchase": ("cart", "profile"),
+    "profile_update": ("profile",),
+    "budget_update": ("profile",),
+    "wishlist_add": (),
+    "price_alert": (),
+}
+
+
+class _CachedLookup:
+    """Tool-shaped view of one cache, so it can go through `FetchContext.call`."""
+
+    def __init__(self, name: str, get):
+        self.name = name
+        self._get = get
+
+    async def _arun(self, user_id: str) -> Any:
+        return await self._get(user_id)
+
+
+class UserStateCache:
+    def __init__(self, profile_tool=profile_tool, cart_tool=cart_tool, profile_ttl: float | None = None,
+                 cart_ttl: float | None = None, max_users: int | None = None, window: float | None = None,
+                 clock: Callable[[], float] = time.monotonic):
+        max_users = max_users or settings.USER_CACHE_MAX_USERS
+        profile_ttl = settings.USER_CACHE_TTL_PROFILE if profile_ttl is None else profile_ttl
+        cart_ttl = settings.USER_CACHE_TTL_CART if cart_ttl is None else cart_ttl
+        window = settings.USER_CACHE_BATCH_WINDOW if window is None else window
+        self.profile_tool = profile_tool
+        self.cart_tool = cart_tool
+        self.profiles = TTLCache("user_profile", ttl=profile_ttl, max_size=max_users, clock=clock)
+        self.carts = TTLCache("user_cart", ttl=cart_ttl, max_size=max_users, clock=clock)
+        self.profile_batcher = MicroBatcher(profile_tool, window=window)
+        self.profile_lookup = _CachedLookup(profile_tool.name, self.get_profile)
+        self.cart_lookup = _CachedLookup(cart_tool.name, self.get_cart)
+
+    def on_event(self, event: Dict[str, Any]) -> tuple:
+        """Invalidate whatever this event makes stale; returns the invalidated kinds."""
+        kinds = EVENT_INVALIDATIONS.get(event.get("type") or event.get("event_type"), ())
+        user_id = event.get("user_id")
+        for kind in kinds:
+            (self.carts if kind == "cart" else self.profiles).invalidate(user_id)
+        return kinds
+
+    async def _fetch_profile(self, user_id: str) -> Profile:
+        return (await self.profile_batcher._arun([user_id]))[0]
+
+    async def get_profile(self, user_id: str) -> Profile:
+        if not settings.CACHE_ENABLED:
+            return await self.profile_tool._arun(user_id)
+        return await self.profiles.get_or_fetch(user_id, lambda: self._fetch_profile(user_id))
+
+    async def get_profiles(self, user_ids: Sequence[str]) -> Dict[str, Profile]:
+        """Multi-get: cached profiles plus one upstream batch call for all misses."""
+        unique = list(dict.fromkeys(user_ids))
+        if not settings.CACHE_ENABLED:
+            return dict(zip(unique, await self.profile_tool._arun_batch(unique)))
+        out: Dict[str, Profile] = {}
+        misses: List[str] = []
+        for user_id in unique:
+            value, fresh = self.profiles.lookup(user_id)
+            if value is not _MISSING and fresh:
+                self.profiles.hits += 1
+                out[user_id] = value
+            else:
+                misses.append(user_id)
+        if misses:
+            self.profiles.misses += len(misses)
+            # Same in-flight bookkeeping as get_or_fetch: an invalidation during the call wins
+            for user_id in misses:
+                self.profiles.begin_fetch(user_id)
+            profiles: List[Profile] = []
+            try:
+                profiles = await self.profile_tool._arun_batch(misses)
+            finally:
+                for i, user_id in enumerate(misses):
+                    self.profiles.end_fetch(user_id, profiles[i] if i < len(profiles) else _MISSING)
+            out.update(zip(misses, profiles))
+        return out
+
+    async def prefetch_profiles(self, events: Sequence[Dict[str, Any]]) -> Dict[str, Profile]:
+        """Multi-get the profiles a batch will read before anything in it changes them.
+
+        A user whose first event in the batch drops the profile (checkout, purchase,
+        profile_update, ...) is left out: that event's own invalidation would discard it.
+        """
+        first: Dict[Any, Dict[str, Any]] = {}
+        for event in events:
+            first.setdefault(event.get("user_id"), event)
+        return await self.get_profiles([
+            user_id for user_id, event in first.items()
+            if "profile" not in EVENT_INVALIDATIONS.get(event.get("type") or event.get("event_type"), ())
+        ])
+
+    async def get_cart(self, user_id: str) -> Cart:
+        if not settings.CACHE_ENABLED:
+            return await self.cart_tool._arun(user_id)
+        return await self.carts.get_or_fetch(user_id, lambda: self.cart_tool._arun(user_id))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"profiles": self.profiles.stats(), "carts": self.carts.stats(),
+                "profile_batches": self.profile_batcher.flushes}
+
+
+user_state_cache = UserStateCache()
@@ -0,0 +1,98 @@
+"""Streaming event readers.
+
+`stream_events` yields events from disk as an async generator without loading the
+whole file: JSONL files are read line by line and top-level JSON arrays are parsed
+incrementally, one element at a time. With `follow=True` a JSONL file is tailed as
+it grows; while no new data is available the generator yields `None` instead of
+sleeping, and the consumer decides how to wait (the event engine treats it as an
+idle poll and backs off).
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict
+
+from real_time_shopping_assistant.infra.logging_setup import logger
+
+_CHUNK_SIZE = 64 * 1024
+_decoder = json.JSONDecoder()
+
+
+async def _read(f, size: int) -> str:
+    return await asyncio.to_thread(f.read, size)
+
+
+def _skip_ws(buf: str, pos: int) -> int:
+    while pos < len(buf) and buf[pos] in " \t\r\n":
+        pos += 1
+    return pos
+
+
+async def _iter_jsonl(f, buf: str, follow: bool) -> AsyncIterator[Dict[str, Any] | None]:
+    while True:
+        lines = buf.split("\n")
+        buf = lines.pop()
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning("Skipping malformed JSONL line: %.80s", line)
+        chunk = await _read(f, _CHUNK_SIZE)
+        if chunk:
+            buf += chunk
+            continue
+        if not follow:
+            break
+        # Tail mode: report idleness; the next pull polls for appended data
+        yield None
+    if buf.strip():
+        try:
+            yield json.loads(buf)
+        except json.JSONDecodeError:
+            logger.warning("Skipping truncated trailing JSONL line: %.80s", buf)
+
+
+async def _iter_json_array(f, buf: str) -> AsyncIterator[Dict[str, Any]]:
+    pos = _skip_ws(buf, 0) + 1  # past the opening '['
+    eof = False
+    while True:
+        pos = _skip_ws(buf, pos)
+        if pos < len(buf) and buf[pos] == ",":
+            pos = _skip_ws(buf, pos + 1)
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        if pos < len(buf):
+            try:
+                item, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield item
+                pos = end
+                continue
+        if eof:
+            raise ValueError("Unterminated JSON array in event file")
+        chunk = await _read(f, _CHUNK_SIZE)
+        eof = not chunk
+        # Drop consumed input so memory stays bounded by the largest element
+        buf, pos = buf[pos:] + chunk, 0
+
+
+async def stream_events(path: str, follow: bool = False) -> AsyncIterator[Dict[str, Any] | None]:
+    """Yield events from a JSONL file or a file holding a top-level JSON array."""
+    with open(path, "r", encoding="utf-8") as f:
+        buf = ""
+        while not buf.strip():
+            chunk = await _read(f, _CHUNK_SIZE)
+            if not chunk:
+                break
+            buf += chunk
+        if buf.lstrip().startswith("["):
+            async for event in _iter_json_array(f, buf):
+                yield event
+        else:
+            async for event in _iter_jsonl(f, buf, follow):
+                yield event
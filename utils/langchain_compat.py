@@ -1,21 +1,57 @@
 """Compatibility shim for LangChain Tool API differences across versions.
 
-Defines a minimal `Tool` class with `from_function` to be used when
-`langchain.tools.Tool` is unavailable in the environment.
+Defines minimal `Tool` (with `from_function`) and `BaseTool` classes with the
+interface the agents and tools use. LangChain is not imported here: importing it
+takes about a second, so it is loaded only when `as_langchain()` is first called
+to hand a tool to a LangChain agent (which needs `langchain-core`).
 """
-try:
-    from langchain.tools import Tool as LC_Tool
-    Tool = LC_Tool
-except Exception:
-    class Tool:
-        def __init__(self, func=None, name: str | None = None, description: str | None = None):
-            self.func = func
-            self.name = name
-            self.description = description
-
-        @classmethod
-        def from_function(cls, func, name: str | None = None, description: str | None = None):
-            return cls(func=func, name=name, description=description)
-
-        def __repr__(self):
-            return f"<Tool name={self.name} desc={self.description}>"
+import asyncio
+
+
+def _structured_tool():
+    try:
+        from langchain_core.tools import StructuredTool
+    except ImportError as exc:
+        raise ImportError("as_langchain() needs langchain-core (pip install 'langchain-core>=0.1.0')") from exc
+    return StructuredTool
+
+
+class Tool:
+    def __init__(self, func=None, name: str | None = None, description: str | None = None):
+        self.func = func
+        self.name = name
+        self.description = description
+
+    @classmethod
+    def from_function(cls, func, name: str | None = None, description: str | None = None):
+        return cls(func=func, name=name, description=description)
+
+    def as_langchain(self):
+        StructuredTool = _structured_tool()
+        if asyncio.iscoroutinefunction(self.func):
+            return StructuredTool.from_function(coroutine=self.func, name=self.name, description=self.description)
+        return StructuredTool.from_function(func=self.func, name=self.name, description=self.description)
+
+    def __repr__(self):
+        return f"<Tool name={self.name} desc={self.description}>"
+
+
+class BaseTool:
+    """Stand-in for `langchain.tools.BaseTool`: subclasses set `name`/`description`
+    as class attributes and implement `_arun` (and `_run` for sync callers)."""
+
+    name: str = ""
+    description: str = ""
+
+    async def _arun(self, *args, **kwargs):
+        raise NotImplementedError
+
+    def _run(self, *args, **kwargs):
+        raise NotImplementedError
+
+    def as_langchain(self):
+        return _structured_tool().from_function(func=self._run, coroutine=self._arun, name=self.name,
+                                                description=self.description)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} name={self.name}>"
@@ -0,0 +1,38 @@
+"""Deferred initialization helpers for fast startup.
+
+`lazy_singletons` builds a module-level `__getattr__` (PEP 562) that creates a
+module's singletons on first access and stores them in the module namespace, so
+later lookups are ordinary global reads with no indirection. Modules stay cheap to
+import. Disk, thread and index work happens the first time a singleton is used.
+"""
+import threading
+from types import ModuleType
+from typing import Any, Callable, Dict
+
+
+def lazy_singletons(namespace: Dict[str, Any], **factories: Callable[[], Any]):
+    """Return a module `__getattr__` that builds `name` with `factories[name]()` once.
+
+    A factory may return a dict to define several related names at once.
+    """
+    lock = threading.RLock()
+
+    def __getattr__(name: str) -> Any:
+        factory = factories.get(name)
+        if factory is None:
+            raise AttributeError(f"module {namespace['__name__']!r} has no attribute {name!r}")
+        with lock:
+            if name not in namespace:
+                value = factory()
+                if isinstance(value, dict):
+                    namespace.update(value)
+                else:
+                    namespace[name] = value
+        return namespace[name]
+
+    return __getattr__
+
+
+def initialized(module: ModuleType, name: str) -> bool:
+    """True once `module.name` exists, without triggering its creation."""
+    return name in vars(module)